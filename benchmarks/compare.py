@@ -0,0 +1,55 @@
+# benchmarks/compare.py
+"""Compare two benchmark result files
+
+Usage:
+    python -m benchmarks.compare baseline.json current.json [--threshold 0.1]
+
+Exits with status 1 if a benchmark got slower than the threshold (relative
+change of its median time).
+"""
+import sys
+import json
+import argparse
+from typing import List, Optional
+
+def compare(baseline: dict, current: dict, threshold: float) -> List[dict]:
+    """Relative change of the median time of each benchmark present and run in both results"""
+    rows = []
+    for name, result in current['benchmarks'].items():
+        before = baseline['benchmarks'].get(name)
+        if not before or 'skipped' in before or 'skipped' in result:
+            continue
+        change = result['median_seconds'] / before['median_seconds'] - 1
+        rows.append({
+            'name': name,
+            'baseline_seconds': before['median_seconds'],
+            'current_seconds': result['median_seconds'],
+            'change': change,
+            'regression': change > threshold
+        })
+    return rows
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="Relative slowdown reported as a regression (default: 0.1)")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    rows = compare(baseline, current, args.threshold)
+    for row in rows:
+        flag = '  REGRESSION' if row['regression'] else ''
+        print(f"{row['name']:<22} {row['baseline_seconds'] * 1000:10.2f} ms -> "
+              f"{row['current_seconds'] * 1000:10.2f} ms  {row['change'] * 100:+7.1f}%{flag}")
+
+    if any(row['regression'] for row in rows):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
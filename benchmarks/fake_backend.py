@@ -0,0 +1,44 @@
+# benchmarks/fake_backend.py
+from typing import List, Tuple
+import numpy as np
+from utils.backends.base import TTSModelWrapper
+
+SAMPLE_RATE = 22050
+# Audio produced per input character, roughly the speaking rate of real voices
+SAMPLES_PER_CHARACTER = 1200
+
+class FakeWrapper(TTSModelWrapper):
+    """Deterministic stand-in backend for benchmarks
+
+    Produces a tone whose length is proportional to the text length, with a
+    fixed amount of numeric work per output sample, so that timings depend on
+    the pipeline around the model and not on model files.
+    """
+
+    def __init__(self, model_config: dict):
+        self.config = model_config
+        self.loaded = False
+
+    def load_model(self) -> bool:
+        self.loaded = True
+        return True
+
+    def _waveform(self, text: str) -> np.ndarray:
+        num_samples = max(1, len(text)) * SAMPLES_PER_CHARACTER
+        t = np.arange(num_samples, dtype=np.float32) / SAMPLE_RATE
+        frequency = 120 + (sum(map(ord, text)) % 80)
+        return 0.3 * np.sin(2 * np.pi * frequency * t) * np.exp(-t % 0.25)
+
+    def synthesize_pcm(self, text: str) -> Tuple[np.ndarray, int]:
+        return (self._waveform(text) * 32767).astype(np.int16), SAMPLE_RATE
+
+    def synthesize_pcm_batch(self, texts: List[str]) -> List[Tuple[np.ndarray, int]]:
+        return [self.synthesize_pcm(text) for text in texts]
+
+    @property
+    def sample_rate(self) -> int:
+        return SAMPLE_RATE
+
+    @property
+    def checkpoint_id(self) -> str:
+        return 'fake'
@@ -0,0 +1,312 @@
+# benchmarks/run.py
+"""Benchmarks of the synthesis pipeline stages, in isolation and end to end
+
+Runs without model files: synthesis uses a deterministic fake backend.
+Results are written as JSON, to compare them between commits with
+benchmarks/compare.py.
+
+Usage:
+    python -m benchmarks.run [--quick] [--only NAME ...] [--output results.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from typing import Callable, Dict, List, Optional
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+# The server module loads the models of its config at import: point it to a config without models
+os.environ.setdefault('TTS_API_CONFIG', os.path.join(BENCHMARKS_DIR, 'config.json'))
+os.environ.setdefault('TTS_LOG_DIR', os.path.join(tempfile.gettempdir(), 'tts-benchmarks'))
+
+import numpy as np
+
+VOICE = 'benchmark-ca'
+
+def load_corpus() -> List[str]:
+    with open(os.path.join(BENCHMARKS_DIR, 'corpus_ca.txt'), encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+class Skip(Exception):
+    """Raised by a benchmark setup when the benchmark can't run in this environment"""
+    pass
+
+class Benchmark:
+    """A timed function with the amount of work done per call
+
+    Args:
+        name (str): Benchmark name, used as key in the results
+        setup: Function returning (function to time, work units per call, unit name, extra result fields)
+    """
+
+    def __init__(self, name: str, setup: Callable):
+        self.name = name
+        self.setup = setup
+
+    def run(self, repeat: int, warmup: int = 1) -> dict:
+        try:
+            function, units, unit, extra = self.setup()
+        except Skip as e:
+            return {'skipped': str(e)}
+
+        for _ in range(warmup):
+            function()
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+
+        median = statistics.median(timings)
+        timings_sorted = sorted(timings)
+        return {
+            'repeat': repeat,
+            'unit': unit,
+            'units_per_call': units,
+            'median_seconds': median,
+            'mean_seconds': statistics.mean(timings),
+            'min_seconds': timings_sorted[0],
+            'p95_seconds': timings_sorted[min(len(timings) - 1, int(round(0.95 * (len(timings) - 1))))],
+            'stdev_seconds': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+            'units_per_second': units / median if median > 0 else None,
+            **extra
+        }
+
+# Setups
+
+def setup_ca_preprocess():
+    from utils.preprocessors.ca.preprocessor import text_preprocess
+    corpus = load_corpus()
+    characters = sum(len(sentence) for sentence in corpus)
+
+    def run():
+        for sentence in corpus:
+            text_preprocess(sentence)
+    return run, len(corpus), 'sentences', {'characters_per_call': characters}
+
+def number_sample() -> List[float]:
+    # Every number up to 9999, a deterministic spread of larger ones and some decimals
+    numbers = list(range(10000))
+    numbers += list(range(10000, 10 ** 9, 7919 * 13))
+    numbers += [n + 0.25 for n in range(0, 5000, 7)]
+    return numbers
+
+def setup_ca_num_let():
+    from utils.preprocessors.ca.cat_number_letter import num_let
+    numbers = number_sample()
+
+    def run():
+        for number in numbers:
+            num_let(number)
+    return run, len(numbers), 'numbers', {}
+
+def setup_lad_num_let():
+    from utils.preprocessors.lad.ladino_number_letter import num_let
+    numbers = number_sample()
+
+    def run():
+        for number in numbers:
+            num_let(number)
+    return run, len(numbers), 'numbers', {}
+
+def setup_parse_sents():
+    from utils.utils import parse_sents
+    text = ' '.join(load_corpus())
+
+    def run():
+        parse_sents(text, lang='ca', max_chars=300)
+    return run, len(load_corpus()), 'sentences', {}
+
+def setup_long_synthesize():
+    import server
+    from benchmarks.fake_backend import FakeWrapper
+    from utils.audio_cache import AudioCache
+    from utils.model_loader import load_lang_preprocessor, load_lang_batch_preprocessor
+
+    model = FakeWrapper({'voice': VOICE, 'lang': 'ca'})
+    model.load_model()
+    server.loaded_models[VOICE] = {
+        'model': model,
+        'lang': 'ca',
+        'voice': VOICE,
+        'language': 'Catalan',
+        'preprocessor': load_lang_preprocessor('ca'),
+        'batch_preprocessor': load_lang_batch_preprocessor('ca'),
+        'framerate': model.sample_rate
+    }
+    # Every sentence goes through the model
+    server.audio_cache = AudioCache(memory_max_bytes=0)
+
+    extra = {}
+    corpus = load_corpus()
+    paragraphs = [' '.join(corpus[i:i + 5]) for i in range(0, len(corpus), 5)]
+    pcm = server.long_synthesize(paragraphs, VOICE)
+    extra['characters_per_call'] = len(''.join(paragraphs))
+    extra['audio_seconds_per_call'] = len(pcm) / model.sample_rate
+
+    def run():
+        server.long_synthesize(paragraphs, VOICE)
+    return run, len(corpus), 'sentences', extra
+
+def synthetic_pcm(seconds: float, sample_rate: int = 22050) -> np.ndarray:
+    t = np.arange(int(seconds * sample_rate), dtype=np.float32) / sample_rate
+    return (0.3 * np.sin(2 * np.pi * 180 * t) * 32767).astype(np.int16)
+
+def setup_assembly():
+    from utils.audio import PCMAssembler
+    chunks = [synthetic_pcm(1.5) for _ in range(200)]
+
+    def run():
+        assembler = PCMAssembler(22050)
+        for chunk in chunks:
+            assembler.add_chunk(chunk)
+            assembler.add_silence(200)
+        assembler.assemble()
+    return run, len(chunks), 'chunks', {}
+
+def setup_encode(audio_format: str):
+    def setup():
+        from utils.encoder import encode_pcm
+        from utils.exceptions import EncodingError
+        pcm = synthetic_pcm(30)
+        try:
+            encode_pcm(pcm[:22050], 22050, audio_format)
+        except EncodingError as e:
+            raise Skip(str(e))
+
+        def run():
+            encode_pcm(pcm, 22050, audio_format)
+        return run, 30, 'audio seconds', {}
+    return setup
+
+# A real MMS checkpoint directory, otherwise a VITS network of the MMS size with random weights is benchmarked
+MMS_MODEL_PATH = os.getenv('TTS_BENCHMARK_MMS_MODEL')
+
+def vits_wrapper(quantize: Optional[str]):
+    import torch
+    from transformers import VitsConfig, VitsModel
+    from utils.backends.mms import MMSWrapper
+
+    torch.manual_seed(0)
+    wrapper = MMSWrapper({'voice': 'benchmark-mms', 'lang': 'ca', 'base_model_path': MMS_MODEL_PATH})
+    wrapper.model = VitsModel.from_pretrained(MMS_MODEL_PATH) if MMS_MODEL_PATH else VitsModel(VitsConfig())
+    if quantize:
+        wrapper.quantize(quantize)
+    wrapper.freeze()
+    return wrapper
+
+def setup_vits(quantize: Optional[str]):
+    def setup():
+        import torch
+        wrapper = vits_wrapper(quantize)
+        # 100 tokens, about a sentence of speech
+        input_ids = torch.randint(1, wrapper.model.config.vocab_size, (1, 100),
+                                  generator=torch.Generator().manual_seed(0))
+
+        def run():
+            # Fixed noise, so that both variants predict comparable durations
+            torch.manual_seed(0)
+            with torch.inference_mode():
+                return wrapper.model(input_ids=input_ids).waveform
+
+        audio_seconds = run().shape[-1] / wrapper.model.config.sampling_rate
+        extra = {
+            'model': MMS_MODEL_PATH or 'random VITS (MMS size)',
+            'quantize': quantize,
+            'weights_bytes': wrapper.memory_footprint(),
+            'audio_seconds_per_call': audio_seconds
+        }
+        return run, 1, 'sentences', extra
+    return setup
+
+BENCHMARKS = [
+    Benchmark('ca.text_preprocess', setup_ca_preprocess),
+    Benchmark('ca.num_let', setup_ca_num_let),
+    Benchmark('lad.num_let', setup_lad_num_let),
+    Benchmark('parse_sents', setup_parse_sents),
+    Benchmark('long_synthesize', setup_long_synthesize),
+    Benchmark('assembly', setup_assembly),
+    Benchmark('encode.wav', setup_encode('wav')),
+    Benchmark('encode.mp3', setup_encode('mp3')),
+    Benchmark('vits.float32', setup_vits(None)),
+    Benchmark('vits.int8', setup_vits('int8')),
+]
+
+# Pairs of benchmarks whose speed and memory ratio is reported
+GAINS = [('vits.int8', 'vits.float32')]
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(names: Optional[List[str]] = None, repeat: int = 10) -> Dict:
+    """Run the benchmarks, all of them or the given ones, and return the results"""
+    results = {}
+    for benchmark in BENCHMARKS:
+        if names and benchmark.name not in names:
+            continue
+        results[benchmark.name] = benchmark.run(repeat)
+
+    gains = {}
+    for name, baseline in GAINS:
+        result, base = results.get(name), results.get(baseline)
+        if not result or not base or 'skipped' in result or 'skipped' in base:
+            continue
+        gains[f'{name} vs {baseline}'] = {
+            'speedup': base['median_seconds'] / result['median_seconds'],
+            'weights_ratio': result['weights_bytes'] / base['weights_bytes']
+        }
+
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+            'repeat': repeat
+        },
+        'benchmarks': results,
+        'gains': gains
+    }
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the synthesis pipeline")
+    parser.add_argument('--output', '-o', help="JSON file to write the results to (default: stdout)")
+    parser.add_argument('--only', nargs='+', metavar='NAME', choices=[b.name for b in BENCHMARKS],
+                        help="Benchmarks to run")
+    parser.add_argument('--repeat', type=int, default=10, help="Timed calls per benchmark")
+    parser.add_argument('--quick', action='store_true', help="Few repetitions, for smoke testing")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.only, repeat=2 if args.quick else args.repeat)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    for name, result in results['benchmarks'].items():
+        if 'skipped' in result:
+            print(f"{name:<22} skipped: {result['skipped']}", file=sys.stderr)
+        else:
+            print(f"{name:<22} {result['median_seconds'] * 1000:10.2f} ms  "
+                  f"{result['units_per_second']:12.1f} {result['unit']}/s", file=sys.stderr)
+    for name, gain in results['gains'].items():
+        print(f"{name}: {gain['speedup']:.2f}x speed, {gain['weights_ratio']:.2f}x weights", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
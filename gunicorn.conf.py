@@ -0,0 +1,146 @@
+# gunicorn.conf.py
+# Gunicorn settings for serving the API with several workers sharing one copy of the models.
+#
+# With preload_app the master imports server.py, which loads the models, and then forks the workers.
+# Weights are frozen at load time (eval mode, no gradients) so inference never writes to them and their
+# pages stay shared copy-on-write: RSS barely grows with each added worker.
+import gc
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+bind = os.getenv('GUNICORN_BIND', ':8000')
+workers = int(os.getenv('GUNICORN_WORKERS', '4'))
+worker_class = 'gthread'
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '300'))
+# Longest a worker may spend catching up with the config and warming up before it accepts connections
+startup_timeout = int(os.getenv('GUNICORN_STARTUP_TIMEOUT', '1800'))
+
+def _config():
+    # Settings are read before gunicorn puts the app directory on the path
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    if app_dir not in sys.path:
+        sys.path.insert(0, app_dir)
+    from utils.config_manager import ConfigManager
+    return ConfigManager(os.getenv('TTS_API_CONFIG', 'config.json'))
+
+def _default_threads():
+    # Micro-batching and admission control act on the requests of one worker, so with a single thread per worker
+    # there is never a second request to batch with or to queue. When they are enabled, each worker gets enough
+    # threads to fill a micro-batch, and to run and queue up to the admission limits of a voice
+    try:
+        config = _config()
+        synthesis, admission = config.synthesis, config.admission
+    except Exception:
+        return 1
+    threads = 1
+    if synthesis['micro_batch_window_ms'] > 0:
+        threads = max(threads, int(synthesis['micro_batch_max_size']))
+    for limits in [admission] + list(admission['voices'].values()):
+        max_concurrent = int(limits.get('max_concurrent', admission['max_concurrent']))
+        if max_concurrent > 0:
+            threads = max(threads, max_concurrent + int(limits.get('max_queued', admission['max_queued'])))
+    return threads
+
+threads = int(os.getenv('GUNICORN_THREADS') or _default_threads())
+
+def _inference_workers_enabled():
+    try:
+        return _config().inference_workers['enabled']
+    except Exception:
+        return False
+
+# With inference workers the master starts the inference processes, which the workers forked from it share, and
+# neither loads models. Otherwise CUDA can't be used in processes forked after it was initialized, so on GPU each
+# worker loads its own models
+inference_workers = _inference_workers_enabled()
+preload_app = inference_workers or (os.getenv('TTS_PRELOAD', '1') == '1' and os.getenv('USE_CUDA') != '1')
+
+def on_starting(server):
+    # Metrics of a previous run would otherwise be aggregated with the new ones
+    metrics_dir = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if metrics_dir:
+        os.makedirs(metrics_dir, exist_ok=True)
+        for name in os.listdir(metrics_dir):
+            if name.endswith('.db'):
+                os.unlink(os.path.join(metrics_dir, name))
+
+def when_ready(server):
+    if preload_app:
+        from utils.model_loader import process_rss_bytes
+        rss = process_rss_bytes()
+        if rss is not None:
+            server.log.info(f"Models preloaded in master, RSS {rss / 1024 / 1024:.1f} MB")
+
+def pre_fork(server, worker):
+    # Moves all objects tracked so far to the permanent generation: collections in the workers then never
+    # write to their headers, which would copy the pages they live in
+    gc.freeze()
+    # Each worker gets its own share of the CPUs: the lowest slot not held by a live worker, so a restarted
+    # worker takes over the share of the one it replaces
+    taken = {getattr(other, 'cpu_slot', None) for other in server.WORKERS.values()}
+    worker.cpu_slot = min(slot for slot in range(workers + 1) if slot not in taken)
+
+def post_fork(server, worker):
+    server.log.info(f"Worker {worker.pid} forked" + (" sharing preloaded models" if preload_app else ""))
+    # The inference processes get the CPU shares instead
+    if inference_workers:
+        return
+    # Without limits every worker runs as many torch threads as there are cores, and they fight for them
+    from utils.config_manager import DEFAULT_THREADING
+    from utils.cpu_layout import apply_layout, plan_layout
+    try:
+        settings = _config().threading
+    except Exception as e:
+        server.log.warning(f"Couldn't read threading settings, using defaults: {str(e)}")
+        settings = DEFAULT_THREADING
+    apply_layout(plan_layout(settings, workers, worker.cpu_slot))
+
+@contextmanager
+def _heartbeat(worker, interval, limit):
+    # The worker only notifies the master from its request loop, which starts after post_worker_init: without this,
+    # a startup longer than `timeout` gets the worker killed and restarted over and over. Notifying stops after
+    # `limit` seconds, so a worker stuck starting up is still killed
+    stop = threading.Event()
+
+    def beat():
+        deadline = time.monotonic() + limit
+        while not stop.wait(interval) and time.monotonic() < deadline:
+            worker.notify()
+
+    thread = threading.Thread(target=beat, name='startup-heartbeat', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+def post_worker_init(worker):
+    # Warm-up runs before the worker accepts connections, so requests only reach warm workers. It runs here and
+    # not in the master: thread pools, ONNX Runtime sessions and allocator arenas are set up per process
+    import server as app_module
+    # A worker forked from the master starts with the voices of the config the master loaded: catch up with changes
+    # made since (only new and changed voices are loaded), then reload on SIGHUP. Don't send SIGHUP to the master,
+    # which restarts every worker. Models of inference processes can't be reloaded
+    with _heartbeat(worker, max(1, timeout / 4), startup_timeout):
+        if app_module.inference_pool is None:
+            try:
+                app_module.reload_config()
+            except Exception as e:
+                worker.log.warning(f"Couldn't reload config: {str(e)}")
+            app_module.config_reloader.install_signal_handler()
+            app_module.signal_siblings = True
+        app_module.start_warmup(background=False)
+
+def child_exit(server, worker):
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+def on_exit(server):
+    app_module = sys.modules.get('server')
+    if app_module is not None and app_module.inference_pool is not None:
+        app_module.inference_pool.stop()
@@ -1,3 +0,0 @@
-import nltk
-
-nltk.download('punkt')
\ No newline at end of file
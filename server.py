@@ -1,19 +1,41 @@
 #!flask/bin/python
+import gc
 import io
 import os
+import hmac
+import time
+import signal
 import logging
+import threading
+import multiprocessing
 from logging.handlers import RotatingFileHandler
-from flask import Flask, render_template, request, send_file, jsonify, make_response
-from typing import List
+from contextlib import contextmanager
+from flask import Flask, Response, g, render_template, request, send_file, jsonify, make_response, stream_with_context
+from typing import List, Optional
 from TTS.config import load_config
 from utils.utils import style_wav_uri_to_dict, universal_text_normalize, parse_sents
-from utils.config_manager import ConfigManager
-from utils.model_loader import load_models
-from utils.exceptions import ConfigurationError
+from utils.segmenter import split_chunks
+from utils.config_manager import (ConfigManager, DEFAULT_ADMIN, DEFAULT_ADMISSION, DEFAULT_JOBS, DEFAULT_PREPROCESSOR_CACHE,
+                                  DEFAULT_SYNTHESIS, DEFAULT_THREADING, DEFAULT_WARMUP)
+from utils.inference_workers import InferenceWorkerPool
+from utils.model_loader import load_models, reload_models
+from utils.model_pool import LazyModelPool
+from utils.exceptions import ConfigurationError, JobQueueFullError, ModelLoadError, ServiceOverloadedError, SynthesisError
+from utils.audio_cache import AudioCache
+from utils.preprocessor_cache import PreprocessorCache
+from utils.jobs import JobManager
+from utils.batching import MicroBatcher
+from utils.admission import AdmissionController
+from utils.warmup import WarmUp
+from utils.config_reload import ConfigReloader, sibling_pids
+from utils.cpu_layout import apply_layout, plan_layout
+from utils.metrics import (CACHE_HITS, CACHE_MISSES, IN_FLIGHT, QUEUE_DEPTH, observe_stage, observe_synthesis,
+                           render_metrics, stage_timer)
+from utils.audio import PCMAssembler, silence_samples
+from utils.encoder import AUDIO_FORMATS, StreamEncoder, encode_pcm, format_for_mimetypes, resolve_format
 from utils.config_validator import validate_config
-from pydub import AudioSegment
-import tempfile
 import json
+import numpy as np
 
 #Environment variables
 MODELS_ROOT = 'models'
@@ -35,8 +57,8 @@ def utility_processor():
     return dict(root_path=ROOT_PATH)
 
 #Constants
-LONG_SILENCE_SEGMENT = AudioSegment.silent(duration=500)
-SHORT_SILENCE_SEGMENT = AudioSegment.silent(duration=200)
+LONG_SILENCE_MS = 500
+SHORT_SILENCE_MS = 200
 
 # Configure logging
 os.makedirs(LOG_DIR, exist_ok=True)
@@ -51,18 +73,86 @@ stream_handler.setFormatter(formatter)
 logger.addHandler(stream_handler)
 
 # Initialize config and load models
+audio_cache = AudioCache()
+preprocessor_cache = PreprocessorCache.from_config(DEFAULT_PREPROCESSOR_CACHE)
+synthesis_settings = dict(DEFAULT_SYNTHESIS)
+threading_settings = dict(DEFAULT_THREADING)
+model_pool = None
+inference_pool = None
+load_report = {}
+job_manager = JobManager.from_config(DEFAULT_JOBS)
+micro_batcher = MicroBatcher.from_config(DEFAULT_SYNTHESIS)
+admission = AdmissionController.from_config(DEFAULT_ADMISSION)
+warmup = WarmUp.from_config(DEFAULT_WARMUP)
+admin_settings = dict(DEFAULT_ADMIN)
+# Set by gunicorn.conf.py: config reloads asked to one worker are passed on to the others
+signal_siblings = False
 try:
     config_manager = ConfigManager(CONFIG_JSON_PATH)
+    audio_cache = AudioCache.from_config(config_manager.audio_cache)
+    preprocessor_cache = PreprocessorCache.from_config(config_manager.preprocessor_cache)
+    synthesis_settings = config_manager.synthesis
+    threading_settings = config_manager.threading
+    job_manager = JobManager.from_config(config_manager.jobs)
+    micro_batcher = MicroBatcher.from_config(synthesis_settings)
+    admission = AdmissionController.from_config(config_manager.admission)
+    warmup = WarmUp.from_config(config_manager.warmup)
+    admin_settings = config_manager.admin
+    
+    lazy_settings = config_manager.lazy_loading
+    inference_settings = config_manager.inference_workers
     
     loaded_models, default_model_ids = {}, {}
-    if config_manager.models:
-        loaded_models, default_model_ids = load_models(
-            config_manager.models,  
-            config_manager.models_root,  
+    # Inference workers: models are loaded by dedicated processes, this one and the gunicorn workers forked from it
+    # only normalize text and send batches to them
+    if inference_settings['enabled']:
+        # Spawned inference processes run this module too when it's the main script, they load their own models
+        if multiprocessing.parent_process() is None:
+            inference_pool = InferenceWorkerPool.from_config(
+                inference_settings,
+                config_manager.models,
+                config_manager.models_root,
+                config_manager.use_cuda(),
+                threading_settings=threading_settings,
+                warmup_settings=config_manager.warmup,
+                load_workers=config_manager.model_loading['workers']
+            )
+            inference_pool.start()
+            loaded_models, default_model_ids = inference_pool.model_entries(config_manager.languages,
+                                                                            preprocessor_cache)
+    elif config_manager.models:
+        try:
+            loaded_models, default_model_ids = load_models(
+                config_manager.models,  
+                config_manager.models_root,  
+                config_manager.use_cuda(),
+                config_manager.languages,
+                workers=config_manager.model_loading['workers'],
+                report=load_report,
+                preprocessor_cache=preprocessor_cache
+            )
+        except ModelLoadError:
+            if not lazy_settings['enabled']:
+                raise
+            logging.info("No models loaded at startup, voices will be loaded on first request")
+    logging.info(f"Loaded {len(loaded_models)} models")
+
+    # Lazy mode: every configured voice is served, loading it on first request
+    if lazy_settings['enabled'] and inference_settings['enabled']:
+        logging.warning("Lazy loading isn't available with inference workers, only voices flagged \"load\" are served")
+    elif lazy_settings['enabled']:
+        model_pool = LazyModelPool.from_config(
+            loaded_models,
+            config_manager.models,
+            lazy_settings,
             config_manager.use_cuda(),
-            config_manager.languages 
+            config_manager.languages,
+            preprocessor_cache
         )
-    logging.info(f"Loaded {len(loaded_models)} models")
+        for voice, lang in model_pool.voices():
+            default_model_ids.setdefault(lang, voice)
+        logging.info(f"Lazy loading enabled for {len(model_pool.configs)} voices, "
+                     f"memory budget: {lazy_settings['memory_budget_mb']} MB")
 
 except ConfigurationError as e:
     logging.error(f"Configuration error: {e}")
@@ -78,6 +168,78 @@ logging.info("MODELS: " + ', '.join([
     else f'{m}' for m in loaded_models
 ]))
 
+# Voices that can be served: the resident ones, plus every configured voice in lazy mode
+def voice_available(voice: str) -> bool:
+    return voice in loaded_models or (model_pool is not None and model_pool.is_loadable(voice))
+
+def voice_lang(voice: str) -> str:
+    entry = loaded_models.get(voice)
+    return entry['lang'] if entry is not None else model_pool.lang(voice)
+
+# Registry entries acquired by the requests in progress on each thread, with their lease count. A request keeps
+# the entry it started with when a config reload replaces or removes its voice in the meantime
+_acquired_entries = threading.local()
+
+# Registry entry of a voice: the one acquired by the request in progress on this thread, else the current one
+def voice_entry(voice: str) -> dict:
+    acquired = getattr(_acquired_entries, 'entries', None)
+    if acquired and voice in acquired:
+        return acquired[voice][0]
+    return loaded_models[voice]
+
+# Keeps the model of a voice resident while a request uses it, loading it first if needed.
+# Without lazy loading all models stay resident, and only the request's entry is held
+def acquire_voice(voice: str):
+    if model_pool is not None:
+        entry = model_pool.acquire(voice)
+    else:
+        entry = loaded_models.get(voice)
+        if entry is None:
+            raise ModelLoadError(f"Voice {voice} is not loaded")
+    acquired = _acquired_entries.__dict__.setdefault('entries', {})
+    acquired.setdefault(voice, [entry, 0])[1] += 1
+
+def release_voice(voice: str):
+    acquired = getattr(_acquired_entries, 'entries', {})
+    if voice in acquired:
+        acquired[voice][1] -= 1
+        if not acquired[voice][1]:
+            del acquired[voice]
+    if model_pool is not None:
+        model_pool.release(voice)
+
+@contextmanager
+def use_voice(voice: str):
+    acquire_voice(voice)
+    try:
+        yield
+    finally:
+        release_voice(voice)
+
+# Synthesis endpoints counted as in-flight requests. Streamed responses count until the stream ends
+SYNTHESIS_ENDPOINTS = ('tts', 'longtts', 'submit_job')
+
+@app.before_request
+def track_request_start():
+    # Responses are closed before their thread handles another request, so nothing acquired is left here. Drop
+    # what a response that was never closed may have left
+    _acquired_entries.entries = {}
+    if request.endpoint in SYNTHESIS_ENDPOINTS:
+        IN_FLIGHT.labels(request.endpoint).inc()
+        g.in_flight_endpoint = request.endpoint
+
+@app.teardown_request
+def track_request_end(exception=None):
+    endpoint = g.pop('in_flight_endpoint', None)
+    if endpoint:
+        IN_FLIGHT.labels(endpoint).dec()
+    update_queue_metrics()
+
+# Requests waiting in this process: queued jobs and requests waiting for a synthesis slot
+def update_queue_metrics():
+    QUEUE_DEPTH.labels('jobs').set(job_manager.queue_depth)
+    QUEUE_DEPTH.labels('admission').set(admission.waiting)
+
 #Standard responses
 def error_response(message, status_code):
     """Return a JSON error message and HTTP status code."""
@@ -87,44 +249,301 @@ def success_response(data, status_code=200):
     """Return a JSON data and HTTP status code."""
     return make_response(jsonify(data), status_code)
 
-# long_synthesize
-# Synthesizes each paragraph with a pause in between. 
-# Each sentence in paragraph is synthesized with method synthesize and merged with a short pause in between
-def long_synthesize(text_paragraphs: List[str], voice: str):
-    framerate = loaded_models[voice]['framerate']
-    model = loaded_models[voice]['model']
-    preprocessor = loaded_models[voice]['preprocessor']
-    
-    allsound = AudioSegment.empty()
-    allsound += LONG_SILENCE_SEGMENT  # initial silence
-
-    for paragraph in text_paragraphs:
-        segments = parse_sents(paragraph)
-        for s in segments:
+def overloaded_response(message, retry_after):
+    """Return a 429 error telling the client when to retry."""
+    response = error_response(message, 429)
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+# Synthesizes already normalized text with the given voice into int16 PCM.
+# Repeated sentences are served from the audio cache
+def cached_synthesize(text: str, voice: str) -> np.ndarray:
+    return cached_synthesize_batch([text], voice, raise_errors=True)[0]
+
+# Synthesizes a normalized text of any length into int16 PCM. Texts longer than `max_chunk_chars` are broken into
+# chunks at clause punctuation or whitespace, synthesized as one batch and joined with short pauses
+def synthesize_bounded(text: str, voice: str) -> np.ndarray:
+    chunks = split_chunks(text, int(synthesis_settings.get('max_chunk_chars') or 0))
+    if len(chunks) <= 1:
+        return cached_synthesize(text, voice)
+
+    assembler = PCMAssembler(voice_entry(voice)['framerate'])
+    for i, pcm in enumerate(cached_synthesize_batch(chunks, voice, raise_errors=True)):
+        if i:
+            assembler.add_silence(SHORT_SILENCE_MS)
+        assembler.add_chunk(pcm)
+    return assembler.assemble()
+
+# Synthesizes a batch of normalized texts with the given voice into int16 PCM. Cached sentences are skipped and
+# the rest go through a single batched inference call. A single missing text (e.g. a short request) goes through
+# the micro-batcher, which runs it together with the concurrent requests for the same voice.
+# If the batch fails, its sentences are retried one by one, unless raise_errors is set.
+# Returns one PCM array per text, None for texts that couldn't be synthesized
+def cached_synthesize_batch(texts: List[str], voice: str, raise_errors: bool = False) -> List[Optional[np.ndarray]]:
+    model = voice_entry(voice)['model']
+    results = [None] * len(texts)
+
+    keys = []
+    if audio_cache.enabled:
+        keys = [AudioCache.make_key(voice, model.checkpoint_id, text) for text in texts]
+        results = [audio_cache.get(key) for key in keys]
+        results = [np.frombuffer(audio, dtype=np.int16) if audio is not None else None for audio in results]
+
+    missing = [i for i, pcm in enumerate(results) if pcm is None]
+    if keys:
+        CACHE_HITS.labels(voice).inc(len(texts) - len(missing))
+        CACHE_MISSES.labels(voice).inc(len(missing))
+    if missing:
+        run_batch = lambda batch: [pcm for pcm, _ in model.synthesize_pcm_batch(batch)]
+        with stage_timer('inference', voice):
             try:
-                if preprocessor:
-                    s = preprocessor(s)
+                if len(missing) == 1 and micro_batcher.enabled:
+                    outputs = [micro_batcher.submit(voice, texts[missing[0]], run_batch)]
                 else:
-                    #Normalize text with universal normalizer
-                    s = universal_text_normalize(s)
-                
-                audiobytes = model.synthesize(s)
-                
-                # Skip WAV header (first 1024 bytes) to avoid clicking
-                sound = AudioSegment(
-                    data=audiobytes.getvalue()[1024:],  # Skip WAV header
-                    sample_width=2,
-                    frame_rate=framerate,
-                    channels=1
-                )
-
-                allsound += sound + SHORT_SILENCE_SEGMENT
+                    outputs = run_batch([texts[i] for i in missing])
             except Exception as e:
-                logging.warning(f"Couldn't synthesize segment |{s}|. Reason: {str(e)}")
+                if raise_errors:
+                    raise
+                logging.warning(f"Batched synthesis failed, synthesizing sentences one by one. Reason: {str(e)}")
+                outputs = []
+                for i in missing:
+                    try:
+                        outputs.append(model.synthesize_pcm(texts[i])[0])
+                    except Exception as e:
+                        logging.warning(f"Couldn't synthesize segment |{texts[i]}|. Reason: {str(e)}")
+                        outputs.append(None)
+
+        for i, pcm in zip(missing, outputs):
+            results[i] = pcm
+            if pcm is not None and keys:
+                audio_cache.put(keys[i], pcm.tobytes())
+
+    return results
+
+# Normalizes the sentences of a request with the voice's preprocessor, or the universal normalizer if it has none.
+# Preprocessors with a batch entry point get all sentences in one call (e.g. a single Cotovia run for Galician).
+# Returns one normalized text per sentence, None for sentences that couldn't be normalized
+def normalize_sentences(sentences: List[str], voice: str) -> List[Optional[str]]:
+    preprocessor = voice_entry(voice)['preprocessor']
+    batch_preprocessor = voice_entry(voice).get('batch_preprocessor')
+
+    if batch_preprocessor and sentences:
+        try:
+            return batch_preprocessor(sentences)
+        except Exception as e:
+            logging.warning(f"Batch preprocessing failed, normalizing sentences one by one. Reason: {str(e)}")
 
-        allsound += LONG_SILENCE_SEGMENT
+    normalized = []
+    for s in sentences:
+        try:
+            if preprocessor:
+                normalized.append(preprocessor(s))
+            else:
+                #Normalize text with universal normalizer
+                normalized.append(universal_text_normalize(s))
+        except Exception as e:
+            logging.warning(f"Couldn't normalize segment |{s}|. Reason: {str(e)}")
+            normalized.append(None)
+    return normalized
+
+# Synthesizes warm-up sentences with a voice the way requests do (normalization, then one batched inference
+# call), bypassing the audio cache so warm-up doesn't fill it
+def warm_up_synthesize(voice: str, sentences: List[str]):
+    with use_voice(voice):
+        normalized = [text for text in normalize_sentences(sentences, voice) if text]
+        if not normalized:
+            raise SynthesisError(f"No warm-up sentence could be normalized for voice {voice}")
+        voice_entry(voice)['model'].synthesize_pcm_batch(normalized)
+
+# Warms up the voices resident in this process, once. Gunicorn workers run it before accepting connections
+# (gunicorn.conf.py), the development server on a background thread, and otherwise the first readiness probe
+# starts it
+def start_warmup(background: bool = True):
+    voices = {voice: entry['lang'] for voice, entry in list(loaded_models.items())}
+    warmup.start(voices, warm_up_synthesize, background)
+
+# Re-reads config.json and serves its voices. New voices and voices whose config entry changed are loaded, the
+# others keep their models, and voices removed from the config (or no longer flagged "load") stop being served.
+# The registry is swapped once loading is done, and requests in progress finish with the entries they acquired.
+# Only voices and languages are reloaded, other settings need a restart. Returns the reload report
+def reload_config() -> dict:
+    global config_manager, loaded_models, default_model_ids
+    if inference_pool is not None:
+        raise ConfigurationError("Config reload isn't available with inference workers, restart the server")
+    new_config = ConfigManager(CONFIG_JSON_PATH)
+    validate_config({'languages': new_config.languages, 'models': new_config.models})
+
+    registry, report = reload_models(
+        loaded_models,
+        new_config.models,
+        new_config.models_root,
+        new_config.use_cuda(),
+        new_config.languages,
+        workers=new_config.model_loading['workers'],
+        preprocessor_cache=preprocessor_cache
+    )
+    if not registry and model_pool is None:
+        raise ModelLoadError("No voice of the reloaded config could be loaded, keeping the current ones")
+
+    defaults = {}
+    for voice, entry in registry.items():
+        defaults.setdefault(entry['lang'], voice)
+    if model_pool is not None:
+        kept = model_pool.reconfigure(registry, new_config.models, new_config.languages)
+        report['removed'] = [voice for voice in report['removed'] if voice not in kept]
+        for voice, lang in model_pool.voices():
+            defaults.setdefault(lang, voice)
+
+    loaded_models = registry
+    default_model_ids = defaults
+    config_manager = new_config
+    gc.collect()
+    logging.info(f"Config reloaded: {len(report['loaded'])} voices loaded, {len(report['unchanged'])} unchanged, "
+                 f"{len(report['failed'])} failed, {len(report['removed'])} removed")
+    return report
+
+config_reloader = ConfigReloader(reload_config)
+
+# batch_ranges
+# Splits range(total) into (start, end) batches of `batch_size`. With ramp, batches grow from a single sentence
+# (1, 2, 4... up to `batch_size`), so that the first one is synthesized as soon as possible
+def batch_ranges(total: int, batch_size: int, ramp: bool = False):
+    start = 0
+    size = 1 if ramp else batch_size
+    while start < total:
+        end = min(start + size, total)
+        yield start, end
+        start = end
+        size = min(size * 2, batch_size)
+
+# iter_long_synthesize
+# Yields the audio of a long text piece by piece as (int16 PCM or None, pause in ms) pairs: initial silence,
+# then each sentence followed by a short pause, and a long pause after each paragraph.
+# Used by long_synthesize and by streaming responses.
+# Sentences of all paragraphs are normalized and synthesized in batches of `batch_size`. With ramp (streaming),
+# batches start with a single sentence and double up to `batch_size`, so the first audio comes after one sentence.
+# Sentences are split with the abbreviations of the voice's language, and broken into chunks of at most
+# `max_chunk_chars` characters before and after normalization (which expands numbers, dates...), so that every
+# inference call has a bounded input.
+# If given, progress is called with (sentences synthesized, total sentences) after each batch
+def iter_long_synthesize(text_paragraphs: List[str], voice: str, progress=None, ramp: bool = False):
+    batch_size = max(1, int(synthesis_settings['batch_size']))
+    max_chars = int(synthesis_settings.get('max_chunk_chars') or 0)
+    lang = voice_entry(voice)['lang']
+
+    yield None, LONG_SILENCE_MS  # initial silence
+
+    raw_sentences = []
+    paragraph_ends = []  # number of sentences up to the end of each paragraph
+    with stage_timer('split', voice):
+        for paragraph in text_paragraphs:
+            raw_sentences.extend(parse_sents(paragraph, lang=lang, max_chars=max_chars))
+            paragraph_ends.append(len(raw_sentences))
+
+    if progress:
+        progress(0, len(raw_sentences))
+
+    paragraph = 0
+    for start, end in batch_ranges(len(raw_sentences), batch_size, ramp):
+        with stage_timer('preprocess', voice):
+            normalized = normalize_sentences(raw_sentences[start:end], voice)
+
+        chunks = []
+        sentence_of_chunk = []
+        for index, s in enumerate(normalized, start):
+            if s and s.strip():
+                for chunk in split_chunks(s, max_chars):
+                    chunks.append(chunk)
+                    sentence_of_chunk.append(index)
+
+        pcms = cached_synthesize_batch(chunks, voice) if chunks else []
+        if progress:
+            progress(end, len(raw_sentences))
+        for index, pcm in zip(sentence_of_chunk, pcms):
+            while paragraph < len(paragraph_ends) and paragraph_ends[paragraph] <= index:
+                yield None, LONG_SILENCE_MS
+                paragraph += 1
+
+            if pcm is None:
+                continue
+
+            yield pcm, SHORT_SILENCE_MS
+
+    for _ in range(paragraph, len(paragraph_ends)):
+        yield None, LONG_SILENCE_MS
 
-    return allsound
+# long_synthesize
+# Synthesizes each paragraph with a pause in between. 
+# Each sentence in paragraph is synthesized with method synthesize and merged with a short pause in between.
+# Returns int16 PCM at the voice's framerate
+def long_synthesize(text_paragraphs: List[str], voice: str, progress=None) -> np.ndarray:
+    assembler = PCMAssembler(voice_entry(voice)['framerate'])
+    for pcm, pause_ms in iter_long_synthesize(text_paragraphs, voice, progress):
+        if pcm is not None:
+            assembler.add_chunk(pcm)
+        assembler.add_silence(pause_ms)
+
+    with stage_timer('assembly', voice):
+        return assembler.assemble()
+
+# Streams the audio of a long text as a chunked response, flushing each sentence as soon as it's synthesized.
+# A single encoder process is fed for the whole response so the stream is one well-formed file.
+# It's started here so that failing to start it is reported before the headers are sent, and stopped when the
+# response is closed, even if it's closed before the stream is iterated
+def stream_long_synthesize(text_paragraphs: List[str], voice: str, audio_format: str = 'mp3'):
+    framerate = voice_entry(voice)['framerate']
+    encoder = StreamEncoder(framerate, audio_format)
+    start = time.perf_counter()
+
+    def generate():
+        encoding_seconds = 0.0
+        num_samples = 0
+        try:
+            for pcm, pause_ms in iter_long_synthesize(text_paragraphs, voice, ramp=True):
+                chunks = [np.zeros(silence_samples(pause_ms, framerate), dtype=np.int16)]
+                if pcm is not None:
+                    chunks.insert(0, pcm)
+                for chunk in chunks:
+                    encode_start = time.perf_counter()
+                    data = encoder.feed(chunk)
+                    encoding_seconds += time.perf_counter() - encode_start
+                    num_samples += len(chunk)
+                    if data:
+                        yield data
+            encode_start = time.perf_counter()
+            data = encoder.close()
+            encoding_seconds += time.perf_counter() - encode_start
+            yield data
+            observe_stage('encoding', voice, encoding_seconds)
+            observe_synthesis('stream', voice, len(''.join(text_paragraphs)), num_samples / framerate,
+                              time.perf_counter() - start)
+        except Exception as e:
+            # Headers are already sent, the client sees a truncated stream
+            logging.error(f"Error during streamed synthesis: {str(e)}")
+        finally:
+            encoder.abort()
+
+    extension = AUDIO_FORMATS[audio_format]['extension']
+    response = Response(stream_with_context(generate()), mimetype=AUDIO_FORMATS[audio_format]['mimetype'],
+                        headers={'Content-Disposition': f'attachment; filename=synthesized.{extension}'})
+    response.call_on_close(encoder.abort)
+    return response
+
+# Output format of a request: the "format" field if given, otherwise negotiated from the Accept header.
+# Returns None for unsupported formats
+def request_audio_format(data: dict, default: str) -> Optional[str]:
+    if data.get('format'):
+        return resolve_format(data['format'])
+    return format_for_mimetypes(request.accept_mimetypes, default)
+
+# Sends encoded audio as a file attachment
+def send_audio(audio: bytes, audio_format: str):
+    return send_file(
+        io.BytesIO(audio),
+        mimetype=AUDIO_FORMATS[audio_format]['mimetype'],
+        as_attachment=True,
+        download_name=f"synthesized.{AUDIO_FORMATS[audio_format]['extension']}"
+    )
 
 # APP ENDPOINTS
 @app.route("/")
@@ -135,7 +554,7 @@ def index():
         "index.html",
         show_details=True,
         use_multi_speaker=True,
-        voices={k:loaded_models[k]['language'] for k in loaded_models.keys()},
+        voices={voice: info['name'] for voice, info in available_voices().items()},
         use_gst=False,
     )
 
@@ -163,23 +582,93 @@ def details():
         args=model,
     )
 
+# All servable voices with their lang, language name, and framerate if resident (None until loaded)
+def available_voices() -> dict:
+    voices = {}
+    for model_id, entry in list(loaded_models.items()):
+        voices[model_id] = {'lang': entry['lang'], 'name': entry['language'],
+                            'framerate': entry['framerate'], 'resident': True}
+    if model_pool is not None:
+        for model_id, lang in model_pool.voices():
+            if model_id not in voices:
+                voices[model_id] = {'lang': lang, 'name': config_manager.languages.get(lang),
+                                    'framerate': None, 'resident': False}
+    return voices
+
 @app.route("/api/voices", methods=["GET"])
 def list_voices():
     logging.info("List voices request")
 
     try:
         voices_by_lang = {}
-        for model_id in loaded_models:
-            lang = loaded_models[model_id]['lang']
+        for model_id, info in available_voices().items():
+            lang = info['lang']
             if lang not in voices_by_lang:
-                voices_by_lang[lang] = {'name':loaded_models[model_id]['language'], 'voices':{}}
-            voices_by_lang[lang]['voices'][model_id] = {'default': True if default_model_ids[lang] == model_id else False,
-                                                        'framerate': loaded_models[model_id]['framerate']}
+                voices_by_lang[lang] = {'name':info['name'], 'voices':{}}
+            voices_by_lang[lang]['voices'][model_id] = {'default': True if default_model_ids.get(lang) == model_id else False,
+                                                        'framerate': info['framerate'],
+                                                        'resident': info['resident']}
 
         return success_response(voices_by_lang)
     except Exception as e:
         return error_response(str(e), 500)
 
+# Prometheus metrics: per stage latency histograms, throughput, in-flight requests, queue depth and cache hits.
+# Aggregated across gunicorn workers when PROMETHEUS_MULTIPROC_DIR is set
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    update_queue_metrics()
+    data, content_type = render_metrics()
+    return Response(data, mimetype=content_type)
+
+# Startup report: time, checkpoint size, bytes read and RSS delta of each model loaded at startup
+@app.route("/api/load_report", methods=["GET"])
+def get_load_report():
+    return success_response(load_report)
+
+# Readiness probe: 503 until this process has warmed up its voices, so that load balancers only send traffic to
+# warm workers
+@app.route("/api/ready", methods=["GET"])
+def readiness():
+    start_warmup()
+    status = warmup.status
+    ready = status['ready']
+    if inference_pool is not None:
+        # Inference processes aren't restarted: report missing ones, so that the deployment gets restarted
+        status['inference_workers'] = inference_pool.status
+        ready = ready and status['inference_workers']['alive'] == status['inference_workers']['processes']
+    return success_response(status, 200 if ready else 503)
+
+# Config reload: POST reloads config.json in the background, in every gunicorn worker, GET returns the result of
+# the last reload in the worker answering. Needs the admin token, and is disabled without one
+@app.route("/api/admin/reload", methods=["GET", "POST"])
+def admin_reload():
+    token = admin_settings.get('token')
+    if not token:
+        return error_response("Admin endpoints are disabled, set an admin token", 403)
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}"):
+        return error_response("Invalid admin token", 401)
+
+    if request.method == 'GET':
+        return success_response(config_reloader.status)
+
+    started = config_reloader.trigger()
+    if signal_siblings:
+        for pid in sibling_pids():
+            try:
+                os.kill(pid, signal.SIGHUP)
+            except OSError as e:
+                logging.warning(f"Couldn't signal worker {pid} to reload: {str(e)}")
+    return success_response({**config_reloader.status, 'started': started}, 202)
+
+@app.route("/api/cache", methods=["GET"])
+def cache_stats():
+    return success_response(audio_cache.stats)
+
+@app.route("/api/preprocessor_cache", methods=["GET"])
+def preprocessor_cache_stats():
+    return success_response(preprocessor_cache.stats)
+
 # Endpoint to check if given voice and/or language is available within loaded models
 @app.route("/api/check", methods=["GET"])
 def check(voice=None, lang=None):
@@ -191,12 +680,12 @@ def check(voice=None, lang=None):
         # return {"error": "Request must specify voice or language"}, 400
         return error_response("Request must specify voice or language", 400)
 
-    if voice and voice not in loaded_models:
+    if voice and not voice_available(voice):
         # return {"error": f"Voice {voice} not found"}, 404
         return error_response(f"Voice {voice} not found", 404)
 
     if lang:
-        if voice and loaded_models[voice]['lang'] != lang:
+        if voice and voice_lang(voice) != lang:
             # return {"error": f"Voice {voice} is not in specified lang {lang}"}, 400
             return error_response(f"Voice {voice} is not in specified lang {lang}", 400)
         if lang not in default_model_ids:
@@ -205,7 +694,7 @@ def check(voice=None, lang=None):
         
         voice = default_model_ids[lang]  # Set default voice for the language
     else:
-        lang = loaded_models[voice]['lang']
+        lang = voice_lang(voice)
 
     # return {"voice": voice, "framerate": loaded_models[voice]['framerate']}, 200
     return success_response({"voice":voice, "lang": lang})
@@ -214,6 +703,7 @@ def check(voice=None, lang=None):
 # Simple TTS endpoint. Gets plain text as input and returns WAV. (Not used by Gateway)
 @app.route("/api/short", methods=["POST"])
 def tts():
+    start = time.perf_counter()
     try:
         data = request.get_json()
         if not data:
@@ -222,10 +712,14 @@ def tts():
         text = data.get('text')
         voice = data.get('voice')
         lang = data.get('lang')
+        audio_format = request_audio_format(data, default='wav')
 
         if not text:
             return error_response("Text must not be empty", 400)
 
+        if not audio_format:
+            return error_response("Unsupported audio format", 400)
+
         result = check(voice, lang)
         result_info = json.loads(result.data.decode('utf-8'))
         if result.status_code != 200:
@@ -234,23 +728,30 @@ def tts():
         voice = result_info['voice']
         
         try:
-            model = loaded_models[voice]['model']
-            
-            if loaded_models[voice]['preprocessor']:
-                text = loaded_models[voice]['preprocessor'](text)
-            else:
-                text = universal_text_normalize(text)
-            
-            audio_buffer = model.synthesize(text)
+            num_characters = len(text)
+            with admission.slot(voice, num_characters), use_voice(voice):
+                with stage_timer('preprocess', voice):
+                    if voice_entry(voice)['preprocessor']:
+                        text = voice_entry(voice)['preprocessor'](text)
+                    else:
+                        text = universal_text_normalize(text)
+                
+                pcm = synthesize_bounded(text, voice)
+                framerate = voice_entry(voice)['framerate']
+            # Encoding only happens here, at the HTTP boundary
+            with stage_timer('encoding', voice):
+                audio = encode_pcm(pcm, framerate, audio_format)
+            observe_synthesis('short', voice, num_characters, len(pcm) / framerate, time.perf_counter() - start)
             
-            response = make_response(send_file(
-                audio_buffer,
-                mimetype="audio/wav",
-                as_attachment=True,
-                download_name="synthesized.wav"
-            ))
+            response = make_response(send_audio(audio, audio_format))
             return response
             
+        except ServiceOverloadedError as e:
+            logging.warning(str(e))
+            return overloaded_response(f"Voice {voice} is busy, retry later", e.retry_after)
+        except ModelLoadError as e:
+            logging.error(f"Couldn't load voice {voice}: {str(e)}")
+            return error_response(f"Voice {voice} couldn't be loaded", 503)
         except SynthesisError as e:
             logging.error(f"Synthesis error: {str(e)}")
             return error_response("Failed to synthesize audio", 500)
@@ -259,9 +760,11 @@ def tts():
         logging.error(f"Unexpected error in tts endpoint: {str(e)}")
         return error_response("Internal server error", 500)
 
-# # Endpoint that uses long_synthesize. Returns mp3 or uploads to given cloud URL
+# # Endpoint that uses long_synthesize. Returns mp3 (or the format requested with "format" or the Accept header).
+# With "stream": true the audio is streamed sentence by sentence
 @app.route("/api/long", methods=["POST"])
 def longtts():
+    start = time.perf_counter()
     data = request.get_json()  # Get the JSON data
     if not data:
         return error_response('No data provided', 400)
@@ -269,11 +772,16 @@ def longtts():
     text_paragraphs = data.get('text_paragraphs')
     voice = data.get('voice')
     lang = data.get('lang')
+    stream = bool(data.get('stream', False))
+    audio_format = request_audio_format(data, default='mp3')
 
     if not text_paragraphs or not "".join(text_paragraphs).strip():
         logging.warning("Text empty")
         return error_response("Text must not be empty", 400)
 
+    if not audio_format:
+        return error_response("Unsupported audio format", 400)
+
     result = check(voice, lang)
     result_info = json.loads(result.data.decode('utf-8'))
     
@@ -283,25 +791,142 @@ def longtts():
     voice = result_info['voice']
 
     logging.info(f"Long TTS request in voice: {voice} lang: {lang}")
-    logging.info(f"#Segments: {len(text_paragraphs)} #characters: {len(''.join(text_paragraphs))}")
+    num_characters = len(''.join(text_paragraphs))
+    logging.info(f"#Segments: {len(text_paragraphs)} #characters: {num_characters}")
 
     try:
-        audioseg = long_synthesize(text_paragraphs, voice)
+        if stream:
+            # The synthesis slot and the voice are held until the whole stream is sent
+            started = admission.acquire(voice, num_characters)
+            try:
+                acquire_voice(voice)
+            except Exception:
+                admission.release(voice)
+                raise
+            try:
+                response = stream_long_synthesize(text_paragraphs, voice, audio_format)
+            except Exception:
+                release_voice(voice)
+                admission.release(voice)
+                raise
+            def release():
+                release_voice(voice)
+                admission.release(voice, started, num_characters)
+            response.call_on_close(release)
+            return response
+
+        with admission.slot(voice, num_characters), use_voice(voice):
+            pcm = long_synthesize(text_paragraphs, voice)
+            framerate = voice_entry(voice)['framerate']
         
-        # Use a temporary file to hold the audio data
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as tmpfile:
-            audioseg.export(tmpfile.name, format="mp3")
-            tmpfile_path = tmpfile.name
+        # Encode in memory, without temporary files
+        with stage_timer('encoding', voice):
+            audio = encode_pcm(pcm, framerate, audio_format)
+        observe_synthesis('long', voice, num_characters, len(pcm) / framerate,
+                          time.perf_counter() - start)
         
-        response = send_file(tmpfile_path, mimetype="audio/mp3", as_attachment=True)
-        os.unlink(tmpfile_path)  # Clean up the temporary file after sending
-        return response
+        return send_audio(audio, audio_format)
+    except ServiceOverloadedError as e:
+        logging.warning(str(e))
+        return overloaded_response(f"Voice {voice} is busy, retry later", e.retry_after)
+    except ModelLoadError as e:
+        logging.error(f"Couldn't load voice {voice}: {str(e)}")
+        return error_response(f"Voice {voice} couldn't be loaded", 503)
     except Exception as e:
         logging.error(f"Error during synthesis: {str(e)}")
         return error_response("Failed to synthesize audio", 500)
 
 
+# Asynchronous version of /api/long for documents that take longer than a request timeout.
+# Takes the same payload, queues the synthesis and returns a job id right away (202).
+# Progress is polled at /api/jobs/<job_id> and the audio is fetched from /api/jobs/<job_id>/result
+@app.route("/api/jobs", methods=["POST"])
+def submit_job():
+    data = request.get_json(silent=True)
+    if not data:
+        return error_response('No data provided', 400)
+
+    text_paragraphs = data.get('text_paragraphs')
+    voice = data.get('voice')
+    lang = data.get('lang')
+    audio_format = request_audio_format(data, default='mp3')
+
+    if not text_paragraphs or not "".join(text_paragraphs).strip():
+        return error_response("Text must not be empty", 400)
+
+    if not audio_format:
+        return error_response("Unsupported audio format", 400)
+
+    result = check(voice, lang)
+    result_info = json.loads(result.data.decode('utf-8'))
+    if result.status_code != 200:
+        return error_response(result_info['message'], result.status_code)
+
+    voice = result_info['voice']
+
+    def task(progress):
+        update_queue_metrics()
+        start = time.perf_counter()
+        with use_voice(voice):
+            pcm = long_synthesize(text_paragraphs, voice, progress)
+            framerate = voice_entry(voice)['framerate']
+        with stage_timer('encoding', voice):
+            audio = encode_pcm(pcm, framerate, audio_format)
+        observe_synthesis('jobs', voice, len(''.join(text_paragraphs)), len(pcm) / framerate,
+                          time.perf_counter() - start)
+        return audio, AUDIO_FORMATS[audio_format]['extension']
+
+    try:
+        job_id = job_manager.submit(task, metadata={'voice': voice, 'format': audio_format})
+    except JobQueueFullError as e:
+        logging.warning(str(e))
+        return overloaded_response("Too many jobs queued, retry later", 30)
+
+    update_queue_metrics()
+    logging.info(f"Job {job_id} queued in voice: {voice} #characters: {len(''.join(text_paragraphs))}")
+    response = success_response({'job_id': job_id, 'status': 'queued'}, 202)
+    response.headers['Location'] = f"{ROOT_PATH}/api/jobs/{job_id}"
+    return response
+
+# Job status: queued, running, done or failed, with progress in sentences done out of total
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    status = job_manager.status(job_id)
+    if status is None:
+        return error_response(f"Job {job_id} not found", 404)
+
+    return success_response({
+        'job_id': job_id,
+        'status': status['status'],
+        'progress': {'done': status['done'], 'total': status['total']},
+        'error': status['error']
+    })
+
+@app.route("/api/jobs/<job_id>/result", methods=["GET"])
+def job_result(job_id):
+    status = job_manager.status(job_id)
+    if status is None:
+        return error_response(f"Job {job_id} not found", 404)
+    if status['status'] == 'failed':
+        return error_response("Failed to synthesize audio", 500)
+
+    path = job_manager.result_path(job_id)
+    if path is None:
+        return error_response(f"Job {job_id} is {status['status']}", 409)
+
+    audio_format = status['format']
+    return send_file(
+        path,
+        mimetype=AUDIO_FORMATS[audio_format]['mimetype'],
+        as_attachment=True,
+        download_name=f"synthesized.{AUDIO_FORMATS[audio_format]['extension']}"
+    )
+
 def main():
+    # Gunicorn workers get their layout in gunicorn.conf.py
+    apply_layout(plan_layout(threading_settings))
+    config_reloader.install_signal_handler()
+    start_warmup()
     app.run(debug=True, host="::", port=5050)
 
 if __name__ == "__main__":
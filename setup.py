@@ -8,9 +8,10 @@ setup(
         "Flask",
         "gunicorn",
         "coqui-tts",
-        "pydub",
-        "nltk",
+        "soundfile",
+        "prometheus_client",
         "transformers",
         "torch",
+        "onnxruntime",
     ],
 )
@@ -72,6 +72,12 @@ def mock_model():
     class MockModel:
         def synthesize(self, text):
             return io.BytesIO(b'\x00' * 1000)
+
+        def synthesize_pcm(self, text):
+            return numpy.zeros(500, dtype=numpy.int16), 22050
+
+        def synthesize_pcm_batch(self, texts):
+            return [self.synthesize_pcm(text) for text in texts]
         
         def load_model(self):
             return True
@@ -79,6 +85,10 @@ def mock_model():
         @property
         def sample_rate(self):
             return 22050
+
+        @property
+        def checkpoint_id(self):
+            return 'mock'
     
     return MockModel()
 
@@ -110,6 +120,7 @@ def patch_loaded_models(mock_loaded_models, monkeypatch):
     """Automatically patch loaded_models in the app context"""
     import server
     monkeypatch.setattr(server, 'loaded_models', mock_loaded_models)
+    monkeypatch.setattr(server, 'model_pool', None)
     monkeypatch.setattr(server, 'default_model_ids', {
         'rmz': 'test-mms',
         'en': 'test-coqui'
@@ -0,0 +1,117 @@
+# tests/test_admission.py
+import threading
+import pytest
+from utils.admission import AdmissionController
+from utils.exceptions import ServiceOverloadedError
+
+def test_unlimited_by_default():
+    """Test no limit applies with max_concurrent 0"""
+    controller = AdmissionController()
+    for _ in range(100):
+        controller.acquire('voice')
+    assert controller.stats['voice']['running'] == 100
+
+def test_rejects_when_queue_full():
+    """Test requests beyond running and queued slots are rejected with a retry estimate"""
+    controller = AdmissionController(max_concurrent=1, max_queued=1)
+    controller.acquire('voice')
+
+    waiter = threading.Thread(target=lambda: controller.release('voice', controller.acquire('voice')))
+    waiter.start()
+    while controller.stats['voice']['waiting'] == 0:
+        pass
+
+    with pytest.raises(ServiceOverloadedError) as error:
+        controller.acquire('voice')
+    assert error.value.retry_after >= 1
+    assert controller.stats['voice']['rejected'] == 1
+
+    # Other voices are not affected
+    controller.acquire('other')
+
+    controller.release('voice')
+    waiter.join(5)
+    assert controller.stats['voice']['running'] == 0
+
+def test_retry_after_follows_latency_per_character():
+    """Test the retry estimate follows the observed time per character and the characters waiting in line"""
+    controller = AdmissionController(max_concurrent=1, max_queued=1)
+    started = controller.acquire('voice', 1000)
+    controller.release('voice', started - 10, 1000)
+    assert controller.stats['voice']['seconds_per_character'] == pytest.approx(0.01, rel=0.01)
+
+    controller.acquire('voice', 10)
+    waiter = threading.Thread(target=lambda: controller.release('voice', controller.acquire('voice', 1000), 1000))
+    waiter.start()
+    while controller.stats['voice']['waiting'] == 0:
+        pass
+
+    # A short request behind a long one waits for both, at 10 ms per character
+    with pytest.raises(ServiceOverloadedError) as error:
+        controller.acquire('voice', 100)
+    assert 11 <= error.value.retry_after <= 12
+
+    controller.release('voice')
+    waiter.join(5)
+
+def test_per_voice_overrides():
+    """Test per voice limits override the defaults"""
+    controller = AdmissionController(max_concurrent=1, max_queued=0, voices={'big': {'max_concurrent': 2}})
+    controller.acquire('big')
+    controller.acquire('big')
+    with pytest.raises(ServiceOverloadedError):
+        controller.acquire('big')
+
+def test_short_endpoint_returns_429(test_client, monkeypatch):
+    """Test a busy voice answers 429 with Retry-After"""
+    import server
+    controller = AdmissionController(max_concurrent=1, max_queued=0)
+    monkeypatch.setattr(server, 'admission', controller)
+
+    controller.acquire('test-mms')
+    response = test_client.post('/api/short', json={'text': 'Hola.', 'voice': 'test-mms'})
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+
+    response = test_client.post('/api/long', json={'text_paragraphs': ['Hola.'], 'voice': 'test-mms'})
+    assert response.status_code == 429
+
+    controller.release('test-mms')
+    response = test_client.post('/api/short', json={'text': 'Hola.', 'voice': 'test-mms'})
+    assert response.status_code == 200
+    assert controller.stats['test-mms']['running'] == 0
+
+def test_streamed_request_holds_slot_until_sent(test_client, monkeypatch):
+    """Test a streamed response keeps its slot until the stream is closed"""
+    import server
+    controller = AdmissionController(max_concurrent=1, max_queued=0)
+    monkeypatch.setattr(server, 'admission', controller)
+    monkeypatch.setattr(server, 'parse_sents', lambda text, **kwargs: [text])
+
+    response = test_client.post('/api/long', json={'text_paragraphs': ['Hola.'], 'voice': 'test-mms',
+                                                   'stream': True, 'format': 'wav'})
+    assert response.status_code == 200
+    assert controller.stats['test-mms']['running'] == 1
+    response.get_data()
+    response.close()
+    assert controller.stats['test-mms']['running'] == 0
+
+@pytest.mark.parametrize('sections, threads', [
+    ('', 1),
+    (', "admission": {"max_concurrent": 2, "max_queued": 4}', 6),
+    (', "admission": {"voices": {"test-mms": {"max_concurrent": 1}}}', 9),
+    (', "synthesis": {"micro_batch_window_ms": 20, "micro_batch_max_size": 4}', 4),
+])
+def test_gunicorn_threads_follow_admission_and_micro_batching(sections, threads, tmp_path, monkeypatch):
+    """Test gunicorn workers get several threads when per worker limits or micro-batching need concurrent requests"""
+    import importlib.util
+    import os
+    config_path = tmp_path / 'config.json'
+    config_path.write_text('{"languages": {}, "models": []' + sections + '}')
+    monkeypatch.setenv('TTS_API_CONFIG', str(config_path))
+    monkeypatch.delenv('GUNICORN_THREADS', raising=False)
+    spec = importlib.util.spec_from_file_location(
+        'gunicorn_conf', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'gunicorn.conf.py'))
+    gunicorn_conf = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(gunicorn_conf)
+    assert gunicorn_conf.threads == threads
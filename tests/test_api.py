@@ -1,5 +1,6 @@
 # tests/test_api.py
 import json
+import numpy as np
 import pytest
 from flask import url_for
 
@@ -36,4 +37,172 @@ def test_tts_endpoint_invalid_voice(test_client):
         'text': 'Hello',
         'voice': 'nonexistent-voice'
     })
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+def test_long_endpoint_stream(test_client, monkeypatch):
+    """Test /api/long streams the audio of each synthesized piece"""
+    import server
+    monkeypatch.setattr(server, 'parse_sents', lambda text, **kwargs: ['Hello there.', 'How are you?'])
+    response = test_client.post('/api/long', json={
+        'text_paragraphs': ['Hello there. How are you?'],
+        'voice': 'test-mms',
+        'stream': True,
+        'format': 'wav'
+    })
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'audio/wav'
+    data = response.get_data()
+    assert data.startswith(b'RIFF')
+    # 44 byte header, then initial and paragraph pauses of 500ms, two sentences of 500 samples with 200ms pauses
+    assert len(data) == 44 + 2 * (2 * 11025 + 2 * 500 + 2 * 4410)
+    response.close()
+
+def test_long_endpoint_format_negotiation(test_client, monkeypatch):
+    """Test /api/long output format from the format field and the Accept header"""
+    import server
+    encoded = []
+
+    def fake_encode(pcm, sample_rate, audio_format):
+        encoded.append(audio_format)
+        return b'audio'
+
+    monkeypatch.setattr(server, 'encode_pcm', fake_encode)
+    monkeypatch.setattr(server, 'parse_sents', lambda text, **kwargs: [text])
+    payload = {'text_paragraphs': ['Hello.'], 'voice': 'test-mms'}
+
+    response = test_client.post('/api/long', json=payload)
+    assert response.mimetype == 'audio/mpeg'
+    response = test_client.post('/api/long', json=payload, headers={'Accept': 'audio/ogg'})
+    assert response.mimetype == 'audio/ogg'
+    response = test_client.post('/api/long', json={**payload, 'format': 'wav'}, headers={'Accept': 'audio/ogg'})
+    assert response.mimetype == 'audio/wav'
+    assert encoded == ['mp3', 'ogg', 'wav']
+
+    response = test_client.post('/api/long', json={**payload, 'format': 'flac'})
+    assert response.status_code == 400
+
+def test_stream_closed_before_iteration_stops_encoder(monkeypatch):
+    """Test the encoder of a streamed response is stopped when the response is closed without being sent"""
+    import server
+    encoders = []
+
+    class RecordingEncoder:
+        def __init__(self, sample_rate, audio_format):
+            self.aborted = False
+            encoders.append(self)
+
+        def abort(self):
+            self.aborted = True
+
+    monkeypatch.setattr(server, 'StreamEncoder', RecordingEncoder)
+    with server.app.test_request_context():
+        response = server.stream_long_synthesize(['Hello there.'], 'test-mms', 'ogg')
+    assert len(encoders) == 1 and not encoders[0].aborted
+    response.close()
+    assert encoders[0].aborted
+
+def test_long_synthesize_batches_sentences(mock_loaded_models, monkeypatch):
+    """Test long_synthesize runs sentences of all paragraphs through few batched calls"""
+    import server
+    batches = []
+
+    class BatchingModel:
+        checkpoint_id = 'batching'
+
+        def synthesize_pcm_batch(self, texts):
+            batches.append(len(texts))
+            return [(np.zeros(1024, dtype=np.int16), 22050) for _ in texts]
+
+    mock_loaded_models['test-mms']['model'] = BatchingModel()
+    monkeypatch.setattr(server, 'parse_sents', lambda text, **kwargs: text.split('|'))
+    monkeypatch.setattr(server, 'synthesis_settings', {'batch_size': 8})
+    monkeypatch.setattr(server, 'audio_cache', server.AudioCache(memory_max_bytes=0))
+
+    paragraphs = ['|'.join(f'Sentence {p}.{i}.' for i in range(5)) for p in range(4)]
+    pcm = server.long_synthesize(paragraphs, 'test-mms')
+
+    assert batches == [8, 8, 4]
+    # initial + 4 paragraph pauses of 500ms, 20 sentences of 1024 samples followed by 200ms pauses
+    assert len(pcm) == 5 * 11025 + 20 * (1024 + 4410)
+
+def test_stream_yields_first_sentence_before_the_rest_is_synthesized(test_client, mock_loaded_models, monkeypatch):
+    """Test a streamed response sends the first sentence before normalizing and synthesizing the others"""
+    import server
+    batches = []
+    normalized = []
+
+    class RecordingModel:
+        checkpoint_id = 'recording'
+
+        def synthesize_pcm_batch(self, texts):
+            batches.append(list(texts))
+            return [(np.ones(100, dtype=np.int16), 22050) for _ in texts]
+
+    def preprocessor(text):
+        normalized.append(text)
+        return text
+
+    mock_loaded_models['test-mms']['model'] = RecordingModel()
+    mock_loaded_models['test-mms']['preprocessor'] = preprocessor
+    monkeypatch.setattr(server, 'parse_sents', lambda text, **kwargs: text.split('|'))
+    monkeypatch.setattr(server, 'synthesis_settings', {'batch_size': 4})
+    monkeypatch.setattr(server, 'audio_cache', server.AudioCache(memory_max_bytes=0))
+
+    response = test_client.post('/api/long', json={
+        'text_paragraphs': ['|'.join(f'Sentence {i}.' for i in range(10))],
+        'voice': 'test-mms',
+        'stream': True,
+        'format': 'wav'
+    })
+    stream = iter(response.response)
+    data = b''
+    while b'\x01\x00' not in data[44:]:  # up to the first samples of speech, after the header
+        data += next(stream)
+    assert batches == [['Sentence 0.']]
+    assert normalized == ['Sentence 0.']
+
+    data += b''.join(stream)
+    response.close()
+    assert [len(batch) for batch in batches] == [1, 2, 4, 3]
+    assert len(normalized) == 10
+    assert len(data) == 44 + 2 * (2 * 11025 + 10 * (100 + 4410))
+
+def test_long_synthesize_batch_fallback(mock_loaded_models, monkeypatch):
+    """Test a failing batch is retried sentence by sentence, skipping only the bad one"""
+    import server
+    synthesized = []
+
+    class FlakyModel:
+        checkpoint_id = 'flaky'
+
+        def synthesize_pcm_batch(self, texts):
+            raise RuntimeError('batch failed')
+
+        def synthesize_pcm(self, text):
+            if text == 'Bad.':
+                raise RuntimeError('bad sentence')
+            synthesized.append(text)
+            return np.zeros(1024, dtype=np.int16), 22050
+
+    mock_loaded_models['test-mms']['model'] = FlakyModel()
+    monkeypatch.setattr(server, 'parse_sents', lambda text, **kwargs: text.split('|'))
+    monkeypatch.setattr(server, 'audio_cache', server.AudioCache(memory_max_bytes=0))
+
+    server.long_synthesize(['Good.|Bad.|Fine.'], 'test-mms')
+    assert synthesized == ['Good.', 'Fine.']
+
+def test_long_synthesize_batch_preprocessor(mock_loaded_models, monkeypatch):
+    """Test all sentences of a request go through one batch preprocessor call"""
+    import server
+    calls = []
+
+    def batch_preprocessor(texts):
+        calls.append(list(texts))
+        return [text.upper() for text in texts]
+
+    mock_loaded_models['test-mms']['batch_preprocessor'] = batch_preprocessor
+    monkeypatch.setattr(server, 'parse_sents', lambda text, **kwargs: text.split('|'))
+
+    server.long_synthesize(['One.|Two.', '', 'Three.'], 'test-mms')
+    assert calls == [['One.', 'Two.', '', 'Three.']]
@@ -0,0 +1,52 @@
+# tests/test_audio.py
+import wave
+import numpy as np
+import pytest
+from utils.audio import PCMAssembler, float_to_pcm16, pcm_to_wav
+
+def test_assembler_places_chunks_and_silences():
+    """Test chunks are copied at their offsets with zero-filled silences in between"""
+    assembler = PCMAssembler(sample_rate=1000)
+    assembler.add_silence(5)
+    assembler.add_chunk(np.full(3, 7, dtype=np.int16))
+    assembler.add_silence(2)
+    assembler.add_chunk(np.full(2, -1, dtype=np.int16))
+
+    pcm = assembler.assemble()
+    assert pcm.dtype == np.int16
+    assert pcm.tolist() == [0] * 5 + [7] * 3 + [0] * 2 + [-1] * 2
+    assert assembler.duration == pytest.approx(0.012)
+
+def test_assembler_into_preallocated_buffer():
+    """Test assembling into a caller provided buffer"""
+    assembler = PCMAssembler(sample_rate=1000)
+    assembler.add_chunk(np.ones(4, dtype=np.int16))
+    assembler.add_silence(2)
+
+    buffer = np.full(10, 9, dtype=np.int16)
+    pcm = assembler.assemble(out=buffer)
+    assert pcm.tolist() == [1, 1, 1, 1, 0, 0]
+
+def test_assembler_rejects_float_pcm():
+    """Test non int16 chunks are rejected"""
+    assembler = PCMAssembler(sample_rate=1000)
+    with pytest.raises(ValueError):
+        assembler.add_chunk(np.zeros(4, dtype=np.float32))
+
+def test_float_to_pcm16_clips():
+    """Test float waveforms are clipped to the int16 range"""
+    pcm = float_to_pcm16(np.array([0.0, 0.5, 1.5, -2.0], dtype=np.float32))
+    assert pcm.tolist() == [0, 16383, 32767, -32767]
+
+def test_float_to_pcm16_normalize():
+    """Test peak normalization scales the loudest sample to full range"""
+    pcm = float_to_pcm16([0.1, -0.2], normalize=True)
+    assert pcm.tolist() == [16383, -32767]
+
+def test_pcm_to_wav_roundtrip():
+    """Test WAV encoding keeps samples and sample rate"""
+    pcm = np.arange(-50, 50, dtype=np.int16)
+    with wave.open(pcm_to_wav(pcm, 16000), 'rb') as wav_file:
+        assert wav_file.getframerate() == 16000
+        assert wav_file.getsampwidth() == 2
+        assert np.frombuffer(wav_file.readframes(100), dtype=np.int16).tolist() == pcm.tolist()
@@ -0,0 +1,115 @@
+# tests/test_audio_cache.py
+import os
+import json
+import numpy as np
+import pytest
+import utils.audio_cache
+from utils.audio_cache import AudioCache
+
+def test_cache_key_depends_on_all_parts():
+    """Test cache keys differ by voice, checkpoint and text"""
+    key = AudioCache.make_key('voice', 'ckpt', 'Hola.')
+    assert key == AudioCache.make_key('voice', 'ckpt', 'Hola.')
+    assert key != AudioCache.make_key('other', 'ckpt', 'Hola.')
+    assert key != AudioCache.make_key('voice', 'ckpt2', 'Hola.')
+    assert key != AudioCache.make_key('voice', 'ckpt', 'Adéu.')
+
+def test_memory_lru_eviction():
+    """Test memory tier evicts least recently used entries over its byte cap"""
+    cache = AudioCache(memory_max_bytes=20)
+    cache.put('a', b'x' * 10)
+    cache.put('b', b'x' * 10)
+    assert cache.get('a') is not None
+    cache.put('c', b'x' * 10)
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.get('c') is not None
+    assert cache.stats['memory_bytes'] == 20
+
+def test_hit_miss_counters():
+    """Test hit and miss counters"""
+    cache = AudioCache(memory_max_bytes=1024)
+    assert cache.get('a') is None
+    cache.put('a', b'audio')
+    assert cache.get('a') == b'audio'
+
+    stats = cache.stats
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['hit_rate'] == 0.5
+
+def test_disk_tier(tmp_path):
+    """Test disk tier survives a new cache instance and evicts over its cap"""
+    cache = AudioCache(memory_max_bytes=0, disk_dir=str(tmp_path), disk_max_bytes=25)
+    cache.put('aa01', b'x' * 10)
+    cache.put('bb02', b'y' * 10)
+
+    reopened = AudioCache(memory_max_bytes=0, disk_dir=str(tmp_path), disk_max_bytes=25)
+    assert reopened.get('aa01') == b'x' * 10
+    assert reopened.stats['disk_hits'] == 1
+
+    reopened.put('cc03', b'z' * 10)
+    assert reopened.get('bb02') is None
+    assert reopened.stats['disk_bytes'] <= 25
+
+def test_disk_cap_is_shared_by_processes(tmp_path):
+    """Test caches of several workers sharing a directory keep it under the cap as a whole"""
+    workers = [AudioCache(memory_max_bytes=0, disk_dir=str(tmp_path), disk_max_bytes=50) for _ in range(3)]
+    for i in range(30):
+        workers[i % 3].put(f'{i:04d}', b'x' * 10)
+        assert sum(path.stat().st_size for path in tmp_path.rglob('*.audio')) <= 50
+
+    # The most recent entries are kept, whichever worker wrote them
+    assert workers[0].get('0029') == b'x' * 10
+    assert workers[0].get('0000') is None
+
+def test_full_disk_tier_is_rescanned_once_per_fill(tmp_path, monkeypatch):
+    """Test eviction goes down to the low watermark, so a full disk tier isn't rescanned on every write"""
+    cache = AudioCache(memory_max_bytes=0, disk_dir=str(tmp_path), disk_max_bytes=100)
+    walk = os.walk
+    scans = []
+    monkeypatch.setattr(utils.audio_cache.os, 'walk', lambda *args: scans.append(1) or walk(*args))
+
+    for i in range(300):
+        cache.put(f'{i:04d}', b'x')
+    assert cache.stats['disk_bytes'] <= 100
+    assert len(scans) <= 300 // 10
+
+def test_failed_disk_write_leaves_no_temporary_file(tmp_path, monkeypatch):
+    """Test a disk entry that can't be written doesn't leave its temporary file behind"""
+    cache = AudioCache(memory_max_bytes=0, disk_dir=str(tmp_path), disk_max_bytes=100)
+
+    def failing_replace(source, destination):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(utils.audio_cache.os, 'replace', failing_replace)
+    cache.put('aa01', b'x' * 10)
+    assert [path for path in tmp_path.rglob('*') if path.is_file()] == []
+
+def test_short_endpoint_uses_cache(test_client, mock_loaded_models, monkeypatch):
+    """Test repeated /api/short requests skip the model"""
+    import server
+    calls = []
+
+    class CountingModel:
+        checkpoint_id = 'counting'
+        sample_rate = 22050
+
+        def synthesize_pcm(self, text):
+            calls.append(text)
+            return np.zeros(1000, dtype=np.int16), 22050
+
+        def synthesize_pcm_batch(self, texts):
+            return [self.synthesize_pcm(text) for text in texts]
+
+    mock_loaded_models['test-mms']['model'] = CountingModel()
+    monkeypatch.setattr(server, 'audio_cache', AudioCache(memory_max_bytes=1024 * 1024))
+
+    for _ in range(3):
+        response = test_client.post('/api/short', json={'text': 'Hola.', 'voice': 'test-mms'})
+        assert response.status_code == 200
+
+    assert len(calls) == 1
+    stats = json.loads(test_client.get('/api/cache').data)
+    assert stats['hits'] == 2
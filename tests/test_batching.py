@@ -0,0 +1,105 @@
+# tests/test_batching.py
+import time
+import threading
+import numpy as np
+import pytest
+from utils.batching import MicroBatcher
+
+def run_concurrently(count, target):
+    results = [None] * count
+    errors = [None] * count
+
+    def run(i):
+        try:
+            results[i] = target(i)
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results, errors
+
+def slow_upper(calls):
+    def run_batch(items):
+        calls.append(list(items))
+        time.sleep(0.05)
+        return [item.upper() for item in items]
+    return run_batch
+
+def test_concurrent_items_share_batches():
+    """Test concurrent requests for one key are run together and get their own results"""
+    batcher = MicroBatcher(window_ms=50, max_batch_size=8)
+    calls = []
+    results, errors = run_concurrently(6, lambda i: batcher.submit('voice', f'text{i}', slow_upper(calls)))
+
+    assert errors == [None] * 6
+    assert results == [f'TEXT{i}' for i in range(6)]
+    assert len(calls) < 6
+    assert sum(len(call) for call in calls) == 6
+
+def test_batches_are_bounded_and_keyed():
+    """Test batches respect the max size and never mix keys"""
+    batcher = MicroBatcher(window_ms=100, max_batch_size=2)
+    calls = []
+    results, _ = run_concurrently(6, lambda i: batcher.submit(i % 2, f'{i % 2}-{i}', slow_upper(calls)))
+
+    assert results == [f'{i % 2}-{i}' for i in range(6)]
+    assert all(len(call) <= 2 for call in calls)
+    assert all(len({item[0] for item in call}) == 1 for call in calls)
+
+def test_lone_request_does_not_wait():
+    """Test a request with nothing else in flight runs without waiting for the window"""
+    batcher = MicroBatcher(window_ms=1000, max_batch_size=8)
+    start = time.perf_counter()
+    assert batcher.submit('voice', 'a', lambda items: [item * 2 for item in items]) == 'aa'
+    assert time.perf_counter() - start < 0.5
+
+def test_batch_error_only_reaches_the_failing_request():
+    """Test a failing batch is rerun item by item, so only the request whose item fails gets the error"""
+    batcher = MicroBatcher(window_ms=50, max_batch_size=8)
+    calls = []
+
+    def failing(items):
+        calls.append(list(items))
+        time.sleep(0.05)
+        if 2 in items:
+            raise RuntimeError("inference failed")
+        return [item * 10 for item in items]
+
+    results, errors = run_concurrently(4, lambda i: batcher.submit('voice', i, failing))
+    assert isinstance(errors[2], RuntimeError)
+    assert [error for i, error in enumerate(errors) if i != 2] == [None] * 3
+    assert [result for i, result in enumerate(results) if i != 2] == [0, 10, 30]
+    assert any(len(call) > 1 for call in calls)
+
+def test_short_requests_are_micro_batched(mock_loaded_models, monkeypatch):
+    """Test concurrent /api/short requests for a voice run as batched inference"""
+    import server
+    batch_sizes = []
+
+    class BatchingModel:
+        checkpoint_id = 'batching'
+        sample_rate = 22050
+
+        def synthesize_pcm(self, text):
+            return self.synthesize_pcm_batch([text])[0]
+
+        def synthesize_pcm_batch(self, texts):
+            batch_sizes.append(len(texts))
+            time.sleep(0.05)
+            return [(np.zeros(100, dtype=np.int16), 22050) for _ in texts]
+
+    mock_loaded_models['test-mms']['model'] = BatchingModel()
+    monkeypatch.setattr(server, 'micro_batcher', MicroBatcher(window_ms=50, max_batch_size=8))
+
+    def request(i):
+        with server.app.test_client() as client:
+            return client.post('/api/short', json={'text': f'Frase {i}.', 'voice': 'test-mms'}).status_code
+
+    results, errors = run_concurrently(6, request)
+    assert results == [200] * 6
+    assert sum(batch_sizes) == 6
+    assert max(batch_sizes) > 1
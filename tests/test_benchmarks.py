@@ -0,0 +1,25 @@
+# tests/test_benchmarks.py
+import json
+from benchmarks.compare import compare
+from benchmarks.run import main, run_benchmarks
+
+def test_benchmarks_produce_json(tmp_path):
+    """Test the benchmark runner writes machine readable results"""
+    output = tmp_path / 'results.json'
+    main(['--quick', '--only', 'ca.text_preprocess', 'ca.num_let', 'assembly', 'encode.wav', '--output', str(output)])
+
+    results = json.loads(output.read_text())
+    assert set(results['benchmarks']) == {'ca.text_preprocess', 'ca.num_let', 'assembly', 'encode.wav'}
+    for result in results['benchmarks'].values():
+        assert result['median_seconds'] > 0
+        assert result['units_per_second'] > 0
+
+def test_compare_flags_regressions():
+    """Test slowdowns beyond the threshold are flagged"""
+    baseline = {'benchmarks': {'a': {'median_seconds': 1.0}, 'b': {'median_seconds': 1.0}, 'c': {'skipped': 'x'}}}
+    current = {'benchmarks': {'a': {'median_seconds': 1.05}, 'b': {'median_seconds': 1.5}, 'c': {'median_seconds': 1.0}}}
+
+    rows = {row['name']: row for row in compare(baseline, current, threshold=0.1)}
+    assert set(rows) == {'a', 'b'}
+    assert not rows['a']['regression']
+    assert rows['b']['regression']
@@ -0,0 +1,156 @@
+# tests/test_config_reload.py
+import json
+import threading
+import pytest
+import utils.model_loader
+import utils.model_pool
+from utils.config_reload import ConfigReloader
+from utils.exceptions import ModelLoadError
+from utils.model_loader import reload_models
+from utils.model_pool import LazyModelPool
+
+LANGUAGES = {'ca': 'Catalan', 'gl': 'Galician'}
+
+def make_config(voice, lang='ca', load=True, **fields):
+    return {'voice': voice, 'lang': lang, 'model_type': 'mms', 'base_model_path': f'{voice}-model', 'load': load,
+            **fields}
+
+@pytest.fixture
+def loads(monkeypatch):
+    """Replaces model loading with stand-in entries, returns the list of loaded voices"""
+    loaded = []
+
+    def fake_load_model_entry(model_config, use_cuda=False, languages=None, preprocessor_cache=None):
+        if model_config.get('broken'):
+            raise ModelLoadError("broken model")
+        loaded.append(model_config['voice'])
+        return {'model': object(), 'lang': model_config['lang'], 'voice': model_config['voice'],
+                'language': languages.get(model_config['lang']) if languages else None, 'preprocessor': None,
+                'batch_preprocessor': None, 'framerate': 16000, 'config': dict(model_config, use_cuda=use_cuda)}
+
+    monkeypatch.setattr(utils.model_loader, 'load_model_entry', fake_load_model_entry)
+    monkeypatch.setattr(utils.model_pool, 'load_model_entry', fake_load_model_entry)
+    return loaded
+
+def initial_registry(configs):
+    registry, _ = reload_models({}, configs, 'models', languages=LANGUAGES)
+    return registry
+
+def test_only_new_and_changed_voices_are_loaded(loads):
+    """Test unchanged voices keep their models, changed and new ones are loaded, and removed ones dropped"""
+    registry = initial_registry([make_config('same'), make_config('changed'), make_config('removed')])
+    loads.clear()
+
+    new_configs = [make_config('new', 'gl'), make_config('changed', base_model_path='retrained'),
+                   make_config('same'), make_config('unloaded', load=False)]
+    new_registry, report = reload_models(registry, new_configs, 'models', languages=LANGUAGES)
+
+    assert sorted(loads) == ['changed', 'new']
+    assert new_registry['same'] is registry['same']
+    assert new_registry['changed']['model'] is not registry['changed']['model']
+    assert list(new_registry) == ['new', 'changed', 'same']
+    assert report['unchanged'] == ['same']
+    assert sorted(report['loaded']) == ['changed', 'new']
+    assert report['removed'] == ['removed']
+    assert 'removed' in registry
+
+def test_changed_voice_failing_to_load_keeps_its_model(loads):
+    """Test a voice whose new config fails to load is still served with its previous model"""
+    registry = initial_registry([make_config('voice')])
+    new_registry, report = reload_models(registry, [make_config('voice', broken=True)], 'models',
+                                         languages=LANGUAGES)
+
+    assert new_registry['voice'] is registry['voice']
+    assert report['failed'] == ['voice']
+    assert report['errors'] == {'voice': "broken model"}
+
+def test_pool_keeps_unchanged_voices_loaded_on_demand(loads):
+    """Test a reconfigured pool keeps on demand voices whose config didn't change, and drops the others"""
+    configs = [make_config('startup'), make_config('kept', load=False), make_config('changed', load=False)]
+    registry = initial_registry(configs)
+    pool = LazyModelPool(registry, configs)
+    for voice in ('kept', 'changed'):
+        with pool.lease(voice):
+            pass
+
+    new_configs = [make_config('startup'), make_config('kept', load=False),
+                   make_config('changed', load=False, base_model_path='retrained')]
+    new_registry, _ = reload_models(registry, new_configs, 'models')
+    assert pool.reconfigure(new_registry, new_configs) == ['kept']
+    assert pool.registry is new_registry
+    assert set(new_registry) == {'startup', 'kept'}
+    assert pool.pinned == {'startup'}
+
+    loads.clear()
+    with pool.lease('changed'):
+        pass
+    assert loads == ['changed']
+
+def test_reloader_runs_again_when_triggered_during_a_reload():
+    """Test a reload asked while one runs happens once it's done, and failures are reported"""
+    started, release = threading.Event(), threading.Event()
+    runs = []
+
+    def reload():
+        runs.append(len(runs))
+        started.set()
+        release.wait(5)
+        if len(runs) == 2:
+            raise ValueError("bad config")
+        return {'loaded': []}
+
+    reloader = ConfigReloader(reload)
+    assert reloader.trigger()
+    started.wait(5)
+    assert not reloader.trigger()
+    assert not reloader.trigger()
+    release.set()
+    reloader.wait(5)
+
+    assert runs == [0, 1]
+    status = reloader.status
+    assert status['state'] == 'idle' and status['reloads'] == 2
+    assert status['error'] == "bad config"
+
+def test_in_flight_request_keeps_its_entry(mock_loaded_models, monkeypatch):
+    """Test a request that acquired a voice keeps its entry when the registry is swapped"""
+    import server
+    old_entry = mock_loaded_models['test-mms']
+    server.acquire_voice('test-mms')
+    try:
+        monkeypatch.setattr(server, 'loaded_models', {'test-mms': {**old_entry, 'framerate': 8000}})
+        assert server.voice_entry('test-mms') is old_entry
+    finally:
+        server.release_voice('test-mms')
+    assert server.voice_entry('test-mms')['framerate'] == 8000
+
+def test_reload_endpoint(test_client, mock_loaded_models, monkeypatch, tmp_path, loads):
+    """Test the admin endpoint needs the token, then reloads the config and swaps the served voices"""
+    import server
+    config_path = tmp_path / 'config.json'
+    config_path.write_text(json.dumps({
+        'languages': {'en': 'English', 'gl': 'Galician'},
+        'models': [make_config('test-gl', 'gl'), make_config('test-coqui', 'en')]
+    }))
+    mock_loaded_models['test-coqui']['config'] = make_config('test-coqui', 'en', use_cuda=False)
+    monkeypatch.setattr(server, 'CONFIG_JSON_PATH', str(config_path))
+    monkeypatch.setattr(server, 'config_manager', server.config_manager)
+    monkeypatch.setattr(server, 'config_reloader', ConfigReloader(server.reload_config))
+    monkeypatch.setattr(server, 'admin_settings', {'token': None})
+
+    assert test_client.post('/api/admin/reload').status_code == 403
+    monkeypatch.setattr(server, 'admin_settings', {'token': 'secret'})
+    assert test_client.post('/api/admin/reload', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+
+    response = test_client.post('/api/admin/reload', headers={'Authorization': 'Bearer secret'})
+    assert response.status_code == 202
+    server.config_reloader.wait(5)
+
+    status = json.loads(test_client.get('/api/admin/reload', headers={'Authorization': 'Bearer secret'}).data)
+    assert status['last']['loaded'] == ['test-gl']
+    assert status['last']['unchanged'] == ['test-coqui']
+    assert status['last']['removed'] == ['test-mms']
+    assert loads == ['test-gl']
+    assert server.loaded_models['test-coqui'] is mock_loaded_models['test-coqui']
+    assert server.default_model_ids == {'gl': 'test-gl', 'en': 'test-coqui'}
+    assert test_client.get('/api/check?voice=test-mms').status_code == 404
@@ -0,0 +1,53 @@
+# tests/test_cpu_layout.py
+import subprocess
+import sys
+from utils.config_manager import ConfigManager, DEFAULT_THREADING
+from utils.cpu_layout import format_cpus, plan_layout
+
+def test_default_layout_divides_cpus_between_workers():
+    """Test each worker gets its own share of the CPUs, with one intra-op thread per CPU"""
+    cpus = list(range(8))
+    layouts = [plan_layout(DEFAULT_THREADING, workers=4, slot=slot, cpus=cpus) for slot in range(4)]
+
+    assert [layout['cpus'] for layout in layouts] == [[0, 1], [2, 3], [4, 5], [6, 7]]
+    assert all(layout['intra_op_threads'] == 2 for layout in layouts)
+    assert all(layout['inter_op_threads'] == 1 for layout in layouts)
+    assert not any(layout['pin'] for layout in layouts)
+
+def test_uneven_split_uses_every_cpu():
+    """Test the CPUs left over by an uneven split go to the first workers"""
+    layouts = [plan_layout(DEFAULT_THREADING, workers=4, slot=slot, cpus=list(range(6))) for slot in range(4)]
+    assert [layout['cpus'] for layout in layouts] == [[0, 1], [2, 3], [4], [5]]
+    assert [layout['intra_op_threads'] for layout in layouts] == [2, 2, 1, 1]
+
+def test_more_workers_than_cpus():
+    """Test workers share CPUs round robin when there are fewer CPUs than workers"""
+    layouts = [plan_layout(DEFAULT_THREADING, workers=3, slot=slot, cpus=[0, 1]) for slot in range(3)]
+    assert [layout['cpus'] for layout in layouts] == [[0], [1], [0]]
+    assert all(layout['intra_op_threads'] == 1 for layout in layouts)
+
+def test_explicit_settings():
+    """Test configured thread counts override the defaults"""
+    layout = plan_layout({'intra_op_threads': 3, 'inter_op_threads': 2, 'pin_cpus': True},
+                         workers=2, slot=1, cpus=list(range(8)))
+    assert layout == {'workers': 2, 'slot': 1, 'cpus': [4, 5, 6, 7], 'pin': True,
+                      'intra_op_threads': 3, 'inter_op_threads': 2}
+
+def test_threading_env_overrides(mock_config_file, monkeypatch):
+    """Test threading settings from environment variables"""
+    monkeypatch.setenv('TTS_INTRA_OP_THREADS', '2')
+    monkeypatch.setenv('TTS_PIN_CPUS', '1')
+    settings = ConfigManager(mock_config_file).threading
+    assert settings == {'intra_op_threads': 2, 'inter_op_threads': 0, 'pin_cpus': True}
+
+def test_format_cpus():
+    assert format_cpus([0, 1, 2, 3, 8, 10, 11]) == '0-3,8,10-11'
+
+def test_apply_layout_sets_torch_threads():
+    """Test the layout is applied to torch, in a fresh process so the test process keeps its settings"""
+    code = ("import torch; from utils.cpu_layout import apply_layout, available_cpus, intra_op_threads; "
+            "apply_layout({'workers': 1, 'slot': 0, 'cpus': available_cpus(), 'pin': True, "
+            "'intra_op_threads': 2, 'inter_op_threads': 3}); "
+            "print(torch.get_num_threads(), torch.get_num_interop_threads(), intra_op_threads())")
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    assert output.split() == ['2', '3', '2']
@@ -0,0 +1,88 @@
+# tests/test_encoder.py
+import io
+import shutil
+import wave
+import numpy as np
+import pytest
+import soundfile
+from werkzeug.datastructures import MIMEAccept
+import utils.encoder
+from utils.encoder import StreamEncoder, encode_pcm, format_for_mimetypes, resolve_format
+
+requires_ffmpeg = pytest.mark.skipif(shutil.which('ffmpeg') is None, reason="ffmpeg not installed")
+
+def test_resolve_format():
+    """Test format names and aliases"""
+    assert resolve_format('MP3') == 'mp3'
+    assert resolve_format('opus') == 'ogg'
+    assert resolve_format('flac') is None
+
+def test_format_for_mimetypes():
+    """Test Accept header negotiation falls back to the default format"""
+    assert format_for_mimetypes(MIMEAccept(), 'mp3') == 'mp3'
+    assert format_for_mimetypes(MIMEAccept([('*/*', 1)]), 'wav') == 'wav'
+    assert format_for_mimetypes(MIMEAccept([('audio/ogg', 1), ('audio/mpeg', 0.5)]), 'mp3') == 'ogg'
+    assert format_for_mimetypes(MIMEAccept([('text/html', 1)]), 'mp3') == 'mp3'
+
+def test_encode_wav_in_process():
+    """Test WAV encoding doesn't need ffmpeg"""
+    pcm = np.arange(100, dtype=np.int16)
+    with wave.open(io.BytesIO(encode_pcm(pcm, 16000, 'wav')), 'rb') as wav_file:
+        assert wav_file.getnframes() == 100
+
+def test_stream_encoder_wav():
+    """Test streamed WAV is a header followed by the raw samples"""
+    encoder = StreamEncoder(16000, 'wav')
+    data = encoder.feed(np.ones(10, dtype=np.int16)) + encoder.feed(np.ones(5, dtype=np.int16)) + encoder.close()
+    assert data[:4] == b'RIFF'
+    assert len(data) == 44 + 15 * 2
+
+@requires_ffmpeg
+@pytest.mark.parametrize('audio_format, magic', [('mp3', b'\xff'), ('ogg', b'OggS')])
+def test_encode_compressed(audio_format, magic):
+    """Test mp3 and ogg/opus encoding"""
+    pcm = np.zeros(16000, dtype=np.int16)
+    data = encode_pcm(pcm, 16000, audio_format)
+    assert data.startswith(magic)
+
+@pytest.mark.parametrize('audio_format, magic', [('mp3', b'\xff'), ('ogg', b'OggS')])
+def test_encode_compressed_in_process(audio_format, magic, monkeypatch):
+    """Test mp3 and ogg/opus are encoded by libsndfile without starting ffmpeg"""
+    container, subtype = utils.encoder.AUDIO_FORMATS[audio_format]['soundfile']
+    if not soundfile.check_format(container, subtype):
+        pytest.skip(f"libsndfile can't encode {audio_format}")
+
+    def no_ffmpeg(*args, **kwargs):
+        raise AssertionError("ffmpeg started")
+
+    monkeypatch.setattr(utils.encoder.subprocess, 'run', no_ffmpeg)
+    pcm = (np.sin(np.arange(16000) / 5) * 8000).astype(np.int16)
+    data = encode_pcm(pcm, 16000, audio_format)
+    assert data.startswith(magic)
+    decoded, rate = soundfile.read(io.BytesIO(data), dtype='int16')
+    assert rate == 16000 and abs(len(decoded) - len(pcm)) < 2000
+
+@requires_ffmpeg
+@pytest.mark.parametrize('sample_rate', [48000, 22050])
+def test_encode_ogg_speech_bitrate(sample_rate):
+    """Test Opus gets the speech bitrate whether libsndfile or ffmpeg encodes it"""
+    pcm = (np.random.default_rng(0).standard_normal(10 * sample_rate) * 6000).astype(np.int16)
+    bitrate = len(encode_pcm(pcm, sample_rate, 'ogg')) * 8 / 10
+    assert 0.7 * utils.encoder.OPUS_BITRATE < bitrate < 1.3 * utils.encoder.OPUS_BITRATE
+
+@requires_ffmpeg
+def test_encode_ogg_unsupported_rate_uses_ffmpeg():
+    """Test Opus at a sample rate libsndfile can't encode still goes through ffmpeg"""
+    data = encode_pcm(np.zeros(22050, dtype=np.int16), 22050, 'ogg')
+    assert data.startswith(b'OggS')
+
+@requires_ffmpeg
+def test_stream_encoder_ogg():
+    """Test a streamed ogg/opus response is a single ogg stream"""
+    encoder = StreamEncoder(16000, 'ogg')
+    data = b''
+    for _ in range(5):
+        data += encoder.feed(np.zeros(8000, dtype=np.int16))
+    data += encoder.close()
+    assert data.startswith(b'OggS')
+    assert data.count(b'OpusHead') == 1
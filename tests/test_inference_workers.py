@@ -0,0 +1,156 @@
+# tests/test_inference_workers.py
+import os
+import json
+import threading
+import time
+import numpy as np
+import pytest
+from utils.exceptions import ModelLoadError, SynthesisError
+from utils.inference_workers import InferenceWorkerPool
+from utils.warmup import WarmUp
+
+MODEL_CONFIGS = [
+    {'voice': 'fake-ca', 'lang': 'ca', 'model_type': 'fake', 'load': True},
+    {'voice': 'fake-gl', 'lang': 'gl', 'model_type': 'fake', 'load': True},
+    {'voice': 'fake-off', 'lang': 'ca', 'model_type': 'fake', 'load': False}
+]
+
+class FakeModel:
+    """Model whose PCM encodes the text: one sample per character, with its code point"""
+    sample_rate = 16000
+    checkpoint_id = 'fake'
+
+    def synthesize_pcm_batch(self, texts):
+        if 'fail' in texts:
+            raise RuntimeError("inference failed")
+        return [(np.array([ord(c) for c in text], dtype=np.int16), self.sample_rate) for text in texts]
+
+# Loaders run in the spawned inference processes, so they are module level functions
+def load_fake_models(model_configs, models_root, use_cuda=False, workers=1):
+    registry = {config['voice']: {'model': FakeModel(), 'lang': config['lang'], 'preprocessor': None}
+                for config in model_configs if config.get('load')}
+    return registry, {}
+
+def load_no_models(model_configs, models_root, use_cuda=False, workers=1):
+    raise ModelLoadError("No models were successfully loaded")
+
+def shared_blocks():
+    return {name for name in os.listdir('/dev/shm') if name.startswith('psm_')} if os.path.isdir('/dev/shm') else set()
+
+@pytest.fixture(scope='module')
+def pool():
+    pool = InferenceWorkerPool(MODEL_CONFIGS, processes=2, max_clients=4, timeout=30, load=load_fake_models)
+    pool.start()
+    yield pool
+    pool.stop()
+
+def test_pool_serves_voices_loaded_by_its_processes(pool):
+    """Test the processes load the voices flagged "load" and are all alive"""
+    assert list(pool.voices) == ['fake-ca', 'fake-gl']
+    assert pool.voices['fake-ca'] == {'lang': 'ca', 'sample_rate': 16000, 'checkpoint_id': 'fake'}
+    assert pool.status['alive'] == 2
+
+def test_results_come_back_through_shared_memory(pool):
+    """Test every text of a batch gets its own PCM, and the shared memory block is freed"""
+    before = shared_blocks()
+    results = pool.synthesize('fake-ca', ["Bon dia", "", "adéu"])
+    assert [pcm.tolist() for pcm, _ in results] == [[ord(c) for c in text] for text in ["Bon dia", "", "adéu"]]
+    assert all(rate == 16000 and pcm.dtype == np.int16 for pcm, rate in results)
+    assert shared_blocks() == before
+
+def test_concurrent_requests_get_their_own_results(pool):
+    """Test results of concurrent requests from several threads reach the request that sent them"""
+    results = {}
+
+    def request(i):
+        results[i] = pool.synthesize('fake-gl', [f"frase {i}"])[0][0]
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(results[i].tolist() == [ord(c) for c in f"frase {i}"] for i in range(16))
+
+def test_forked_processes_reuse_result_pipes_of_exited_ones(pool):
+    """Test processes forked like gunicorn workers get their results, more of them than result pipes over time"""
+    for i in range(pool.max_clients + 2):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                pcm = pool.synthesize('fake-ca', [f"worker {i}"])[0][0]
+                os._exit(0 if pcm.tolist() == [ord(c) for c in f"worker {i}"] else 1)
+            except BaseException:
+                os._exit(2)
+        _, status = os.waitpid(pid, 0)
+        assert os.waitstatus_to_exitcode(status) == 0
+
+def test_errors_are_raised_in_the_web_process(pool):
+    """Test inference errors and unknown voices raise SynthesisError without affecting later requests"""
+    with pytest.raises(SynthesisError, match="inference failed"):
+        pool.synthesize('fake-ca', ["fail"])
+    with pytest.raises(SynthesisError, match="not loaded"):
+        pool.synthesize('fake-off', ["hola"])
+    assert pool.synthesize('fake-ca', ["ok"])[0][0].tolist() == [ord('o'), ord('k')]
+
+def test_short_endpoint_with_inference_workers(pool, test_client, monkeypatch):
+    """Test the API synthesizes with the models of the inference processes"""
+    import server
+    registry, defaults = pool.model_entries({'ca': 'Catalan', 'gl': 'Galician'})
+    assert defaults == {'ca': 'fake-ca', 'gl': 'fake-gl'}
+    monkeypatch.setattr(server, 'loaded_models', registry)
+    monkeypatch.setattr(server, 'default_model_ids', defaults)
+    monkeypatch.setattr(server, 'audio_cache', server.AudioCache(memory_max_bytes=0))
+
+    response = test_client.post('/api/short', json={'text': "Hola", 'voice': 'fake-ca', 'format': 'wav'})
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith('audio/wav')
+
+    voices = json.loads(test_client.get('/api/voices').data)
+    assert voices['gl']['voices']['fake-gl']['framerate'] == 16000
+
+def test_failed_start_raises():
+    """Test a pool whose processes can't load any model fails to start, and stops its processes"""
+    pool = InferenceWorkerPool(MODEL_CONFIGS, processes=1, timeout=30, load=load_no_models)
+    with pytest.raises(ModelLoadError, match="No models were successfully loaded"):
+        pool.start()
+    assert pool.status['alive'] == 0
+
+class CrashingModel(FakeModel):
+    """Model whose process dies, as on an out of memory kill, when asked to synthesize "crash\""""
+    def synthesize_pcm_batch(self, texts):
+        if 'crash' in texts:
+            os._exit(1)
+        return super().synthesize_pcm_batch(texts)
+
+def load_crashing_models(model_configs, models_root, use_cuda=False, workers=1):
+    registry = {config['voice']: {'model': CrashingModel(), 'lang': config['lang'], 'preprocessor': None}
+                for config in model_configs if config.get('load')}
+    return registry, {}
+
+def test_crashed_processes_fail_requests_right_away(test_client, monkeypatch):
+    """Test a request lost with a crashed process fails without waiting for the timeout, and readiness reports it"""
+    import server
+    pool = InferenceWorkerPool(MODEL_CONFIGS, processes=2, timeout=60, load=load_crashing_models)
+    pool.start()
+    try:
+        monkeypatch.setattr(server, 'inference_pool', pool)
+        monkeypatch.setattr(server, 'warmup', WarmUp(enabled=False))
+        assert test_client.get('/api/ready').status_code == 200
+
+        start = time.monotonic()
+        with pytest.raises(SynthesisError, match="exited while serving the request"):
+            pool.synthesize('fake-ca', ["crash"])
+        assert time.monotonic() - start < 10
+        assert pool.status['alive'] == 1
+        assert test_client.get('/api/ready').status_code == 503
+        assert pool.synthesize('fake-ca', ["ok"])[0][0].tolist() == [ord('o'), ord('k')]
+
+        with pytest.raises(SynthesisError, match="exited while serving the request"):
+            pool.synthesize('fake-ca', ["crash"])
+        start = time.monotonic()
+        with pytest.raises(SynthesisError, match="No inference process is alive"):
+            pool.synthesize('fake-ca', ["ok"])
+        assert time.monotonic() - start < 1
+    finally:
+        pool.stop()
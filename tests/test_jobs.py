@@ -0,0 +1,152 @@
+# tests/test_jobs.py
+import io
+import os
+import json
+import time
+import threading
+import wave
+import pytest
+from utils.exceptions import JobQueueFullError
+from utils.jobs import JobManager
+
+def wait_finished(get_status, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = get_status()
+        if status and status['status'] in ('done', 'failed'):
+            return status
+        time.sleep(0.02)
+    raise AssertionError("Job didn't finish in time")
+
+def test_job_runs_with_progress(tmp_path):
+    """Test a job reports progress and stores its result"""
+    manager = JobManager(str(tmp_path), workers=1)
+
+    def task(progress):
+        progress(1, 2)
+        progress(2, 2)
+        return b'audio', 'mp3'
+
+    job_id = manager.submit(task, metadata={'format': 'mp3'})
+    status = wait_finished(lambda: manager.status(job_id))
+
+    assert status['status'] == 'done'
+    assert (status['done'], status['total']) == (2, 2)
+    with open(manager.result_path(job_id), 'rb') as f:
+        assert f.read() == b'audio'
+
+def test_failed_job_records_error(tmp_path):
+    """Test a failing task marks its job failed with the error"""
+    manager = JobManager(str(tmp_path), workers=1)
+
+    def task(progress):
+        raise RuntimeError("model exploded")
+
+    job_id = manager.submit(task)
+    status = wait_finished(lambda: manager.status(job_id))
+
+    assert status['status'] == 'failed'
+    assert 'model exploded' in status['error']
+    assert manager.result_path(job_id) is None
+
+def test_queue_full_rejects_jobs(tmp_path):
+    """Test submitting beyond the queue bound fails right away"""
+    manager = JobManager(str(tmp_path), workers=1, max_queued=1)
+    release = threading.Event()
+
+    def blocking_task(progress):
+        release.wait(5)
+        return b'', 'wav'
+
+    first = manager.submit(blocking_task)
+    wait_running = time.time() + 5
+    while manager.status(first)['status'] != 'running' and time.time() < wait_running:
+        time.sleep(0.01)
+    manager.submit(blocking_task)
+
+    with pytest.raises(JobQueueFullError):
+        manager.submit(blocking_task)
+    release.set()
+
+def test_status_of_unknown_or_invalid_id(tmp_path):
+    """Test unknown and malformed job ids have no status"""
+    manager = JobManager(str(tmp_path))
+    assert manager.status('0' * 32) is None
+    assert manager.status('../config') is None
+
+def test_expired_jobs_are_removed(tmp_path):
+    """Test jobs older than the TTL are cleaned up"""
+    manager = JobManager(str(tmp_path), workers=1, ttl_seconds=0)
+    job_id = manager.submit(lambda progress: (b'audio', 'wav'))
+    wait_finished(lambda: manager.status(job_id))
+
+    time.sleep(0.01)
+    manager.cleanup()
+    assert manager.status(job_id) is None
+    assert list(tmp_path.iterdir()) == []
+
+def test_active_jobs_outlive_the_ttl(tmp_path):
+    """Test cleanup keeps queued and running jobs of live processes, and removes those of dead ones"""
+    manager = JobManager(str(tmp_path), workers=1, ttl_seconds=0)
+    started, release = threading.Event(), threading.Event()
+
+    def blocking_task(progress):
+        started.set()
+        release.wait(5)
+        return b'audio', 'wav'
+
+    running = manager.submit(blocking_task)
+    queued = manager.submit(lambda progress: (b'audio', 'wav'))
+    started.wait(5)
+
+    time.sleep(0.01)
+    manager.cleanup()
+    assert manager.status(running)['status'] == 'running'
+    assert manager.status(queued)['status'] == 'queued'
+
+    # A job left behind by a worker process that exited
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0)
+    os.waitpid(pid, 0)
+    orphan = dict(manager.status(queued), job_id='f' * 32, pid=pid)
+    (tmp_path / f"{'f' * 32}.json").write_text(json.dumps(orphan))
+    manager.cleanup()
+    assert manager.status('f' * 32) is None
+
+    release.set()
+    assert wait_finished(lambda: manager.status(running))['status'] == 'done'
+
+def test_job_api_flow(test_client, monkeypatch, tmp_path):
+    """Test submitting a job, polling it and fetching its audio"""
+    import server
+    monkeypatch.setattr(server, 'job_manager', JobManager(str(tmp_path), workers=1))
+    monkeypatch.setattr(server, 'parse_sents', lambda text, **kwargs: [s for s in text.split('|') if s])
+
+    response = test_client.post('/api/jobs', json={
+        'text_paragraphs': ['Una.|Dues.', 'Tres.'], 'voice': 'test-mms', 'format': 'wav'
+    })
+    assert response.status_code == 202
+    job_id = json.loads(response.data)['job_id']
+    assert response.headers['Location'].endswith(f'/api/jobs/{job_id}')
+
+    status = wait_finished(lambda: json.loads(test_client.get(f'/api/jobs/{job_id}').data))
+    assert status['status'] == 'done'
+    assert status['progress'] == {'done': 3, 'total': 3}
+
+    response = test_client.get(f'/api/jobs/{job_id}/result')
+    assert response.status_code == 200
+    assert response.mimetype == 'audio/wav'
+    with wave.open(io.BytesIO(response.data), 'rb') as wav_file:
+        # 3 sentences, 3 short pauses, initial pause and 2 paragraph pauses
+        assert wav_file.getnframes() == 3 * 500 + 3 * 4410 + 3 * 11025
+
+def test_job_api_errors(test_client, monkeypatch, tmp_path):
+    """Test job API validation and unknown jobs"""
+    import server
+    monkeypatch.setattr(server, 'job_manager', JobManager(str(tmp_path), workers=1))
+
+    assert test_client.post('/api/jobs', json={'text_paragraphs': [' '], 'voice': 'test-mms'}).status_code == 400
+    assert test_client.post('/api/jobs', json={'text_paragraphs': ['Hola.'], 'voice': 'nope'}).status_code == 404
+    assert test_client.get(f"/api/jobs/{'0' * 32}").status_code == 404
+    assert test_client.get(f"/api/jobs/{'0' * 32}/result").status_code == 404
@@ -0,0 +1,24 @@
+# tests/test_metrics.py
+
+def test_metrics_after_synthesis(test_client, monkeypatch):
+    """Test synthesis requests show up in the Prometheus metrics"""
+    import server
+    monkeypatch.setattr(server, 'parse_sents', lambda text, **kwargs: [text])
+
+    assert test_client.post('/api/short', json={'text': 'Hola.', 'voice': 'test-mms'}).status_code == 200
+    assert test_client.post('/api/long', json={'text_paragraphs': ['Hola.'], 'voice': 'test-coqui',
+                                               'format': 'wav'}).status_code == 200
+
+    response = test_client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    body = response.data.decode('utf-8')
+
+    for stage in ['preprocess', 'inference', 'encoding']:
+        assert f'tts_stage_seconds_count{{stage="{stage}",voice="test-mms"}}' in body
+    for stage in ['split', 'preprocess', 'inference', 'assembly', 'encoding']:
+        assert f'tts_stage_seconds_count{{stage="{stage}",voice="test-coqui"}}' in body
+    assert 'tts_real_time_factor_count{voice="test-mms"}' in body
+    assert 'tts_characters_per_second_count{voice="test-coqui"}' in body
+    assert 'tts_in_flight_requests{endpoint="tts"} 0.0' in body
+    assert 'tts_queue_depth{queue="jobs"}' in body
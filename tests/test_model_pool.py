@@ -0,0 +1,115 @@
+# tests/test_model_pool.py
+import json
+import numpy as np
+import pytest
+import utils.model_pool
+from utils.exceptions import ModelLoadError
+from utils.model_pool import LazyModelPool
+
+MB = 1024 * 1024
+
+class SizedModel:
+    """Stand-in model with a fixed weights size"""
+    checkpoint_id = 'sized'
+    sample_rate = 16000
+
+    def __init__(self, size):
+        self.size = size
+
+    def memory_footprint(self):
+        return self.size
+
+    def synthesize_pcm(self, text):
+        return np.zeros(160, dtype=np.int16), 16000
+
+    def synthesize_pcm_batch(self, texts):
+        return [self.synthesize_pcm(text) for text in texts]
+
+def make_config(voice, lang='ca', size_mb=1):
+    return {'voice': voice, 'lang': lang, 'model_type': 'sized', 'size_mb': size_mb}
+
+@pytest.fixture
+def loads(monkeypatch):
+    """Replaces model loading with SizedModel entries, returns the list of loaded voices"""
+    loaded = []
+
+    def fake_load_model_entry(model_config, use_cuda=False, languages=None, preprocessor_cache=None):
+        if model_config.get('broken'):
+            raise ModelLoadError("broken model")
+        loaded.append(model_config['voice'])
+        return {'model': SizedModel(model_config['size_mb'] * MB), 'lang': model_config['lang'],
+                'voice': model_config['voice'], 'language': 'Catalan', 'preprocessor': None,
+                'batch_preprocessor': None, 'framerate': 16000}
+
+    monkeypatch.setattr(utils.model_pool, 'load_model_entry', fake_load_model_entry)
+    return loaded
+
+def test_loads_on_first_use(loads):
+    """Test voices are loaded once, on first acquire"""
+    registry = {}
+    pool = LazyModelPool(registry, [make_config('a')])
+    assert not pool.is_resident('a')
+
+    with pool.lease('a') as entry:
+        assert entry['voice'] == 'a'
+    with pool.lease('a'):
+        pass
+
+    assert loads == ['a']
+    assert 'a' in registry
+
+def test_lru_eviction_over_budget(loads):
+    """Test least recently used voices are evicted to fit the memory budget"""
+    registry = {}
+    pool = LazyModelPool(registry, [make_config(v) for v in 'abc'], memory_budget_bytes=2 * MB)
+    for voice in ['a', 'b', 'a', 'c']:
+        with pool.lease(voice):
+            pass
+
+    assert set(registry) == {'a', 'c'}
+    assert pool.stats['evictions'] == 1
+    assert pool.memory_used <= 2 * MB
+
+def test_leased_and_pinned_voices_are_not_evicted(loads):
+    """Test voices in use and voices loaded at startup stay resident"""
+    registry = {'pinned': {'model': SizedModel(MB), 'lang': 'ca'}}
+    pool = LazyModelPool(registry, [make_config(v) for v in ['pinned', 'a', 'b']], memory_budget_bytes=2 * MB)
+
+    pool.acquire('a')
+    with pool.lease('b'):
+        # Over budget, but nothing can be evicted
+        assert set(registry) == {'pinned', 'a', 'b'}
+    assert set(registry) == {'pinned', 'a'}
+
+    pool.release('a')
+    with pool.lease('b'):
+        pass
+    assert set(registry) == {'pinned', 'b'}
+
+def test_unknown_or_broken_voice(loads):
+    """Test acquiring unconfigured or failing voices raises ModelLoadError"""
+    pool = LazyModelPool({}, [dict(make_config('broken'), broken=True)])
+    with pytest.raises(ModelLoadError):
+        pool.acquire('missing')
+    with pytest.raises(ModelLoadError):
+        pool.acquire('broken')
+    assert not pool.is_resident('broken')
+
+def test_api_loads_voice_on_demand(test_client, mock_loaded_models, monkeypatch, loads):
+    """Test a configured but unloaded voice is listed, then loaded by its first request"""
+    import server
+    pool = LazyModelPool(mock_loaded_models, [make_config('lazy-ca', 'ca')])
+    monkeypatch.setattr(server, 'model_pool', pool)
+    monkeypatch.setattr(server, 'config_manager', type('Config', (), {'languages': {'ca': 'Catalan'}})())
+    monkeypatch.setitem(server.default_model_ids, 'ca', 'lazy-ca')
+
+    voices = json.loads(test_client.get('/api/voices').data)
+    assert voices['ca']['voices']['lazy-ca'] == {'default': True, 'framerate': None, 'resident': False}
+    assert voices['rmz']['voices']['test-mms']['resident'] is True
+
+    response = test_client.post('/api/short', json={'text': 'Hola.', 'lang': 'ca'})
+    assert response.status_code == 200
+    assert loads == ['lazy-ca']
+
+    voices = json.loads(test_client.get('/api/voices').data)
+    assert voices['ca']['voices']['lazy-ca']['resident'] is True
@@ -2,6 +2,7 @@
 import pytest
 import io
 import numpy as np
+import torch
 from utils.backends.mms import MMSWrapper
 from utils.exceptions import SynthesisError
 
@@ -39,6 +40,22 @@ def test_mms_synthesis():
     result = wrapper.synthesize("test text")
     assert isinstance(result, io.BytesIO)
 
+def test_mms_synthesis_pcm():
+    """Test MMS float output is converted to int16 PCM"""
+    config = {
+        "voice": "test-mms",
+        "lang": "rmz",
+        "model_type": "mms",
+        "base_model_path": "test_path"
+    }
+    wrapper = MMSWrapper(config)
+    wrapper.synthesizer = MockPipeline()
+
+    pcm, rate = wrapper.synthesize_pcm("test text")
+    assert pcm.dtype == np.int16
+    assert len(pcm) == 1000
+    assert rate == 16000
+
 def test_synthesis_without_model():
     """Test synthesis without loaded model"""
     config = {
@@ -50,4 +67,192 @@ def test_synthesis_without_model():
     wrapper = MMSWrapper(config)
     
     with pytest.raises(SynthesisError, match="Synthesizer not initialized"):
-        wrapper.synthesize("test text")
\ No newline at end of file
+        wrapper.synthesize("test text")
+
+class MockVitsOutput:
+    def __init__(self, batch_size):
+        self.waveform = torch.zeros((batch_size, 4000))
+        self.sequence_lengths = torch.tensor([1000 * (i + 1) for i in range(batch_size)])
+
+class MockVitsModel:
+    def __call__(self, input_ids, attention_mask):
+        return MockVitsOutput(input_ids.shape[0])
+
+class MockTokenizer:
+    def __call__(self, texts, padding, return_tensors):
+        length = max(len(text) for text in texts)
+        return {
+            "input_ids": torch.zeros((len(texts), length), dtype=torch.long),
+            "attention_mask": torch.ones((len(texts), length), dtype=torch.long)
+        }
+
+def test_mms_synthesis_batch():
+    """Test MMS batched synthesis trims each waveform to its own length"""
+    config = {
+        "voice": "test-mms",
+        "lang": "rmz",
+        "model_type": "mms",
+        "base_model_path": "test_path"
+    }
+    wrapper = MMSWrapper(config)
+    wrapper.synthesizer = MockPipeline()
+    wrapper.model = MockVitsModel()
+    wrapper.tokenizer = MockTokenizer()
+
+    results = wrapper.synthesize_pcm_batch(["a", "text", "longer text"])
+    assert [len(pcm) for pcm, _ in results] == [1000, 2000, 3000]
+    assert all(pcm.dtype == np.int16 and rate == 16000 for pcm, rate in results)
+
+def test_load_models_in_parallel_with_report(monkeypatch):
+    """Test models load concurrently, failures are isolated and each load is reported"""
+    import time
+    import utils.model_loader
+    from utils.model_loader import load_models
+
+    def slow_load_model_entry(model_config, use_cuda=False, languages=None, preprocessor_cache=None):
+        time.sleep(0.2)
+        if model_config['voice'] == 'broken':
+            raise RuntimeError("corrupt checkpoint")
+        return {'model': None, 'lang': model_config['lang'], 'voice': model_config['voice']}
+
+    monkeypatch.setattr(utils.model_loader, 'load_model_entry', slow_load_model_entry)
+    configs = [
+        {'voice': 'broken', 'lang': 'ca', 'load': True},
+        {'voice': 'first-ca', 'lang': 'ca', 'load': True},
+        {'voice': 'second-ca', 'lang': 'ca', 'load': True},
+        {'voice': 'gl', 'lang': 'gl', 'load': True},
+        {'voice': 'skipped', 'lang': 'gl', 'load': False},
+    ]
+
+    report = {}
+    start = time.perf_counter()
+    loaded, defaults = load_models(configs, 'models', workers=4, report=report)
+
+    assert time.perf_counter() - start < 0.6
+    assert set(loaded) == {'first-ca', 'second-ca', 'gl'}
+    assert defaults == {'ca': 'first-ca', 'gl': 'gl'}
+    assert report['workers'] == 4
+    rows = {row['voice']: row for row in report['models']}
+    assert set(rows) == {'broken', 'first-ca', 'second-ca', 'gl'}
+    assert rows['broken']['loaded'] is False
+    assert 'corrupt checkpoint' in rows['broken']['error']
+    assert rows['gl']['seconds'] >= 0.2
+
+def test_freeze_puts_weights_in_inference_mode():
+    """Test frozen models are in eval mode without gradients"""
+    wrapper = MMSWrapper({'voice': 'test', 'lang': 'rmz', 'model_type': 'mms', 'base_model_path': 'test_path'})
+    wrapper.model = torch.nn.Sequential(torch.nn.Linear(4, 4), torch.nn.Dropout(0.1))
+    wrapper.freeze()
+
+    assert not wrapper.model.training
+    assert not any(parameter.requires_grad for parameter in wrapper.model.parameters())
+    assert wrapper.memory_footprint() == (16 + 4) * 4
+
+def test_int8_quantization_of_linear_layers():
+    """Test int8 quantization replaces linear layers, keeps convolutions, and shrinks the weights"""
+    torch.manual_seed(0)
+    wrapper = MMSWrapper({'voice': 'test', 'lang': 'rmz', 'model_type': 'mms', 'base_model_path': 'test_path'})
+    wrapper.model = torch.nn.Sequential(torch.nn.Conv1d(64, 64, 1), torch.nn.Flatten(), torch.nn.Linear(64, 64))
+    inputs = torch.randn(2, 64, 1)
+    with torch.inference_mode():
+        expected = wrapper.model(inputs)
+    float_bytes = wrapper.memory_footprint()
+
+    wrapper.quantize('int8')
+    wrapper.freeze()
+
+    assert isinstance(wrapper.model[0], torch.nn.Conv1d)
+    assert isinstance(wrapper.model[2], torch.ao.nn.quantized.dynamic.Linear)
+    assert wrapper.memory_footprint() < float_bytes
+    with torch.inference_mode():
+        assert torch.allclose(wrapper.model(inputs), expected, atol=0.05)
+
+def test_unknown_quantization_mode():
+    from utils.exceptions import ConfigurationError
+    wrapper = MMSWrapper({'voice': 'test', 'lang': 'rmz', 'model_type': 'mms', 'base_model_path': 'test_path'})
+    wrapper.model = torch.nn.Linear(4, 4)
+    with pytest.raises(ConfigurationError):
+        wrapper.quantize('int4')
+
+def test_checkpoint_id_covers_model_directories_and_quantization(tmp_path, monkeypatch):
+    """Test the checkpoint id changes with the files in an MMS model directory and with the quantization mode"""
+    import os
+    monkeypatch.setenv('MODELS_ROOT', str(tmp_path))
+    (tmp_path / 'mms-cat' / 'weights').mkdir(parents=True)
+    (tmp_path / 'mms-cat' / 'config.json').write_text('{}')
+    weights = tmp_path / 'mms-cat' / 'weights' / 'model.safetensors'
+    weights.write_bytes(b'\0' * 10)
+    config = {'voice': 'test', 'lang': 'ca', 'model_type': 'mms', 'base_model_path': 'mms-cat',
+              'checkpoint_name': 'weights'}
+
+    checkpoint_id = MMSWrapper(config).checkpoint_id
+    assert MMSWrapper(config).checkpoint_id == checkpoint_id
+    assert MMSWrapper({**config, 'quantize': 'int8'}).checkpoint_id != checkpoint_id
+
+    weights.write_bytes(b'\0' * 20)
+    os.utime(weights, ns=(1, 1))
+    assert MMSWrapper(config).checkpoint_id != checkpoint_id
+
+class MockSynthesizer:
+    """Stands in for the Coqui Synthesizer: holds the TTS model, and records the texts synthesized one by one"""
+    def __init__(self, tts_model, vocoder_model=None):
+        self.tts_model = tts_model
+        self.vocoder_model = vocoder_model
+        self.texts = []
+
+    def tts(self, text):
+        self.texts.append(text)
+        return np.zeros(100 * len(text), dtype=np.float32)
+
+@pytest.fixture(scope='module')
+def vits_model():
+    """Small single speaker Coqui VITS with random weights and a deterministic duration predictor"""
+    from TTS.tts.configs.shared_configs import CharactersConfig
+    from TTS.tts.configs.vits_config import VitsConfig
+    from TTS.tts.models.vits import Vits, VitsArgs
+    torch.manual_seed(0)
+    args = VitsArgs(hidden_channels=16, hidden_channels_ffn_text_encoder=32, num_layers_text_encoder=1,
+                    num_heads_text_encoder=2, num_layers_flow=1, num_layers_posterior_encoder=1, use_sdp=False,
+                    upsample_rates_decoder=[8, 8, 4], upsample_initial_channel_decoder=32,
+                    upsample_kernel_sizes_decoder=[16, 16, 8], resblock_kernel_sizes_decoder=[3],
+                    resblock_dilation_sizes_decoder=[[1, 3, 5]], init_discriminator=False)
+    characters = CharactersConfig(characters_class='TTS.tts.models.vits.VitsCharacters',
+                                  characters='abcdefghijklmnopqrstuvwxyz ', punctuations='.,', pad='<PAD>',
+                                  eos='<EOS>', bos='<BOS>', blank='<BLNK>')
+    model = Vits.init_from_config(VitsConfig(model_args=args, text_cleaner=None, use_phonemes=False,
+                                             characters=characters))
+    return model.eval()
+
+def coqui_wrapper(synthesizer):
+    from utils.backends.coqui import CoquiWrapper
+    wrapper = CoquiWrapper({'voice': 'test-coqui', 'lang': 'en', 'model_type': 'coqui'})
+    wrapper.synthesizer = synthesizer
+    wrapper.sample_rate_val = 22050
+    return wrapper
+
+def test_coqui_batch_matches_single_inference(vits_model):
+    """Test a padded Coqui VITS batch gives each text the length it gets when synthesized alone"""
+    synthesizer = MockSynthesizer(vits_model)
+    wrapper = coqui_wrapper(synthesizer)
+    assert wrapper.supports_batching()
+
+    texts = ['hola', 'bon dia a tothom', 'adeu']
+    batch = wrapper.synthesize_pcm_batch(texts)
+    singles = [wrapper.synthesize_pcm_batch([text])[0] for text in texts]
+
+    assert [len(pcm) for pcm, _ in batch] == [len(pcm) for pcm, _ in singles]
+    assert len(batch[1][0]) > len(batch[0][0])
+    assert all(pcm.dtype == np.int16 and rate == 22050 for pcm, rate in batch)
+    assert synthesizer.texts == []
+
+@pytest.mark.parametrize('multi_speaker, vocoder', [(True, None), (False, object())])
+def test_coqui_batch_fallback(vits_model, monkeypatch, multi_speaker, vocoder):
+    """Test multi-speaker models and models with an external vocoder synthesize the texts one by one"""
+    monkeypatch.setattr(vits_model.args, 'use_speaker_embedding', multi_speaker)
+    synthesizer = MockSynthesizer(vits_model, vocoder_model=vocoder)
+    wrapper = coqui_wrapper(synthesizer)
+    assert not wrapper.supports_batching()
+
+    batch = wrapper.synthesize_pcm_batch(['hola', 'adeu siau'])
+    assert synthesizer.texts == ['hola', 'adeu siau']
+    assert [len(pcm) for pcm, _ in batch] == [400, 900]
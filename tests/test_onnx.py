@@ -0,0 +1,109 @@
+# tests/test_onnx.py
+import json
+import subprocess
+import sys
+import numpy as np
+import pytest
+import torch
+from transformers import VitsConfig, VitsModel, VitsTokenizer
+from utils.backends.onnx_runtime import ONNXWrapper, VitsCharTokenizer
+from utils.config_validator import validate_config
+from utils.exceptions import ConfigurationError
+from utils.model_factory import TTSModelFactory
+from utils.onnx_export import export_coqui, export_mms, mms_tokenizer_metadata
+
+VOCAB = {'<pad>': 0, '<unk>': 1, ' ': 2, 'a': 3, 'b': 4, 'c': 5, 'ç': 6, 'l': 7, "'": 8, 'Z': 9}
+
+@pytest.fixture
+def vits_tokenizer(tmp_path):
+    vocab_file = tmp_path / 'vocab.json'
+    vocab_file.write_text(json.dumps(VOCAB))
+    return VitsTokenizer(str(vocab_file), phonemize=False)
+
+@pytest.fixture
+def exported_model(tmp_path, vits_tokenizer, monkeypatch):
+    """A tiny MMS VITS model with random weights exported to tmp_path/ca/tiny.onnx"""
+    torch.manual_seed(0)
+    config = VitsConfig(
+        vocab_size=len(VOCAB), hidden_size=16, num_hidden_layers=1, num_attention_heads=2, ffn_dim=16,
+        flow_size=16, spectrogram_bins=17, upsample_initial_channel=16, upsample_rates=[4, 4],
+        upsample_kernel_sizes=[8, 8], resblock_kernel_sizes=[3], resblock_dilation_sizes=[[1]],
+        prior_encoder_num_flows=1, posterior_encoder_num_wavenet_layers=1, duration_predictor_filter_channels=16,
+        duration_predictor_num_flows=1, sampling_rate=16000
+    )
+    (tmp_path / 'ca').mkdir()
+    export_mms(VitsModel(config).eval(), vits_tokenizer, str(tmp_path / 'ca' / 'tiny.onnx'))
+    monkeypatch.setenv('MODELS_ROOT', str(tmp_path))
+    return {'voice': 'tiny-onnx', 'lang': 'ca', 'model_type': 'onnx', 'onnx_model_path': 'ca/tiny.onnx'}
+
+def test_char_tokenizer_matches_vits_tokenizer(vits_tokenizer):
+    """Test MMS tokenization without transformers gives the ids of VitsTokenizer"""
+    tokenizer = VitsCharTokenizer.from_metadata(mms_tokenizer_metadata(vits_tokenizer))
+    for text in ["Abc", "cal·la, l'àbac!", "  ZZ  ba  ", "ÇA", "", "xyz"]:
+        assert tokenizer.text_to_ids(text) == vits_tokenizer(text)['input_ids'], text
+
+def test_onnx_backend_does_not_import_torch():
+    """Test serving ONNX models through the factory doesn't load torch or the other backends"""
+    code = ("import sys; from utils.model_factory import TTSModelFactory; "
+            "TTSModelFactory.create_model({'voice': 'tiny-onnx', 'lang': 'ca', 'model_type': 'onnx', "
+            "'onnx_model_path': 'ca/tiny.onnx'}); "
+            "print(' '.join(sorted({'torch', 'TTS', 'transformers'} & set(sys.modules))) or 'none')")
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    assert output.split() == ['none']
+
+def test_export_and_synthesize(exported_model):
+    """Test an exported model is served through the factory"""
+    model = TTSModelFactory.create_model(exported_model)
+    assert isinstance(model, ONNXWrapper)
+    assert model.load_model()
+
+    pcm, sample_rate = model.synthesize_pcm("ab cab")
+    assert sample_rate == 16000 == model.sample_rate
+    assert pcm.dtype == np.int16 and len(pcm) > 0
+    assert model.memory_footprint() > 0
+
+    batch = model.synthesize_pcm_batch(["abc", "cba"])
+    assert [rate for _, rate in batch] == [16000, 16000]
+
+def test_export_coqui_and_synthesize(tmp_path, monkeypatch):
+    """Test a Coqui VITS model is exported with its training config and served"""
+    from types import SimpleNamespace
+    from TTS.tts.configs.vits_config import VitsConfig as CoquiVitsConfig
+    from TTS.tts.models.vits import Vits, VitsArgs
+    torch.manual_seed(0)
+    args = VitsArgs(
+        hidden_channels=16, hidden_channels_ffn_text_encoder=16, num_heads_text_encoder=2, num_layers_text_encoder=1,
+        num_layers_flow=1, num_layers_posterior_encoder=1, out_channels=17, spec_segment_size=4,
+        resblock_kernel_sizes_decoder=[3], resblock_dilation_sizes_decoder=[[1, 3, 5]],
+        upsample_rates_decoder=[4, 4], upsample_initial_channel_decoder=16, upsample_kernel_sizes_decoder=[8, 8]
+    )
+    config = CoquiVitsConfig(model_args=args, use_phonemes=False, text_cleaner='basic_cleaners')
+    config.audio.sample_rate, config.audio.hop_length, config.audio.win_length, config.audio.fft_size = 16000, 16, 32, 32
+    config.save_json(str(tmp_path / 'config.json'))
+    synthesizer = SimpleNamespace(tts_model=Vits.init_from_config(config).eval(), vocoder_model=None,
+                                  output_sample_rate=16000)
+
+    export_coqui(synthesizer, str(tmp_path / 'config.json'), str(tmp_path / 'tiny.onnx'))
+    assert (tmp_path / 'tiny.tts_config.json').exists()
+    monkeypatch.setenv('MODELS_ROOT', str(tmp_path))
+    model = ONNXWrapper({'voice': 'tiny-coqui', 'lang': 'ca', 'model_type': 'onnx', 'onnx_model_path': 'tiny.onnx'})
+    assert model.load_model()
+    pcm, sample_rate = model.synthesize_pcm("hola, que tal")
+    assert sample_rate == 16000
+    assert pcm.dtype == np.int16 and len(pcm) > 0
+
+def test_missing_onnx_files(tmp_path, monkeypatch):
+    """Test loading fails cleanly without the exported files"""
+    from utils.exceptions import ModelLoadError
+    monkeypatch.setenv('MODELS_ROOT', str(tmp_path))
+    model = ONNXWrapper({'voice': 'missing', 'lang': 'ca', 'model_type': 'onnx', 'onnx_model_path': 'none.onnx'})
+    with pytest.raises(ModelLoadError):
+        model.load_model()
+
+def test_onnx_required_fields():
+    """Test onnx voices need their model path"""
+    config = {'languages': {'ca': 'Catalan'}, 'models': [{'voice': 'v', 'lang': 'ca', 'model_type': 'onnx'}]}
+    with pytest.raises(ConfigurationError):
+        validate_config(config)
+    config['models'][0]['onnx_model_path'] = 'ca/v.onnx'
+    validate_config(config)
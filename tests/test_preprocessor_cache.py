@@ -0,0 +1,93 @@
+# tests/test_preprocessor_cache.py
+import json
+from utils.preprocessor_cache import PreprocessorCache
+from utils.model_loader import load_lang_preprocessor, load_lang_batch_preprocessor
+
+def counting(function, calls):
+    def counted(argument):
+        calls.append(argument)
+        return function(argument)
+    return counted
+
+def test_lru_eviction_and_stats():
+    """Test entries are evicted least recently used first over the entry limit"""
+    cache = PreprocessorCache(max_entries=2)
+    cache.put(('ca', 'preprocessor', 'a'), 'A')
+    cache.put(('ca', 'preprocessor', 'b'), 'B')
+    assert cache.get(('ca', 'preprocessor', 'a')) == 'A'
+    cache.put(('ca', 'preprocessor', 'c'), 'C')
+
+    assert cache.get(('ca', 'preprocessor', 'b')) is None
+    assert cache.get(('ca', 'preprocessor', 'c')) == 'C'
+    stats = cache.stats
+    assert stats['items'] == 2
+    assert stats['hits'] == 2
+    assert stats['misses'] == 1
+
+def test_wrap_skips_repeated_texts():
+    """Test a wrapped preprocessor runs once per distinct text, and keys include language and module"""
+    cache = PreprocessorCache()
+    calls = []
+    preprocess = cache.wrap('ca', 'preprocessor', counting(str.upper, calls))
+    other_lang = cache.wrap('es', 'preprocessor', counting(str.upper, calls))
+
+    assert [preprocess('hola'), preprocess('hola'), preprocess('adéu')] == ['HOLA', 'HOLA', 'ADÉU']
+    assert other_lang('hola') == 'HOLA'
+    assert calls == ['hola', 'adéu', 'hola']
+
+def test_long_texts_and_failures_not_cached():
+    """Test texts over the length limit and failed normalizations are recomputed"""
+    cache = PreprocessorCache(max_text_length=5)
+    calls = []
+    preprocess = cache.wrap('ca', 'preprocessor', counting(lambda text: None if text == 'bad' else text, calls))
+
+    for _ in range(2):
+        preprocess('long text')
+        preprocess('bad')
+    assert calls == ['long text', 'bad', 'long text', 'bad']
+    assert cache.stats['items'] == 0
+
+def test_disabled_cache_returns_preprocessor():
+    """Test a cache with no entries doesn't wrap preprocessors"""
+    cache = PreprocessorCache(max_entries=0)
+    assert cache.wrap('ca', 'preprocessor', str.upper) is str.upper
+    assert cache.wrap_batch('ca', 'preprocessor', list) is list
+
+def test_wrap_batch_only_sends_missing_texts():
+    """Test a wrapped batch preprocessor gets the distinct uncached texts, and isn't called when all are cached"""
+    cache = PreprocessorCache()
+    calls = []
+    preprocess_batch = cache.wrap_batch('gl', 'cotovia_preprocessor',
+                                        counting(lambda texts: [text.upper() for text in texts], calls))
+
+    assert preprocess_batch(['ola', 'mundo', 'ola']) == ['OLA', 'MUNDO', 'OLA']
+    assert preprocess_batch(['mundo', 'adeus']) == ['MUNDO', 'ADEUS']
+    assert preprocess_batch(['ola', 'adeus']) == ['OLA', 'ADEUS']
+    assert calls == [['ola', 'mundo'], ['adeus']]
+
+def test_loaded_preprocessors_share_cache(monkeypatch):
+    """Test preprocessors loaded with a cache skip normalization of texts already seen by either entry point"""
+    from utils.preprocessors.gl import cotovia_preprocessor
+    cache = PreprocessorCache()
+    calls = []
+    monkeypatch.setattr(cotovia_preprocessor, 'text_preprocess', counting(str.upper, calls))
+    monkeypatch.setattr(cotovia_preprocessor, 'text_preprocess_batch',
+                        counting(lambda texts: [text.upper() for text in texts], calls))
+
+    preprocess = load_lang_preprocessor('gl', 'cotovia_preprocessor', cache)
+    preprocess_batch = load_lang_batch_preprocessor('gl', 'cotovia_preprocessor', cache)
+    assert preprocess('ola.') == 'OLA.'
+    assert preprocess_batch(['ola.', 'que tal?']) == ['OLA.', 'QUE TAL?']
+    assert preprocess('que tal?') == 'QUE TAL?'
+    assert calls == ['ola.', ['que tal?']]
+
+def test_stats_endpoint(test_client, monkeypatch):
+    """Test preprocessor cache counters are served"""
+    import server
+    cache = PreprocessorCache()
+    cache.wrap('ca', 'preprocessor', str.upper)('hola')
+    monkeypatch.setattr(server, 'preprocessor_cache', cache)
+
+    response = test_client.get('/api/preprocessor_cache')
+    assert response.status_code == 200
+    assert json.loads(response.data)['misses'] == 1
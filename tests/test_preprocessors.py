@@ -0,0 +1,114 @@
+# tests/test_preprocessors.py
+import os
+import json
+import stat
+import pytest
+from utils.preprocessors.ca import preprocessor as ca_preprocessor, cat_number_letter
+from utils.preprocessors.lad import ladino_number_letter
+from utils.preprocessors.gl import cotovia_preprocessor, cotovia_preprocessor_tra3
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+# Stand-in for the cotovia binary: transcribes each input line to upper case next to the input file
+# and counts its invocations
+FAKE_COTOVIA = """#!/bin/bash
+echo run >> "{calls}"
+while [ "$1" != "-i" ]; do shift; done
+infile=$2
+sed {skip}'s/.*/\\U&/' "$infile" > "${{infile%.*}}.tra"
+"""
+
+def install_fake_cotovia(tmp_path, monkeypatch, skip=''):
+    calls = tmp_path / 'calls'
+    script = tmp_path / 'bin' / 'cotovia'
+    script.parent.mkdir()
+    script.write_text(FAKE_COTOVIA.format(calls=calls, skip=skip))
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv('PATH', f"{script.parent}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.chdir(tmp_path)
+    return calls
+
+@pytest.fixture
+def fake_cotovia(tmp_path, monkeypatch):
+    """Puts a fake cotovia executable on PATH, returns the file counting its calls"""
+    return install_fake_cotovia(tmp_path, monkeypatch)
+
+@pytest.fixture
+def fake_cotovia_skipping_blank_lines(tmp_path, monkeypatch):
+    """Puts a fake cotovia executable that drops blank input lines on PATH, returns the file counting its calls"""
+    return install_fake_cotovia(tmp_path, monkeypatch, skip="-e '/^$/d' -e ")
+
+def count_calls(calls):
+    return len(calls.read_text().splitlines()) if calls.exists() else 0
+
+@pytest.mark.parametrize('module', [cotovia_preprocessor, cotovia_preprocessor_tra3])
+def test_cotovia_uses_private_workspace(fake_cotovia, tmp_path, module):
+    """Test cotovia files are not written to the working directory"""
+    assert module.text_preprocess('ola, mundo.').startswith('OLA , MUNDO .')
+    assert not (tmp_path / module.COTOVIA_IN_TXT_PATH).exists()
+    assert not (tmp_path / module.COTOVIA_OUT_TRA_PATH).exists()
+
+@pytest.mark.parametrize('module', [cotovia_preprocessor, cotovia_preprocessor_tra3])
+def test_cotovia_batch_single_invocation(fake_cotovia, module):
+    """Test batch preprocessing runs cotovia once and matches per text results"""
+    texts = ['ola, mundo.', 'que tal?', 'ben; grazas!']
+    expected = [module.text_preprocess(text) for text in texts]
+    calls_before = count_calls(fake_cotovia)
+
+    assert module.text_preprocess_batch(texts) == expected
+    assert count_calls(fake_cotovia) - calls_before == 1
+
+@pytest.mark.parametrize('module', [cotovia_preprocessor, cotovia_preprocessor_tra3])
+def test_cotovia_batch_with_empty_segments(fake_cotovia_skipping_blank_lines, module):
+    """Test empty segments keep their line when cotovia skips blank lines, so the batch needs a single run"""
+    texts = ['ola, mundo.', 'que tal?', '...', 'ben; grazas']
+    expected = [module.text_preprocess(text) for text in texts]
+    calls_before = count_calls(fake_cotovia_skipping_blank_lines)
+
+    assert module.text_preprocess_batch(texts) == expected
+    assert count_calls(fake_cotovia_skipping_blank_lines) - calls_before == 1
+
+def test_ca_preprocessor_matches_golden_outputs():
+    """Test Catalan normalization matches the outputs recorded from the previous implementation
+
+    The inputs are the benchmark corpus, edge cases (dates, times, urls, units, lexicon entries,
+    punctuation) and random mixes of them.
+    """
+    with open(os.path.join(DATA_DIR, 'ca_preprocessor_golden.json'), encoding='utf-8') as f:
+        golden = json.load(f)
+
+    mismatches = [(text, expected, ca_preprocessor.text_preprocess(text)) for text, expected in golden
+                  if ca_preprocessor.text_preprocess(text) != expected]
+    assert not mismatches, mismatches[:5]
+
+def test_ca_lexicon_resolves_like_the_lookup_chain():
+    """Test the combined lexicon gives each entry the result of the acronym, url, letter and symbol passes"""
+    for tok, pronounced in ca_preprocessor.LEXICON.items():
+        assert pronounced == ca_preprocessor.pronounce_token(tok)
+    assert ca_preprocessor.lookup_token('www.bsc.es') == ca_preprocessor.pronounce_token('www.bsc.es')
+
+def reference_num_let(module, numero, decimal_word):
+    # Spelling of the recursive algorithm, without the table, composition and cache
+    numero_entero = int(numero)
+    parte_decimal = int(round((abs(numero) - abs(numero_entero)) * 100))
+    resultado = module.leer_numero(numero_entero)
+    if parte_decimal > 9:
+        resultado = '%s %s %s' % (resultado, decimal_word, module.leer_numero(parte_decimal))
+    elif parte_decimal > 0:
+        resultado = '%s %s cero %s' % (resultado, decimal_word, module.leer_numero(parte_decimal))
+    return resultado
+
+@pytest.mark.parametrize('module, decimal_word', [(cat_number_letter, 'coma'), (ladino_number_letter, 'punto')])
+def test_num_let_matches_recursive_spelling(module, decimal_word):
+    """Test table and composed number spellings match the recursive algorithm"""
+    numbers = list(range(-9, 30000))
+    numbers += list(range(30000, 10 ** 6, 41))
+    numbers += list(range(10 ** 6, 10 ** 9, 199999))
+    numbers += list(range(10 ** 9, 10 ** 12, 999983 * 101))
+    numbers += [n / 100 for n in range(-900, 100000, 7)]
+
+    mismatches = [n for n in numbers if module.num_let(n) != reference_num_let(module, n, decimal_word)]
+    assert not mismatches, mismatches[:10]
+    # Repeated numbers hit the bounded cache
+    assert module.num_let(12345678.5) == module.num_let(12345678.5)
+    assert module.num_let_cached.cache_info().maxsize == module.CACHE_SIZE
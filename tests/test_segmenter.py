@@ -0,0 +1,99 @@
+# tests/test_segmenter.py
+import numpy as np
+import pytest
+from utils.segmenter import split_chunks, split_sentences
+from utils.utils import parse_sents
+
+@pytest.mark.parametrize("lang, text, expected", [
+    ('ca', "El Sr. Puig viu a l'Av. Diagonal, núm. 5. Va néixer el 1950... Després, què? Res!",
+     ["El Sr. Puig viu a l'Av. Diagonal, núm. 5.", "Va néixer el 1950...", "Després, què?", "Res!"]),
+    ('gl', "A Dra. Castro atende na páx. 12. Chegou ás 8. Non hai máis.",
+     ["A Dra. Castro atende na páx. 12.", "Chegou ás 8.", "Non hai máis."]),
+    ('en', "Dr. Smith met J. R. R. Tolkien in the U.K. last year. It cost 3.5. Then he left.",
+     ["Dr. Smith met J. R. R. Tolkien in the U.K. last year.", "It cost 3.5.", "Then he left."]),
+    ('ca', "«Hola», va dir. Compra pomes, peres, etc. i se'n va. Fi",
+     ["«Hola», va dir.", "Compra pomes, peres, etc. i se'n va.", "Fi"]),
+    ('rmz', "আমি ভাত খাই। তুমি কী খাও?", ["আমি ভাত খাই।", "তুমি কী খাও?"]),
+])
+def test_split_sentences(lang, text, expected):
+    """Test sentences end at terminal punctuation but not after abbreviations, initials or before lowercase"""
+    assert split_sentences(text, lang) == expected
+
+@pytest.mark.parametrize("lang, text, expected", [
+    ('ca', "No en queda cap. Després vam marxar.", ["No en queda cap.", "Després vam marxar."]),
+    ('en', "The answer is no. Then we left.", ["The answer is no.", "Then we left."]),
+    ('xx', "The answer is no. Then we left.", ["The answer is no.", "Then we left."]),
+    ('ca', "Vegeu el cap. 3 del llibre. Després, l'art. 5.", ["Vegeu el cap. 3 del llibre.", "Després, l'art. 5."]),
+    ('en', "See no. 5 on page 3. Then we left.", ["See no. 5 on page 3.", "Then we left."]),
+])
+def test_ordinary_words_only_abbreviate_before_numbers(lang, text, expected):
+    """Test words that double as abbreviations ("cap", "no") end sentences unless a number follows"""
+    assert split_sentences(text, lang) == expected
+
+def test_abbreviations_are_per_language():
+    """Test an abbreviation of one language ends a sentence in another"""
+    text = "Es troba a la pl. Reial del barri."
+    assert split_sentences(text, 'ca') == ["Es troba a la pl. Reial del barri."]
+    assert split_sentences(text, 'en') == ["Es troba a la pl.", "Reial del barri."]
+
+def test_chunks_break_at_clause_punctuation_then_whitespace():
+    """Test long sentences are broken within the limit, at commas or dashes first and at spaces otherwise"""
+    text = ("Aquesta frase no té cap punt, i continua i continua amb moltes paraules; "
+            "després d'una pausa - segueix encara fins que s'acaba")
+    chunks = split_chunks(text, 50)
+    assert chunks == ["Aquesta frase no té cap punt,", "i continua i continua amb moltes paraules;",
+                      "després d'una pausa", "- segueix encara fins que s'acaba"]
+    assert all(len(chunk) <= 50 for chunk in chunks)
+
+    unpunctuated = ' '.join(['paraula'] * 100)
+    chunks = split_chunks(unpunctuated, 60)
+    assert all(len(chunk) <= 60 for chunk in chunks)
+    assert ' '.join(chunks) == unpunctuated
+
+def test_words_over_the_limit_are_cut():
+    """Test a single word longer than the limit is cut, and no limit keeps text whole"""
+    assert split_chunks('a' * 25, 10) == ['a' * 10, 'a' * 10, 'a' * 5]
+    assert split_chunks('a' * 25, 0) == ['a' * 25]
+    assert split_chunks('   ', 10) == []
+
+def test_parse_sents_bounds_every_chunk():
+    """Test unpunctuated text is returned as bounded chunks instead of one sentence"""
+    text = ' '.join(["hola què tal com va tot"] * 50) + ". Adéu."
+    sentences = parse_sents(text, lang='ca', max_chars=80)
+    assert len(sentences) > 10
+    assert all(len(sentence) <= 80 for sentence in sentences)
+    assert sentences[-1] == "Adéu."
+
+def test_long_synthesis_chunks_normalized_sentences(mock_loaded_models, monkeypatch):
+    """Test sentences expanded by normalization are broken again before inference"""
+    import server
+    inputs = []
+
+    class RecordingModel:
+        checkpoint_id = 'recording'
+        sample_rate = 22050
+
+        def synthesize_pcm_batch(self, texts):
+            inputs.extend(texts)
+            return [(np.zeros(10, dtype=np.int16), 22050) for _ in texts]
+
+    mock_loaded_models['test-mms']['model'] = RecordingModel()
+    mock_loaded_models['test-mms']['preprocessor'] = lambda text: text.replace('1', 'un milió, ') + ' fi.'
+    monkeypatch.setattr(server, 'synthesis_settings', {'batch_size': 8, 'max_chunk_chars': 40})
+    monkeypatch.setattr(server, 'audio_cache', server.AudioCache(memory_max_bytes=0))
+
+    server.long_synthesize(["Són 1 1 1 1 1 1 persones. Adéu."], 'test-mms')
+    assert len(inputs) > 2
+    assert all(len(text) <= 40 for text in inputs)
+
+def test_short_endpoint_chunks_long_text(test_client, monkeypatch):
+    """Test /api/short synthesizes texts over the limit in chunks joined with short pauses"""
+    import server
+    monkeypatch.setattr(server, 'synthesis_settings', {'batch_size': 8, 'max_chunk_chars': 30})
+    monkeypatch.setattr(server, 'audio_cache', server.AudioCache(memory_max_bytes=0))
+
+    response = test_client.post('/api/short', json={'text': "Una frase llarga, amb comes, que no acaba mai",
+                                                    'voice': 'test-mms', 'format': 'wav'})
+    assert response.status_code == 200
+    # Two chunks of 500 samples from the mock model, with a 200ms pause in between
+    assert len(response.get_data()) == 44 + 2 * (2 * 500 + 4410)
@@ -0,0 +1,120 @@
+# tests/test_warmup.py
+import json
+import numpy as np
+from utils.audio_cache import AudioCache
+from utils.warmup import WARMUP_SENTENCES, WarmUp
+
+def recording(calls, failing=()):
+    def synthesize(voice, sentences):
+        calls.append((voice, list(sentences)))
+        if voice in failing:
+            raise RuntimeError("broken voice")
+    return synthesize
+
+def test_run_synthesizes_sentences_of_each_language():
+    """Test each voice gets its language's sentences one by one and then as a batch, every round"""
+    warmup = WarmUp(rounds=2, sentences={'gl': ["Ola."]})
+    calls = []
+    status = warmup.run({'ca-voice': 'ca', 'gl-voice': 'gl'}, recording(calls))
+
+    ca = WARMUP_SENTENCES['ca']
+    assert calls[:len(ca) + 1] == [('ca-voice', [sentence]) for sentence in ca] + [('ca-voice', ca)]
+    assert calls.count(('ca-voice', ca)) == 2
+    assert calls[-2:] == [('gl-voice', ["Ola."]), ('gl-voice', ["Ola."])]
+    assert status['ready'] and warmup.ready
+    assert set(status['voices']) == {'ca-voice', 'gl-voice'}
+
+def test_failing_voice_does_not_block_readiness():
+    """Test a voice failing warm-up is reported, and the other voices are still warmed up"""
+    warmup = WarmUp()
+    calls = []
+    status = warmup.run({'broken': 'ca', 'fine': 'xx'}, recording(calls, failing={'broken'}))
+
+    assert status['ready']
+    assert status['voices']['broken']['error'] == "broken voice"
+    assert status['voices']['fine']['error'] is None
+    assert ('fine', WARMUP_SENTENCES['en']) in calls
+
+def test_start_runs_once_per_process():
+    """Test warm-up started in the background runs once, and a disabled warm-up is ready without running"""
+    warmup = WarmUp()
+    calls = []
+    assert not warmup.ready
+    warmup.start({'voice': 'en'}, recording(calls))
+    assert warmup.wait(5)
+    warmup.start({'voice': 'en'}, recording(calls))
+    assert len(calls) == len(WARMUP_SENTENCES['en']) + 1
+
+    disabled = WarmUp.from_config({'enabled': False})
+    disabled.start({'voice': 'en'}, recording(calls))
+    assert disabled.ready
+    assert len(calls) == len(WARMUP_SENTENCES['en']) + 1
+
+def test_readiness_endpoint(test_client, monkeypatch):
+    """Test the readiness probe answers 503 until warm-up has completed"""
+    import server
+    warmup = WarmUp()
+    monkeypatch.setattr(server, 'warmup', warmup)
+    monkeypatch.setattr(server, 'start_warmup', lambda background=True: None)
+
+    response = test_client.get('/api/ready')
+    assert response.status_code == 503
+    assert json.loads(response.data)['state'] == 'pending'
+
+    warmup.run({}, recording([]))
+    response = test_client.get('/api/ready')
+    assert response.status_code == 200
+    assert json.loads(response.data)['ready']
+
+def test_server_warm_up_skips_audio_cache(mock_loaded_models, monkeypatch):
+    """Test resident voices are warmed up through batched inference without filling the audio cache"""
+    import server
+    batches = []
+
+    class RecordingModel:
+        checkpoint_id = 'recording'
+        sample_rate = 22050
+
+        def synthesize_pcm_batch(self, texts):
+            batches.append(list(texts))
+            return [(np.zeros(100, dtype=np.int16), 22050) for _ in texts]
+
+    mock_loaded_models['test-coqui']['model'] = RecordingModel()
+    mock_loaded_models.pop('test-mms')
+    cache = AudioCache(memory_max_bytes=1024 * 1024)
+    monkeypatch.setattr(server, 'audio_cache', cache)
+    monkeypatch.setattr(server, 'warmup', WarmUp())
+
+    server.start_warmup(background=False)
+    assert server.warmup.ready
+    assert len(batches) == len(WARMUP_SENTENCES['en']) + 1
+    assert cache.stats['memory_items'] == 0
+
+def test_worker_startup_heartbeats_until_its_limit():
+    """Test gunicorn workers notify the master while warming up, up to the startup time limit"""
+    import importlib.util
+    import os
+    import time
+    spec = importlib.util.spec_from_file_location(
+        'gunicorn_conf', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'gunicorn.conf.py'))
+    gunicorn_conf = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(gunicorn_conf)
+
+    class Worker:
+        notified = 0
+
+        def notify(self):
+            self.notified += 1
+
+    worker = Worker()
+    with gunicorn_conf._heartbeat(worker, 0.01, 10):
+        time.sleep(0.2)
+    assert worker.notified >= 5
+    notified = worker.notified
+    time.sleep(0.05)
+    assert worker.notified == notified
+
+    stuck = Worker()
+    with gunicorn_conf._heartbeat(stuck, 0.01, 0.05):
+        time.sleep(0.3)
+    assert stuck.notified <= 6
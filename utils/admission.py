@@ -0,0 +1,143 @@
+# utils/admission.py
+import math
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+from utils.exceptions import ServiceOverloadedError
+
+# Weight of the latest request in the per voice average of seconds per character
+LATENCY_SMOOTHING = 0.2
+# Seconds per character assumed for voices without finished requests yet (about 1 s for a 50 character sentence)
+DEFAULT_SECONDS_PER_CHARACTER = 0.02
+
+class _VoiceState:
+    def __init__(self, max_concurrent: int, max_queued: int):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.running = 0
+        self.waiting = 0
+        self.waiting_characters = 0
+        self.seconds_per_character = None
+        self.rejected = 0
+        self.condition = threading.Condition()
+
+class AdmissionController:
+    """Per voice concurrency limits with bounded wait queues
+
+    Each voice runs at most `max_concurrent` syntheses at a time. Further
+    requests wait in line, up to `max_queued` of them, and requests beyond
+    that are rejected right away with an estimate of when to retry, based on
+    the characters waiting in line and the average time per character
+    observed for the voice. Latency is averaged per character so that short
+    sentences and whole documents give comparable estimates.
+    Limits are per process. A `max_concurrent` of 0 disables the limit.
+    """
+
+    def __init__(self, max_concurrent: int = 0, max_queued: int = 8, voices: Optional[Dict[str, dict]] = None):
+        """Initialize the controller
+
+        Args:
+            max_concurrent (int): Syntheses running at the same time per voice, 0 for no limit
+            max_queued (int): Requests waiting for a slot per voice
+            voices (dict): Per voice overrides of max_concurrent and max_queued
+        """
+        self.max_concurrent = max(0, int(max_concurrent))
+        self.max_queued = max(0, int(max_queued))
+        self.voices = voices or {}
+        self._lock = threading.Lock()
+        self._states: Dict[str, _VoiceState] = {}
+
+    @classmethod
+    def from_config(cls, settings: dict) -> 'AdmissionController':
+        """Create a controller from the `admission` config section"""
+        return cls(
+            max_concurrent=settings.get('max_concurrent', 0),
+            max_queued=settings.get('max_queued', 8),
+            voices=settings.get('voices')
+        )
+
+    def _state(self, voice: str) -> _VoiceState:
+        with self._lock:
+            state = self._states.get(voice)
+            if state is None:
+                overrides = self.voices.get(voice, {})
+                state = _VoiceState(
+                    max(0, int(overrides.get('max_concurrent', self.max_concurrent))),
+                    max(0, int(overrides.get('max_queued', self.max_queued)))
+                )
+                self._states[voice] = state
+            return state
+
+    @staticmethod
+    def _retry_after(state: _VoiceState, characters: int) -> int:
+        rate = state.seconds_per_character if state.seconds_per_character is not None else DEFAULT_SECONDS_PER_CHARACTER
+        # Requests ahead are served max_concurrent at a time
+        return max(1, math.ceil((state.waiting_characters + characters) * rate / max(1, state.max_concurrent)))
+
+    def acquire(self, voice: str, characters: int = 1) -> float:
+        """Wait for a synthesis slot of the voice
+
+        Args:
+            voice (str): Voice of the request
+            characters (int): Characters of text the request synthesizes
+
+        Returns:
+            float: Time the slot was obtained, to pass to `release`
+
+        Raises:
+            ServiceOverloadedError: If the wait queue of the voice is full
+        """
+        state = self._state(voice)
+        with state.condition:
+            if state.max_concurrent and state.running >= state.max_concurrent:
+                if state.waiting >= state.max_queued:
+                    state.rejected += 1
+                    raise ServiceOverloadedError(
+                        f"Voice {voice} is busy ({state.running} running, {state.waiting} waiting)",
+                        retry_after=self._retry_after(state, characters)
+                    )
+                state.waiting += 1
+                state.waiting_characters += characters
+                try:
+                    while state.running >= state.max_concurrent:
+                        state.condition.wait()
+                finally:
+                    state.waiting -= 1
+                    state.waiting_characters -= characters
+            state.running += 1
+        return time.perf_counter()
+
+    def release(self, voice: str, started: Optional[float] = None, characters: int = 1):
+        """Free a slot of the voice, recording the time per character of the request if its start time is given"""
+        state = self._state(voice)
+        with state.condition:
+            state.running -= 1
+            if started is not None:
+                rate = (time.perf_counter() - started) / max(1, characters)
+                state.seconds_per_character = rate if state.seconds_per_character is None else (
+                    LATENCY_SMOOTHING * rate + (1 - LATENCY_SMOOTHING) * state.seconds_per_character)
+            state.condition.notify()
+
+    @contextmanager
+    def slot(self, voice: str, characters: int = 1):
+        """Context holding a synthesis slot of the voice for a request of `characters` characters"""
+        started = self.acquire(voice, characters)
+        try:
+            yield
+        finally:
+            self.release(voice, started, characters)
+
+    @property
+    def waiting(self) -> int:
+        """Number of requests waiting for a slot, all voices together"""
+        with self._lock:
+            states = list(self._states.values())
+        return sum(state.waiting for state in states)
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            states = dict(self._states)
+        return {voice: {'running': state.running, 'waiting': state.waiting, 'rejected': state.rejected,
+                        'seconds_per_character': state.seconds_per_character} for voice, state in states.items()}
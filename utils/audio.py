@@ -0,0 +1,97 @@
+# utils/audio.py
+import io
+import wave
+from typing import List, Optional, Tuple
+import numpy as np
+
+SAMPLE_WIDTH = 2  # int16 PCM
+INT16_MAX = 32767
+
+def float_to_pcm16(wav, normalize: bool = False) -> np.ndarray:
+    """Convert a float waveform in [-1, 1] to int16 PCM
+
+    Args:
+        wav: Waveform as a numpy array, torch tensor or list of floats
+        normalize (bool): Scale the waveform to full range before conversion
+
+    Returns:
+        np.ndarray: Mono int16 PCM
+    """
+    if hasattr(wav, 'detach'):
+        wav = wav.detach().cpu().numpy()
+    wav = np.asarray(wav, dtype=np.float32).reshape(-1)
+    if normalize:
+        # Same peak normalization as Coqui's save_wav
+        peak = float(np.max(np.abs(wav))) if len(wav) else 0.0
+        wav = wav * (INT16_MAX / max(0.01, peak))
+    else:
+        wav = np.clip(wav, -1.0, 1.0) * INT16_MAX
+    return wav.astype(np.int16)
+
+def pcm_to_wav(pcm: np.ndarray, sample_rate: int) -> io.BytesIO:
+    """Encode mono int16 PCM as a WAV file in memory"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(SAMPLE_WIDTH)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(np.ascontiguousarray(pcm, dtype=np.int16).tobytes())
+    buffer.seek(0)
+    return buffer
+
+def silence_samples(duration_ms: int, sample_rate: int) -> int:
+    """Number of samples in a silence of the given duration"""
+    return int(sample_rate * duration_ms / 1000)
+
+class PCMAssembler:
+    """Collects int16 PCM chunks and silence spans and joins them in one copy
+
+    Chunks are only referenced until `assemble` is called, which allocates the
+    output buffer once with its final size and copies every chunk into place.
+    Silences are never materialized: they are the zero-filled gaps between
+    chunks in the preallocated buffer.
+    """
+
+    def __init__(self, sample_rate: int):
+        self.sample_rate = sample_rate
+        self._chunks: List[Tuple[int, np.ndarray]] = []  # (offset, samples)
+        self._num_samples = 0
+
+    def add_chunk(self, pcm: np.ndarray):
+        """Append a mono int16 PCM chunk"""
+        if pcm.dtype != np.int16:
+            raise ValueError(f"Expected int16 PCM, got {pcm.dtype}")
+        if len(pcm):
+            self._chunks.append((self._num_samples, pcm))
+            self._num_samples += len(pcm)
+
+    def add_silence(self, duration_ms: int):
+        """Append a silence span"""
+        self._num_samples += silence_samples(duration_ms, self.sample_rate)
+
+    @property
+    def num_samples(self) -> int:
+        return self._num_samples
+
+    @property
+    def duration(self) -> float:
+        """Duration of the assembled audio in seconds"""
+        return self._num_samples / self.sample_rate
+
+    def assemble(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Write all chunks into a single buffer and return it
+
+        Args:
+            out (np.ndarray): Optional preallocated int16 buffer of at least `num_samples` samples
+
+        Returns:
+            np.ndarray: int16 PCM of the whole audio
+        """
+        if out is None:
+            out = np.zeros(self._num_samples, dtype=np.int16)
+        else:
+            out = out[:self._num_samples]
+            out.fill(0)
+        for offset, pcm in self._chunks:
+            out[offset:offset + len(pcm)] = pcm
+        return out
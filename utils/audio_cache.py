@@ -0,0 +1,249 @@
+# utils/audio_cache.py
+import os
+import hashlib
+import logging
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DISK_CACHE_SUFFIX = '.audio'
+# Part of every key, so that entries written in an older value format are never read back
+CACHE_FORMAT = 'pcm16'
+# Share of the disk cap the disk tier is evicted down to, so that a full cache is rescanned once per fill cycle and
+# not on every write
+DISK_LOW_WATERMARK = 0.9
+
+class AudioCache:
+    """Two-tier cache of synthesized audio keyed by voice, checkpoint and text
+
+    Values are raw int16 PCM bytes.
+
+    The memory tier is an LRU bounded by total bytes. The optional disk tier
+    stores one file per entry under `disk_dir` and evicts the least recently
+    used files once `disk_max_bytes` is exceeded. Disk hits are promoted to
+    the memory tier.
+
+    The disk tier can be shared by several processes (gunicorn workers). Once
+    a process has written the headroom between the low watermark and the cap
+    since its last scan, or its count goes over the cap, it rescans the
+    directory and evicts the least recently used files (by modification time)
+    of all processes over `DISK_LOW_WATERMARK` of the cap. So the cap
+    applies to the directory as a whole, overshooting by at most the headroom
+    per process, and a full cache is rescanned once per fill of the headroom
+    rather than on every write.
+    """
+
+    def __init__(self, memory_max_bytes: int = 64 * 1024 * 1024,
+                 disk_dir: Optional[str] = None, disk_max_bytes: int = 0):
+        """Initialize the cache
+
+        Args:
+            memory_max_bytes (int): Size cap of the in-memory tier. 0 disables it.
+            disk_dir (str): Directory of the on-disk tier. None disables it.
+            disk_max_bytes (int): Size cap of the on-disk tier. 0 disables it.
+        """
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_dir = disk_dir if disk_dir and disk_max_bytes > 0 else None
+        self.disk_max_bytes = disk_max_bytes
+        self._disk_low_watermark = int(disk_max_bytes * DISK_LOW_WATERMARK)
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_index = OrderedDict()
+        self._disk_bytes = 0
+        self._disk_written = 0  # bytes written by this process since the last scan
+        self._scan_lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._scan_disk()
+            logger.info(f"Audio disk cache at {self.disk_dir}: {len(self._disk_index)} entries, "
+                        f"{self._disk_bytes} bytes")
+
+    @classmethod
+    def from_config(cls, settings: dict) -> 'AudioCache':
+        """Create a cache from the `audio_cache` config section"""
+        return cls(
+            memory_max_bytes=int(settings.get('memory_max_mb', 0) * 1024 * 1024),
+            disk_dir=settings.get('disk_dir'),
+            disk_max_bytes=int(settings.get('disk_max_mb', 0) * 1024 * 1024)
+        )
+
+    @staticmethod
+    def make_key(voice: str, checkpoint_id: str, text: str) -> str:
+        """Build the cache key of a synthesized sentence"""
+        digest = hashlib.sha256()
+        for part in (CACHE_FORMAT, voice, checkpoint_id or '', text):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\x00')
+        return digest.hexdigest()
+
+    @property
+    def enabled(self) -> bool:
+        return self.memory_max_bytes > 0 or self.disk_dir is not None
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached audio for key or None on a miss"""
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return value
+
+        value = self._disk_get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._memory_put(key, value)
+        return value
+
+    def put(self, key: str, value: bytes):
+        """Store audio for key in both tiers"""
+        with self._lock:
+            self._memory_put(key, value)
+        self._disk_put(key, value)
+
+    def clear(self):
+        """Drop all entries of the memory tier"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                'hits': hits,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': hits / lookups if lookups else 0.0,
+                'memory_items': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'disk_items': len(self._disk_index),
+                'disk_bytes': self._disk_bytes,
+            }
+
+    # Memory tier. Callers must hold the lock.
+    def _memory_put(self, key: str, value: bytes):
+        if len(value) > self.memory_max_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = value
+        self._memory_bytes += len(value)
+        while self._memory_bytes > self.memory_max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    # Disk tier
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], key + DISK_CACHE_SUFFIX)
+
+    def _scan_disk(self):
+        """Rebuild the disk index from the files in the directory, including other processes' entries, and evict"""
+        if not self._scan_lock.acquire(blocking=False):
+            return  # another thread is scanning
+        try:
+            entries = []
+            for root, _, files in os.walk(self.disk_dir):
+                for name in files:
+                    if not name.endswith(DISK_CACHE_SUFFIX):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime_ns, name[:-len(DISK_CACHE_SUFFIX)], stat.st_size))
+
+            with self._lock:
+                self._disk_index = OrderedDict((key, size) for _, key, size in sorted(entries))
+                self._disk_bytes = sum(self._disk_index.values())
+                self._disk_written = 0
+                self._disk_evict()
+        finally:
+            self._scan_lock.release()
+
+    @staticmethod
+    def _touch(path: str):
+        # Recency is the modification time, shared by all processes. Set precisely, as kernels may
+        # timestamp writes with a coarse clock
+        now = time.time_ns()
+        os.utime(path, ns=(now, now))
+
+    def _disk_get(self, key: str) -> Optional[bytes]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = f.read()
+            self._touch(path)
+        except OSError:
+            return None
+        with self._lock:
+            if key in self._disk_index:
+                self._disk_index.move_to_end(key)
+        return value
+
+    def _disk_put(self, key: str, value: bytes):
+        if not self.disk_dir or len(value) > self.disk_max_bytes:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary file first so concurrent readers never see partial entries
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        except OSError as e:
+            logger.warning(f"Couldn't write audio cache entry {key}: {e}")
+            return
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(value)
+            self._touch(tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Couldn't write audio cache entry {key}: {e}")
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            previous = self._disk_index.pop(key, None)
+            if previous is not None:
+                self._disk_bytes -= previous
+            self._disk_index[key] = len(value)
+            self._disk_bytes += len(value)
+            self._disk_written += len(value)
+            rescan = (self._disk_bytes > self.disk_max_bytes
+                      or self._disk_written >= self.disk_max_bytes - self._disk_low_watermark)
+        if rescan:
+            self._scan_disk()
+
+    # Callers must hold the lock
+    def _disk_evict(self):
+        while self._disk_bytes > self._disk_low_watermark and self._disk_index:
+            key, size = self._disk_index.popitem(last=False)
+            self._disk_bytes -= size
+            try:
+                os.unlink(self._disk_path(key))
+            except OSError:
+                pass
@@ -1,27 +1,156 @@
 # utils/backends/base.py
 from abc import ABC, abstractmethod
 import io
+import os
+import hashlib
+from typing import List, Tuple
+import numpy as np
+from utils.audio import pcm_to_wav
+from utils.exceptions import ConfigurationError
+
+# Config fields that identify the weights a model was loaded from
+CHECKPOINT_FIELDS = ['model_type', 'base_model_path', 'checkpoint_name', 'tts_model_path',
+                     'tts_config_path', 'vocoder_model_path', 'vocoder_config_path', 'onnx_model_path']
+
+# Values of the "quantize" model config field
+QUANTIZATION_MODES = ['int8']
 
 class TTSModelWrapper(ABC):
     """Base class for TTS model implementations"""
-    
+
     @abstractmethod
     def __init__(self, model_config: dict):
         """Initialize the model wrapper with config"""
         pass
-    
+
     @abstractmethod
     def load_model(self) -> bool:
         """Load the model into memory"""
         pass
-    
+
     @abstractmethod
-    def synthesize(self, text: str) -> io.BytesIO:
-        """Convert text to speech, return audio buffer"""
+    def synthesize_pcm(self, text: str) -> Tuple[np.ndarray, int]:
+        """Convert text to speech, return mono int16 PCM and its sample rate"""
         pass
-    
+
+    def synthesize_pcm_batch(self, texts: List[str]) -> List[Tuple[np.ndarray, int]]:
+        """Convert several texts to speech, return int16 PCM and sample rate per text
+
+        Backends that can run padded batches through their network override
+        this. The default synthesizes the texts one by one.
+        """
+        return [self.synthesize_pcm(text) for text in texts]
+
+    def synthesize(self, text: str) -> io.BytesIO:
+        """Convert text to speech, return WAV audio buffer"""
+        return pcm_to_wav(*self.synthesize_pcm(text))
+
+    def synthesize_batch(self, texts: List[str]) -> List[io.BytesIO]:
+        """Convert several texts to speech, return one WAV audio buffer per text"""
+        return [pcm_to_wav(pcm, rate) for pcm, rate in self.synthesize_pcm_batch(texts)]
+
     @property
     @abstractmethod
     def sample_rate(self) -> int:
         """Get model's output sample rate"""
-        pass
\ No newline at end of file
+        pass
+
+    def torch_modules(self) -> list:
+        """Get the torch modules holding the loaded weights"""
+        return []
+
+    def freeze(self):
+        """Put the loaded weights in inference mode
+
+        Modules are switched to eval mode and their parameters stop requiring
+        gradients, so inference never writes to the weights. Their memory pages
+        then stay shared between worker processes forked after loading.
+        """
+        for module in self.torch_modules():
+            module.eval()
+            for parameter in module.parameters():
+                parameter.requires_grad_(False)
+
+    def quantize(self, mode: str = 'int8'):
+        """Quantize the loaded weights for CPU inference
+
+        `int8` applies dynamic quantization to the linear layers: their weights
+        are stored as int8 and activations are quantized on the fly. Torch has
+        no dynamic quantization for convolutions, which stay in float.
+
+        Raises:
+            ConfigurationError: If the mode isn't supported
+        """
+        if mode not in QUANTIZATION_MODES:
+            raise ConfigurationError(f"Unknown quantization mode: {mode}")
+        import torch
+        for module in self.torch_modules():
+            torch.ao.quantization.quantize_dynamic(module, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+    def memory_footprint(self) -> int:
+        """Get the size in bytes of the loaded weights (parameters, buffers and quantized weights)"""
+        import torch
+        total = 0
+        seen = set()
+
+        def add(value):
+            nonlocal total
+            if isinstance(value, torch.Tensor):
+                # Tied weights appear under several names
+                key = (value.data_ptr(), value.numel()) if value.numel() else id(value)
+                if key not in seen:
+                    seen.add(key)
+                    total += value.numel() * value.element_size()
+            elif isinstance(value, (tuple, list)):
+                # Packed (weight, bias) of quantized layers
+                for item in value:
+                    add(item)
+
+        for module in self.torch_modules():
+            for value in module.state_dict().values():
+                add(value)
+        return total
+
+    def _checkpoint_paths(self) -> List[Tuple[str, str]]:
+        """Get the (config field, path on disk) pairs of the checkpoint fields set in the config"""
+        config = getattr(self, 'config', {}) or {}
+        models_root = getattr(self, 'models_root', '')
+        paths = []
+        for field in CHECKPOINT_FIELDS:
+            value = config.get(field)
+            if not value or field == 'model_type':
+                continue
+            if field == 'checkpoint_name' and config.get('base_model_path'):
+                # MMS checkpoints are named relative to the model directory
+                paths.append((field, os.path.join(models_root, config['base_model_path'], value)))
+            else:
+                paths.append((field, os.path.join(models_root, value)))
+        return paths
+
+    @property
+    def checkpoint_id(self) -> str:
+        """Get an identifier of the loaded weights
+
+        Built from the checkpoint fields and the quantization mode in the model
+        config, and the size and modification time of the checkpoint files
+        (every file under directories, such as MMS model directories), so
+        that replacing a checkpoint on disk yields a new identifier.
+        """
+        if getattr(self, '_checkpoint_id', None) is None:
+            config = getattr(self, 'config', {}) or {}
+            digest = hashlib.sha256()
+            for field in CHECKPOINT_FIELDS + ['quantize']:
+                if config.get(field):
+                    digest.update(f"{field}={config[field]};".encode('utf-8'))
+            for field, path in self._checkpoint_paths():
+                files = [path] if os.path.isfile(path) else []
+                if os.path.isdir(path):
+                    for directory, subdirectories, names in os.walk(path):
+                        subdirectories.sort()
+                        files.extend(os.path.join(directory, name) for name in sorted(names))
+                for file_path in files:
+                    stat = os.stat(file_path)
+                    name = os.path.relpath(file_path, path)
+                    digest.update(f"{field}:{name}={stat.st_size}:{stat.st_mtime_ns};".encode('utf-8'))
+            self._checkpoint_id = digest.hexdigest()[:16]
+        return self._checkpoint_id
@@ -1,10 +1,14 @@
 # utils/backends/coqui.py
-import io
 import os
 import logging
+from typing import List, Tuple
+import numpy as np
+import torch
 from TTS.utils.synthesizer import Synthesizer
+from TTS.tts.models.vits import Vits
 from .base import TTSModelWrapper
 from utils.exceptions import ModelLoadError, SynthesisError
+from utils.audio import float_to_pcm16
 
 class CoquiWrapper(TTSModelWrapper):
     """Wrapper for Coqui-TTS models"""
@@ -74,14 +78,14 @@ class CoquiWrapper(TTSModelWrapper):
             logging.error(error_msg)
             raise ModelLoadError(error_msg)
     
-    def synthesize(self, text: str) -> io.BytesIO:
+    def synthesize_pcm(self, text: str) -> Tuple[np.ndarray, int]:
         """Synthesize text to speech
         
         Args:
             text (str): Text to synthesize
             
         Returns:
-            io.BytesIO: WAV audio buffer
+            Tuple[np.ndarray, int]: int16 PCM and its sample rate
             
         Raises:
             SynthesisError: If synthesis fails
@@ -91,20 +95,80 @@ class CoquiWrapper(TTSModelWrapper):
                 raise SynthesisError("Synthesizer not initialized. Call load_model() first.")
             
             # Generate audio
-            wavs = self.synthesizer.tts(text)
+            with torch.inference_mode():
+                wavs = self.synthesizer.tts(text)
             
-            # Convert to WAV buffer
-            out = io.BytesIO()
-            self.synthesizer.save_wav(wavs, out)
-            out.seek(0)
-            
-            return out
+            return float_to_pcm16(wavs, normalize=True), self.sample_rate_val
             
         except Exception as e:
             error_msg = f"Failed to synthesize text with Coqui model: {str(e)}"
             logging.error(error_msg)
             raise SynthesisError(error_msg)
     
+    def synthesize_pcm_batch(self, texts: List[str]) -> List[Tuple[np.ndarray, int]]:
+        """Synthesize several texts, in a single forward pass where the model supports it
+
+        Single speaker VITS models without an external vocoder are run as one
+        padded batch. Other architectures fall back to one call per text.
+
+        Args:
+            texts (List[str]): Texts to synthesize
+
+        Returns:
+            List[Tuple[np.ndarray, int]]: int16 PCM and sample rate per text, in the same order as texts
+
+        Raises:
+            SynthesisError: If synthesis fails
+        """
+        if not self.supports_batching():
+            return super().synthesize_pcm_batch(texts)
+
+        try:
+            if not texts:
+                return []
+
+            tts_model = self.synthesizer.tts_model
+            device = next(tts_model.parameters()).device
+            token_ids = [tts_model.tokenizer.text_to_ids(text) for text in texts]
+            lengths = torch.tensor([len(ids) for ids in token_ids], dtype=torch.long, device=device)
+            padded = torch.zeros((len(texts), int(lengths.max())), dtype=torch.long, device=device)
+            for i, ids in enumerate(token_ids):
+                padded[i, :len(ids)] = torch.tensor(ids, dtype=torch.long, device=device)
+
+            with torch.inference_mode():
+                outputs = tts_model.inference(padded, aux_input={"x_lengths": lengths})
+
+            # y_mask marks the valid decoder frames of each item, the waveform has a fixed number of samples per frame
+            waveforms = outputs["model_outputs"].squeeze(1).cpu().numpy()
+            y_mask = outputs["y_mask"].squeeze(1)
+            samples_per_frame = waveforms.shape[-1] / y_mask.shape[-1]
+            frames = y_mask.sum(dim=-1).cpu().numpy()
+
+            return [
+                (float_to_pcm16(waveforms[i, :int(frames[i] * samples_per_frame)], normalize=True), self.sample_rate_val)
+                for i in range(len(texts))
+            ]
+
+        except Exception as e:
+            error_msg = f"Failed to synthesize batch with Coqui model: {str(e)}"
+            logging.error(error_msg)
+            raise SynthesisError(error_msg)
+
+    def supports_batching(self) -> bool:
+        """Check if the loaded model can synthesize padded batches"""
+        if not self.synthesizer:
+            return False
+        tts_model = self.synthesizer.tts_model
+        if not isinstance(tts_model, Vits) or self.synthesizer.vocoder_model is not None:
+            return False
+        args = tts_model.args
+        return not (args.use_speaker_embedding or args.use_d_vector_file or args.use_language_embedding)
+
+    def torch_modules(self) -> list:
+        """Get the torch modules holding the loaded weights"""
+        # The synthesizer is a torch module holding the TTS model and the vocoder
+        return [self.synthesizer] if self.synthesizer is not None else []
+
     @property
     def sample_rate(self) -> int:
         """Get the model's output sample rate
@@ -1,13 +1,13 @@
 # utils/backends/mms.py
-import io
 import logging
 import os
+from typing import List, Tuple
 from transformers import VitsModel, AutoTokenizer, pipeline
 import torch
 import numpy as np
-import scipy.io.wavfile
 from .base import TTSModelWrapper
 from utils.exceptions import ModelLoadError, SynthesisError
+from utils.audio import float_to_pcm16
 
 class MMSWrapper(TTSModelWrapper):
     """Wrapper for Massively Multilingual Speech (MMS) models from HuggingFace
@@ -28,6 +28,7 @@ class MMSWrapper(TTSModelWrapper):
         self.model = None
         self.tokenizer = None
         self.synthesizer = None
+        self.device = "cpu"
         self.sample_rate_val = 16000  # MMS models typically use 16kHz
         self.models_root = os.getenv('MODELS_ROOT', 'models')
         
@@ -74,6 +75,7 @@ class MMSWrapper(TTSModelWrapper):
             
             # Set up inference device
             device = "cuda" if self.config.get('use_cuda', False) and torch.cuda.is_available() else "cpu"
+            self.device = device
             logging.info(f"Setting up MMS pipeline on device: {device}")
             
             # Create inference pipeline
@@ -94,14 +96,14 @@ class MMSWrapper(TTSModelWrapper):
             logging.error(error_msg)
             raise ModelLoadError(error_msg)
     
-    def synthesize(self, text: str) -> io.BytesIO:
+    def synthesize_pcm(self, text: str) -> Tuple[np.ndarray, int]:
         """Synthesize text to speech using the MMS model
         
         Args:
             text (str): Text to synthesize
             
         Returns:
-            io.BytesIO: WAV audio buffer
+            Tuple[np.ndarray, int]: int16 PCM and its sample rate
             
         Raises:
             SynthesisError: If synthesis fails for any reason
@@ -112,29 +114,61 @@ class MMSWrapper(TTSModelWrapper):
             
             # Generate speech using the pipeline
             try:
-                output = self.synthesizer(text.strip())
+                with torch.inference_mode():
+                    output = self.synthesizer(text.strip())
             except Exception as e:
                 raise SynthesisError(f"Pipeline inference failed: {str(e)}")
             
-            # Convert to WAV format in memory
-            wav_buffer = io.BytesIO()
-            try:
-                scipy.io.wavfile.write(
-                    wav_buffer,
-                    rate=self.sample_rate_val,
-                    data=output["audio"][0]
-                )
-                wav_buffer.seek(0)
-            except Exception as e:
-                raise SynthesisError(f"Failed to convert audio to WAV format: {str(e)}")
-            
-            return wav_buffer
+            return float_to_pcm16(output["audio"][0]), self.sample_rate_val
             
         except Exception as e:
             error_msg = f"Failed to synthesize text with MMS model: {str(e)}"
             logging.error(error_msg)
             raise SynthesisError(error_msg)
     
+    def synthesize_pcm_batch(self, texts: List[str]) -> List[Tuple[np.ndarray, int]]:
+        """Synthesize several texts with a single padded forward pass
+
+        The texts are tokenized together with padding, and the attention mask
+        keeps padded positions out of the network. Each waveform is cut to
+        its own predicted length.
+
+        Args:
+            texts (List[str]): Texts to synthesize
+
+        Returns:
+            List[Tuple[np.ndarray, int]]: int16 PCM and sample rate per text, in the same order as texts
+
+        Raises:
+            SynthesisError: If synthesis fails for any reason
+        """
+        try:
+            if not self.synthesizer:
+                raise SynthesisError("Synthesizer not initialized. Call load_model() first.")
+            if not texts:
+                return []
+
+            try:
+                inputs = self.tokenizer([text.strip() for text in texts], padding=True, return_tensors="pt")
+                inputs = {k: v.to(self.device) for k, v in inputs.items()}
+                with torch.inference_mode():
+                    output = self.model(input_ids=inputs["input_ids"], attention_mask=inputs["attention_mask"])
+            except Exception as e:
+                raise SynthesisError(f"Batched inference failed: {str(e)}")
+
+            waveforms = output.waveform.cpu().float().numpy()
+            lengths = output.sequence_lengths.cpu().numpy()
+            return [(float_to_pcm16(waveforms[i, :lengths[i]]), self.sample_rate_val) for i in range(len(texts))]
+
+        except Exception as e:
+            error_msg = f"Failed to synthesize batch with MMS model: {str(e)}"
+            logging.error(error_msg)
+            raise SynthesisError(error_msg)
+
+    def torch_modules(self) -> list:
+        """Get the torch modules holding the loaded weights"""
+        return [self.model] if self.model is not None else []
+
     @property
     def sample_rate(self) -> int:
         """Get the model's output sample rate
@@ -0,0 +1,219 @@
+# utils/backends/onnx_runtime.py
+import os
+import json
+import logging
+import threading
+from typing import List, Tuple
+import numpy as np
+import onnxruntime
+from .base import TTSModelWrapper
+from utils.exceptions import ModelLoadError, SynthesisError
+from utils.audio import float_to_pcm16
+from utils.cpu_layout import intra_op_threads
+
+def onnx_metadata_path(onnx_path: str) -> str:
+    """Path of the metadata file written next to an exported model (tokenizer, sample rate, inputs)"""
+    return os.path.splitext(onnx_path)[0] + '.json'
+
+class VitsCharTokenizer:
+    """Character tokenizer of MMS VITS models, without transformers
+
+    Reproduces `VitsTokenizer` for models that don't phonemize or romanize
+    their input: text is lowercased (keeping vocabulary entries as they are),
+    characters outside the vocabulary are dropped, and a blank token is put
+    between characters when `add_blank` is set.
+    """
+
+    def __init__(self, vocab: dict, vocabulary_words: List[str], add_blank: bool = True, normalize: bool = True,
+                 language: str = None, unk_token: str = '<unk>'):
+        self.vocab = vocab
+        self.vocabulary_words = vocabulary_words
+        self.add_blank = add_blank
+        self.normalize = normalize
+        self.language = language
+        self.unk_id = vocab.get(unk_token)
+
+    @classmethod
+    def from_metadata(cls, metadata: dict) -> 'VitsCharTokenizer':
+        return cls(
+            vocab=metadata['vocab'],
+            vocabulary_words=metadata['vocabulary_words'],
+            add_blank=metadata['add_blank'],
+            normalize=metadata['normalize'],
+            language=metadata.get('language'),
+            unk_token=metadata.get('unk_token', '<unk>')
+        )
+
+    def normalize_text(self, text: str) -> str:
+        normalized = []
+        i = 0
+        while i < len(text):
+            for word in self.vocabulary_words:
+                if text.startswith(word, i):
+                    normalized.append(word)
+                    i += len(word)
+                    break
+            else:
+                normalized.append(text[i].lower())
+                i += 1
+        return ''.join(normalized)
+
+    def text_to_ids(self, text: str) -> List[int]:
+        if self.normalize:
+            text = self.normalize_text(text)
+        if self.language == 'ron':
+            text = text.replace("ț", "ţ")
+        if self.normalize:
+            text = ''.join(char for char in text if char in self.vocab).strip()
+
+        ids = [self.vocab.get(char, self.unk_id) for char in text]
+        if self.add_blank and ids:
+            interspersed = [0] * (len(ids) * 2 + 1)
+            interspersed[1::2] = ids
+            ids = interspersed
+        return ids
+
+class ONNXWrapper(TTSModelWrapper):
+    """Wrapper for VITS models exported to ONNX, run with ONNX Runtime
+
+    Models are exported with `python -m utils.onnx_export`, which writes the
+    `.onnx` graph and a metadata file next to it. MMS models are tokenized
+    without transformers. Coqui models use the Coqui tokenizer of their
+    training config.
+
+    ONNX Runtime thread pools don't survive a fork, so each process creates its
+    own inference session on first use. Sessions use the intra-op threads planned
+    for the worker (see utils/cpu_layout.py), so torch isn't needed to serve them.
+    """
+
+    def __init__(self, model_config: dict):
+        """Initialize the ONNX wrapper with config
+
+        Args:
+            model_config (dict): Configuration dictionary containing model paths and settings.
+                               Must include 'onnx_model_path'
+        """
+        self.config = model_config
+        self.metadata = None
+        self.tokenizer = None
+        self.sample_rate_val = None
+        self.models_root = os.getenv('MODELS_ROOT', 'models')
+        self.model_path = None
+        self._session = None
+        self._session_pid = None
+        self._session_lock = threading.Lock()
+
+    def load_model(self) -> bool:
+        """Load the exported model and its tokenizer
+
+        Returns:
+            bool: True if model loaded successfully
+
+        Raises:
+            ModelLoadError: If model loading fails
+        """
+        try:
+            self.model_path = os.path.join(self.models_root, self.config['onnx_model_path'])
+            metadata_path = onnx_metadata_path(self.model_path)
+            if not os.path.exists(self.model_path):
+                raise ModelLoadError(f"ONNX model not found at {self.model_path}")
+            if not os.path.exists(metadata_path):
+                raise ModelLoadError(f"ONNX model metadata not found at {metadata_path}")
+
+            with open(metadata_path, encoding='utf-8') as f:
+                self.metadata = json.load(f)
+
+            logging.info(f"Loading ONNX model {self.config.get('voice')} ({self.metadata['source']}) "
+                         f"from {self.model_path}")
+            if self.metadata['source'] == 'mms':
+                self.tokenizer = VitsCharTokenizer.from_metadata(self.metadata['tokenizer'])
+            elif self.metadata['source'] == 'coqui':
+                from TTS.config import load_config
+                from TTS.tts.utils.text.tokenizer import TTSTokenizer
+                tts_config = load_config(os.path.join(os.path.dirname(self.model_path), self.metadata['tts_config']))
+                self.tokenizer, _ = TTSTokenizer.init_from_config(tts_config)
+            else:
+                raise ModelLoadError(f"Unknown ONNX model source: {self.metadata['source']}")
+
+            self.sample_rate_val = self.metadata['sample_rate']
+            # Fails early on a broken graph
+            self._get_session()
+            return True
+
+        except Exception as e:
+            error_msg = f"Failed to load ONNX model: {str(e)}"
+            logging.error(error_msg)
+            raise ModelLoadError(error_msg)
+
+    def _get_session(self) -> onnxruntime.InferenceSession:
+        with self._session_lock:
+            if self._session is None or self._session_pid != os.getpid():
+                options = onnxruntime.SessionOptions()
+                options.intra_op_num_threads = intra_op_threads()
+                options.inter_op_num_threads = 1
+                providers = ['CPUExecutionProvider']
+                if self.config.get('use_cuda', False) and 'CUDAExecutionProvider' in onnxruntime.get_available_providers():
+                    providers.insert(0, 'CUDAExecutionProvider')
+                self._session = onnxruntime.InferenceSession(self.model_path, options, providers=providers)
+                self._session_pid = os.getpid()
+            return self._session
+
+    def synthesize_pcm(self, text: str) -> Tuple[np.ndarray, int]:
+        """Synthesize text to speech
+
+        Args:
+            text (str): Text to synthesize
+
+        Returns:
+            Tuple[np.ndarray, int]: int16 PCM and its sample rate
+
+        Raises:
+            SynthesisError: If synthesis fails
+        """
+        try:
+            if self.tokenizer is None:
+                raise SynthesisError("Model not initialized. Call load_model() first.")
+
+            ids = np.array([self.tokenizer.text_to_ids(text.strip())], dtype=np.int64)
+            if not ids.size:
+                raise SynthesisError(f"Nothing to synthesize in |{text}|")
+
+            session = self._get_session()
+            if self.metadata['source'] == 'mms':
+                waveform = session.run(['waveform'], {
+                    'input_ids': ids,
+                    'attention_mask': np.ones_like(ids)
+                })[0][0]
+                return float_to_pcm16(waveform), self.sample_rate_val
+
+            waveform = session.run(['output'], {
+                'input': ids,
+                'input_lengths': np.array([ids.shape[1]], dtype=np.int64),
+                'scales': np.array(self.metadata['scales'], dtype=np.float32)
+            })[0][0, 0]
+            return float_to_pcm16(waveform, normalize=True), self.sample_rate_val
+
+        except Exception as e:
+            error_msg = f"Failed to synthesize text with ONNX model: {str(e)}"
+            logging.error(error_msg)
+            raise SynthesisError(error_msg)
+
+    def memory_footprint(self) -> int:
+        """Get the size in bytes of the exported graph and weights"""
+        if self.model_path and os.path.isfile(self.model_path):
+            return os.path.getsize(self.model_path)
+        return 0
+
+    @property
+    def sample_rate(self) -> int:
+        """Get the model's output sample rate
+
+        Returns:
+            int: Sample rate in Hz
+
+        Raises:
+            ModelLoadError: If model not loaded
+        """
+        if self.sample_rate_val is None:
+            raise ModelLoadError("Model not loaded. Call load_model() first.")
+        return self.sample_rate_val
@@ -0,0 +1,137 @@
+# utils/batching.py
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, Hashable, List
+
+class _Batch:
+    def __init__(self):
+        self.items: List[Any] = []
+        self.results = None
+        self.errors = None
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+class MicroBatcher:
+    """Groups concurrent requests for the same key (voice) into one batched call
+
+    The first request of a batch leads it: it waits up to `window_ms` for
+    other requests with the same key to join, or until `max_batch_size` items
+    are collected, then runs the batch function on all items in its own thread
+    and hands each waiting request its result. No background threads are
+    involved.
+
+    A leader only waits when another request with the same key is already in
+    progress, so that a lone request doesn't pay the window latency.
+
+    If the batch function fails on a batch of several items, they are run
+    again one at a time, so that only the request whose item fails gets the
+    error.
+    """
+
+    def __init__(self, window_ms: float = 0, max_batch_size: int = 8):
+        """Initialize the batcher
+
+        Args:
+            window_ms (float): Time a batch stays open for requests to join. 0 disables batching.
+            max_batch_size (int): Number of items closing a batch before the window ends
+        """
+        self.window = max(0.0, float(window_ms)) / 1000
+        self.max_batch_size = max(1, int(max_batch_size))
+
+        self._lock = threading.Lock()
+        self._open: Dict[Hashable, _Batch] = {}
+        self._active = Counter()
+        self.batches = 0
+        self.items = 0
+
+    @classmethod
+    def from_config(cls, settings: dict) -> 'MicroBatcher':
+        """Create a batcher from the `synthesis` config section"""
+        return cls(
+            window_ms=settings.get('micro_batch_window_ms', 0),
+            max_batch_size=settings.get('micro_batch_max_size', 8)
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0 and self.max_batch_size > 1
+
+    def submit(self, key: Hashable, item: Any, run_batch: Callable[[List[Any]], List[Any]]) -> Any:
+        """Run an item in a batch with other concurrent items of the same key
+
+        Args:
+            key: Items are only batched with items of the same key
+            item: Input of the batch function
+            run_batch: Function mapping a list of items to the list of their results, run once per batch
+
+        Returns:
+            The result for the item
+
+        Raises:
+            Exception: Whatever run_batch raised for the item when run on its own
+        """
+        with self._lock:
+            self._active[key] += 1
+            batch = self._open.get(key)
+            leader = batch is None
+            if leader:
+                batch = _Batch()
+                self._open[key] = batch
+            index = len(batch.items)
+            batch.items.append(item)
+            if len(batch.items) >= self.max_batch_size:
+                batch.full.set()
+                del self._open[key]
+            wait = leader and self._active[key] > 1
+
+        try:
+            if not leader:
+                batch.done.wait()
+            else:
+                if wait:
+                    batch.full.wait(self.window)
+                with self._lock:
+                    if self._open.get(key) is batch:
+                        del self._open[key]
+                    self.batches += 1
+                    self.items += len(batch.items)
+                try:
+                    self._run(batch, run_batch)
+                finally:
+                    batch.done.set()
+        finally:
+            with self._lock:
+                self._active[key] -= 1
+                if not self._active[key]:
+                    del self._active[key]
+
+        if batch.errors[index] is not None:
+            raise batch.errors[index]
+        return batch.results[index]
+
+    @staticmethod
+    def _run(batch: _Batch, run_batch: Callable[[List[Any]], List[Any]]):
+        count = len(batch.items)
+        batch.results, batch.errors = [None] * count, [None] * count
+        try:
+            batch.results = list(run_batch(batch.items))
+            return
+        except Exception as e:
+            if count == 1:
+                batch.errors[0] = e
+                return
+        # Isolates the failing items
+        for i, item in enumerate(batch.items):
+            try:
+                batch.results[i] = run_batch([item])[0]
+            except Exception as e:
+                batch.errors[i] = e
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'batches': self.batches,
+                'items': self.items,
+                'mean_batch_size': self.items / self.batches if self.batches else 0.0
+            }
@@ -5,6 +5,69 @@ import os
 import json
 from utils.exceptions import ConfigurationError
 
+DEFAULT_AUDIO_CACHE = {
+    'memory_max_mb': 64,
+    'disk_dir': None,
+    'disk_max_mb': 0
+}
+
+DEFAULT_PREPROCESSOR_CACHE = {
+    'max_entries': 10000,
+    'max_text_length': 1000
+}
+
+DEFAULT_SYNTHESIS = {
+    'batch_size': 8,
+    'micro_batch_window_ms': 0,
+    'micro_batch_max_size': 8,
+    'max_chunk_chars': 300
+}
+
+DEFAULT_MODEL_LOADING = {
+    'workers': 4
+}
+
+DEFAULT_JOBS = {
+    'workers': 2,
+    'max_queued': 32,
+    'dir': None,
+    'ttl_seconds': 3600
+}
+
+DEFAULT_ADMISSION = {
+    'max_concurrent': 0,
+    'max_queued': 8,
+    'voices': {}
+}
+
+DEFAULT_THREADING = {
+    'intra_op_threads': 0,
+    'inter_op_threads': 0,
+    'pin_cpus': False
+}
+
+DEFAULT_WARMUP = {
+    'enabled': True,
+    'rounds': 1,
+    'sentences': {}
+}
+
+DEFAULT_ADMIN = {
+    'token': None
+}
+
+DEFAULT_INFERENCE_WORKERS = {
+    'enabled': False,
+    'processes': 2,
+    'max_clients': 16,
+    'timeout_seconds': 300
+}
+
+DEFAULT_LAZY_LOADING = {
+    'enabled': False,
+    'memory_budget_mb': 0
+}
+
 @dataclass
 class ModelConfig:
     voice: str
@@ -15,9 +78,11 @@ class ModelConfig:
     tts_model_path: Optional[str] = None
     vocoder_config_path: Optional[str] = None
     vocoder_model_path: Optional[str] = None
+    onnx_model_path: Optional[str] = None
     checkpoint_name: Optional[str] = None
     load: bool = False
     use_cuda: bool = False
+    quantize: Optional[str] = None
 
     @classmethod
     def from_dict(cls, data: dict) -> 'ModelConfig':
@@ -53,6 +118,87 @@ class ConfigManager:
         if 'MODELS_ROOT' in os.environ:
             self._config['models_root'] = os.environ['MODELS_ROOT']
 
+        # Audio cache overrides
+        cache_config = self._config.setdefault('audio_cache', {})
+        if 'TTS_CACHE_MEMORY_MB' in os.environ:
+            cache_config['memory_max_mb'] = float(os.environ['TTS_CACHE_MEMORY_MB'])
+        if 'TTS_CACHE_DIR' in os.environ:
+            cache_config['disk_dir'] = os.environ['TTS_CACHE_DIR'] or None
+        if 'TTS_CACHE_DISK_MB' in os.environ:
+            cache_config['disk_max_mb'] = float(os.environ['TTS_CACHE_DISK_MB'])
+
+        # Preprocessor cache overrides
+        preprocessor_cache_config = self._config.setdefault('preprocessor_cache', {})
+        if 'TTS_PREPROCESSOR_CACHE_ENTRIES' in os.environ:
+            preprocessor_cache_config['max_entries'] = int(os.environ['TTS_PREPROCESSOR_CACHE_ENTRIES'])
+
+        # Synthesis overrides
+        synthesis_config = self._config.setdefault('synthesis', {})
+        if 'TTS_BATCH_SIZE' in os.environ:
+            synthesis_config['batch_size'] = int(os.environ['TTS_BATCH_SIZE'])
+        if 'TTS_MICRO_BATCH_WINDOW_MS' in os.environ:
+            synthesis_config['micro_batch_window_ms'] = float(os.environ['TTS_MICRO_BATCH_WINDOW_MS'])
+        if 'TTS_MICRO_BATCH_MAX_SIZE' in os.environ:
+            synthesis_config['micro_batch_max_size'] = int(os.environ['TTS_MICRO_BATCH_MAX_SIZE'])
+        if 'TTS_MAX_CHUNK_CHARS' in os.environ:
+            synthesis_config['max_chunk_chars'] = int(os.environ['TTS_MAX_CHUNK_CHARS'])
+
+        # Startup loading overrides
+        loading_config = self._config.setdefault('model_loading', {})
+        if 'TTS_LOAD_WORKERS' in os.environ:
+            loading_config['workers'] = int(os.environ['TTS_LOAD_WORKERS'])
+
+        # Job queue overrides
+        jobs_config = self._config.setdefault('jobs', {})
+        if 'TTS_JOB_WORKERS' in os.environ:
+            jobs_config['workers'] = int(os.environ['TTS_JOB_WORKERS'])
+        if 'TTS_JOB_QUEUE' in os.environ:
+            jobs_config['max_queued'] = int(os.environ['TTS_JOB_QUEUE'])
+        if 'TTS_JOB_DIR' in os.environ:
+            jobs_config['dir'] = os.environ['TTS_JOB_DIR'] or None
+
+        # Admission control overrides
+        admission_config = self._config.setdefault('admission', {})
+        if 'TTS_MAX_CONCURRENT' in os.environ:
+            admission_config['max_concurrent'] = int(os.environ['TTS_MAX_CONCURRENT'])
+        if 'TTS_MAX_QUEUED' in os.environ:
+            admission_config['max_queued'] = int(os.environ['TTS_MAX_QUEUED'])
+
+        # Lazy loading overrides
+        lazy_config = self._config.setdefault('lazy_loading', {})
+        if 'TTS_LAZY_LOADING' in os.environ:
+            lazy_config['enabled'] = os.environ['TTS_LAZY_LOADING'] == '1'
+        if 'TTS_MEMORY_BUDGET_MB' in os.environ:
+            lazy_config['memory_budget_mb'] = float(os.environ['TTS_MEMORY_BUDGET_MB'])
+
+        # Torch threading overrides
+        threading_config = self._config.setdefault('threading', {})
+        if 'TTS_INTRA_OP_THREADS' in os.environ:
+            threading_config['intra_op_threads'] = int(os.environ['TTS_INTRA_OP_THREADS'])
+        if 'TTS_INTER_OP_THREADS' in os.environ:
+            threading_config['inter_op_threads'] = int(os.environ['TTS_INTER_OP_THREADS'])
+        if 'TTS_PIN_CPUS' in os.environ:
+            threading_config['pin_cpus'] = os.environ['TTS_PIN_CPUS'] == '1'
+
+        # Warm-up overrides
+        warmup_config = self._config.setdefault('warmup', {})
+        if 'TTS_WARMUP' in os.environ:
+            warmup_config['enabled'] = os.environ['TTS_WARMUP'] == '1'
+        if 'TTS_WARMUP_ROUNDS' in os.environ:
+            warmup_config['rounds'] = int(os.environ['TTS_WARMUP_ROUNDS'])
+
+        # Inference worker overrides
+        inference_config = self._config.setdefault('inference_workers', {})
+        if 'TTS_INFERENCE_WORKERS' in os.environ:
+            inference_config['enabled'] = os.environ['TTS_INFERENCE_WORKERS'] == '1'
+        if 'TTS_INFERENCE_PROCESSES' in os.environ:
+            inference_config['processes'] = int(os.environ['TTS_INFERENCE_PROCESSES'])
+
+        # Admin endpoint overrides
+        admin_config = self._config.setdefault('admin', {})
+        if 'TTS_ADMIN_TOKEN' in os.environ:
+            admin_config['token'] = os.environ['TTS_ADMIN_TOKEN'] or None
+
     def _validate(self):
         """Validate the loaded configuration"""
         if 'languages' not in self._config:
@@ -75,6 +221,61 @@ class ConfigManager:
         """Get models root directory"""
         return self._config.get('models_root', 'models')
 
+    @property
+    def audio_cache(self) -> Dict[str, Any]:
+        """Get synthesized audio cache settings"""
+        return {**DEFAULT_AUDIO_CACHE, **self._config.get('audio_cache', {})}
+
+    @property
+    def preprocessor_cache(self) -> Dict[str, Any]:
+        """Get preprocessor output cache settings"""
+        return {**DEFAULT_PREPROCESSOR_CACHE, **self._config.get('preprocessor_cache', {})}
+
+    @property
+    def synthesis(self) -> Dict[str, Any]:
+        """Get synthesis pipeline settings"""
+        return {**DEFAULT_SYNTHESIS, **self._config.get('synthesis', {})}
+
+    @property
+    def model_loading(self) -> Dict[str, Any]:
+        """Get startup model loading settings"""
+        return {**DEFAULT_MODEL_LOADING, **self._config.get('model_loading', {})}
+
+    @property
+    def jobs(self) -> Dict[str, Any]:
+        """Get asynchronous job settings"""
+        return {**DEFAULT_JOBS, **self._config.get('jobs', {})}
+
+    @property
+    def admission(self) -> Dict[str, Any]:
+        """Get per voice admission control settings"""
+        return {**DEFAULT_ADMISSION, **self._config.get('admission', {})}
+
+    @property
+    def lazy_loading(self) -> Dict[str, Any]:
+        """Get on demand model loading settings"""
+        return {**DEFAULT_LAZY_LOADING, **self._config.get('lazy_loading', {})}
+
+    @property
+    def threading(self) -> Dict[str, Any]:
+        """Get torch threading and CPU pinning settings of each worker"""
+        return {**DEFAULT_THREADING, **self._config.get('threading', {})}
+
+    @property
+    def warmup(self) -> Dict[str, Any]:
+        """Get warm-up settings of each worker"""
+        return {**DEFAULT_WARMUP, **self._config.get('warmup', {})}
+
+    @property
+    def inference_workers(self) -> Dict[str, Any]:
+        """Get settings of the processes running inference for the web workers"""
+        return {**DEFAULT_INFERENCE_WORKERS, **self._config.get('inference_workers', {})}
+
+    @property
+    def admin(self) -> Dict[str, Any]:
+        """Get admin endpoint settings"""
+        return {**DEFAULT_ADMIN, **self._config.get('admin', {})}
+
     def use_cuda(self) -> bool:
         """Get CUDA setting"""
         env_cuda = os.getenv('USE_CUDA', '0')
@@ -0,0 +1,107 @@
+# utils/config_reload.py
+import os
+import time
+import signal
+import logging
+import threading
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+class ConfigReloader:
+    """Runs config reloads on a background thread, one at a time
+
+    A reload requested while another one is running runs once that one is
+    done, so the last change to the config is always picked up. Reloads are
+    triggered by the admin endpoint, or by SIGHUP once `install_signal_handler`
+    has been called in the worker process.
+    """
+
+    def __init__(self, reload: Callable[[], dict]):
+        """Initialize the reloader
+
+        Args:
+            reload: Function reloading the config, returns a report of what changed
+        """
+        self.reload = reload
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pending = False
+        self._state = 'idle'
+        self._reloads = 0
+        self._last = None
+        self._error = None
+
+    def trigger(self) -> bool:
+        """Start a reload in the background
+
+        Returns:
+            bool: True if it started now, False if it runs after the one in progress
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                self._pending = True
+                return False
+            self._state = 'running'
+            self._thread = threading.Thread(target=self._run, name='config-reload', daemon=True)
+            self._thread.start()
+            return True
+
+    def _run(self):
+        while True:
+            start = time.perf_counter()
+            try:
+                report = self.reload()
+                error = None
+            except Exception as e:
+                logger.error(f"Config reload failed: {str(e)}")
+                report, error = None, str(e)
+            with self._lock:
+                self._reloads += 1
+                self._last = report if report is None else {**report, 'seconds': round(time.perf_counter() - start, 3)}
+                self._error = error
+                if not self._pending:
+                    self._state = 'idle'
+                    return
+                self._pending = False
+
+    def wait(self, timeout: float = None):
+        """Wait for the reload in progress, if any"""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def install_signal_handler(self, signum: int = signal.SIGHUP):
+        """Trigger a reload when the process gets `signum`. Must be called from the main thread"""
+        signal.signal(signum, lambda *_: self.trigger())
+
+    @property
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                'state': self._state,
+                'reloads': self._reloads,
+                'last': self._last,
+                'error': self._error
+            }
+
+def sibling_pids() -> List[int]:
+    """Other children of the parent process, i.e. the other gunicorn workers. Empty where /proc isn't available"""
+    parent, own = os.getppid(), os.getpid()
+    pids = []
+    try:
+        names = os.listdir('/proc')
+    except OSError:
+        return pids
+    for name in names:
+        if not name.isdigit() or int(name) == own:
+            continue
+        try:
+            with open(f'/proc/{name}/stat') as f:
+                # The command name may contain spaces, fields after it are space separated
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        if ppid == parent:
+            pids.append(int(name))
+    return pids
@@ -4,7 +4,8 @@ from .exceptions import ConfigurationError
 
 REQUIRED_MODEL_FIELDS = {
     'coqui': ['voice', 'lang', 'model_type', 'tts_config_path', 'tts_model_path'],
-    'mms': ['voice', 'lang', 'model_type', 'base_model_path']
+    'mms': ['voice', 'lang', 'model_type', 'base_model_path'],
+    'onnx': ['voice', 'lang', 'model_type', 'onnx_model_path']
 }
 
 # Optional fields that should have specific types if present
@@ -12,11 +13,18 @@ OPTIONAL_FIELD_TYPES = {
     'mms': {
         'checkpoint_name': str,
         'use_cuda': bool,
-        'load': bool
+        'load': bool,
+        'quantize': str
     },
     'coqui': {
         'vocoder_config_path': str,
         'vocoder_model_path': str,
+        'preprocessor': str,
+        'use_cuda': bool,
+        'load': bool,
+        'quantize': str
+    },
+    'onnx': {
         'preprocessor': str,
         'use_cuda': bool,
         'load': bool
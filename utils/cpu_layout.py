@@ -0,0 +1,103 @@
+# utils/cpu_layout.py
+import os
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Layout applied to this process by apply_layout
+_applied_layout = None
+
+def available_cpus() -> List[int]:
+    """CPUs the process may run on, honouring affinity masks and container cpusets"""
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return list(range(os.cpu_count() or 1))
+
+def plan_layout(settings: dict, workers: int = 1, slot: int = 0, cpus: Optional[List[int]] = None) -> dict:
+    """Work out the torch threads and CPUs of one worker process
+
+    The CPUs are divided evenly between workers: worker `slot` gets its own
+    share, and by default as many intra-op threads as CPUs in its share and
+    one inter-op thread. When the CPUs don't divide evenly, the first workers
+    get one more. With more workers than CPUs, shares wrap around.
+
+    Args:
+        settings (dict): The `threading` config section. Thread counts of 0 are worked out from the CPUs.
+        workers (int): Number of worker processes sharing the CPUs
+        slot (int): Index of this worker, from 0 to workers - 1
+        cpus (list): CPUs to divide, those available to the process by default
+
+    Returns:
+        dict: intra_op_threads, inter_op_threads, cpus of the worker, and pin (whether to pin it to them)
+    """
+    cpus = cpus or available_cpus()
+    workers = max(1, int(workers))
+    if workers > len(cpus):
+        share = [cpus[slot % len(cpus)]]
+    else:
+        # The CPUs left over by an uneven split go to the first workers, one each
+        per_worker, extra = divmod(len(cpus), workers)
+        index = slot % workers
+        start = index * per_worker + min(index, extra)
+        share = cpus[start:start + per_worker + (1 if index < extra else 0)]
+
+    return {
+        'workers': workers,
+        'slot': slot,
+        'cpus': share,
+        'pin': bool(settings.get('pin_cpus')),
+        'intra_op_threads': int(settings.get('intra_op_threads') or 0) or len(share),
+        'inter_op_threads': int(settings.get('inter_op_threads') or 0) or 1
+    }
+
+def apply_layout(layout: dict) -> dict:
+    """Set the torch thread counts and CPU affinity of the calling process, and log the effective layout
+
+    Returns:
+        dict: The layout, with the thread counts torch ended up with
+    """
+    global _applied_layout
+    import torch
+    if layout['pin']:
+        try:
+            os.sched_setaffinity(0, layout['cpus'])
+        except (AttributeError, OSError) as e:
+            logger.warning(f"Couldn't pin worker to CPUs {layout['cpus']}: {str(e)}")
+
+    torch.set_num_threads(layout['intra_op_threads'])
+    try:
+        torch.set_num_interop_threads(layout['inter_op_threads'])
+    except RuntimeError as e:
+        # Only possible before the first inter-op parallel work, e.g. not after models ran in a preloading master
+        logger.warning(f"Couldn't set inter-op threads: {str(e)}")
+
+    effective = {
+        **layout,
+        'intra_op_threads': torch.get_num_threads(),
+        'inter_op_threads': torch.get_num_interop_threads()
+    }
+    logger.info(f"Worker {layout['slot'] + 1}/{layout['workers']} (pid {os.getpid()}): "
+                f"{effective['intra_op_threads']} intra-op and {effective['inter_op_threads']} inter-op threads, "
+                + (f"pinned to CPUs {format_cpus(available_cpus())}" if layout['pin']
+                   else f"CPU share {format_cpus(layout['cpus'])} (not pinned)"))
+    _applied_layout = effective
+    return effective
+
+def intra_op_threads() -> int:
+    """Intra-op threads of the calling process: those of the layout applied to it, else
+    `TTS_INTRA_OP_THREADS` or one per available CPU"""
+    if _applied_layout:
+        return _applied_layout['intra_op_threads']
+    return int(os.getenv('TTS_INTRA_OP_THREADS') or 0) or len(available_cpus())
+
+def format_cpus(cpus: List[int]) -> str:
+    """Format a CPU list as ranges, e.g. 0-3,8"""
+    ranges = []
+    for cpu in sorted(cpus):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ','.join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
@@ -0,0 +1,213 @@
+# utils/encoder.py
+import os
+import queue
+import struct
+import threading
+import subprocess
+from io import BytesIO
+from typing import List, Optional
+import numpy as np
+import soundfile
+from utils.audio import SAMPLE_WIDTH, pcm_to_wav
+from utils.exceptions import EncodingError
+
+FFMPEG_BINARY = os.getenv('FFMPEG_BINARY', 'ffmpeg')
+# Opus bitrate for speech, the same whether ffmpeg or libsndfile encodes
+OPUS_BITRATE = 32000
+# libsndfile maps its compression level linearly onto these Opus bitrates, from level 0 to level 1
+LIBSNDFILE_OPUS_BITRATES = (256000, 6000)
+
+def _opus_compression_level(bitrate: int) -> float:
+    """libsndfile compression level giving an Opus bitrate"""
+    highest, lowest = LIBSNDFILE_OPUS_BITRATES
+    return min(1.0, max(0.0, (highest - bitrate) / (highest - lowest)))
+
+# Output formats: mimetype, file extension, ffmpeg output arguments (None for formats encoded in process),
+# and the libsndfile format, subtype, sample rates and write options used to encode whole files in process
+AUDIO_FORMATS = {
+    'mp3': {'mimetype': 'audio/mpeg', 'extension': 'mp3',
+            'ffmpeg_args': ['-c:a', 'libmp3lame', '-write_xing', '0', '-id3v2_version', '0', '-f', 'mp3'],
+            'soundfile': ('MP3', 'MPEG_LAYER_III'), 'soundfile_rates': None, 'soundfile_options': {}},
+    'ogg': {'mimetype': 'audio/ogg', 'extension': 'ogg',
+            'ffmpeg_args': ['-c:a', 'libopus', '-b:a', f'{OPUS_BITRATE // 1000}k', '-application', 'voip', '-f', 'ogg'],
+            'soundfile': ('OGG', 'OPUS'), 'soundfile_rates': {8000, 12000, 16000, 24000, 48000},
+            'soundfile_options': {'compression_level': _opus_compression_level(OPUS_BITRATE)}},
+    'wav': {'mimetype': 'audio/wav', 'extension': 'wav', 'ffmpeg_args': None},
+}
+FORMAT_ALIASES = {'opus': 'ogg', 'mpeg': 'mp3', 'wave': 'wav'}
+READ_CHUNK_SIZE = 64 * 1024
+
+def resolve_format(name: str) -> Optional[str]:
+    """Map a requested format name to a supported format, None if unsupported"""
+    name = (name or '').lower().strip()
+    name = FORMAT_ALIASES.get(name, name)
+    return name if name in AUDIO_FORMATS else None
+
+def format_for_mimetypes(accept, default: str) -> str:
+    """Pick the output format from an Accept header
+
+    Args:
+        accept: werkzeug MIMEAccept of the request
+        default (str): Format used when the header doesn't prefer any supported format
+
+    Returns:
+        str: Format name
+    """
+    mimetypes = [AUDIO_FORMATS[default]['mimetype']] + [
+        spec['mimetype'] for name, spec in AUDIO_FORMATS.items() if name != default
+    ]
+    best = accept.best_match(mimetypes) if accept else None
+    for name, spec in AUDIO_FORMATS.items():
+        if spec['mimetype'] == best:
+            return name
+    return default
+
+def _ffmpeg_command(sample_rate: int, audio_format: str) -> List[str]:
+    return [FFMPEG_BINARY, '-hide_banner', '-loglevel', 'error',
+            '-f', 's16le', '-ar', str(sample_rate), '-ac', '1', '-i', 'pipe:0',
+            *AUDIO_FORMATS[audio_format]['ffmpeg_args'], 'pipe:1']
+
+def _soundfile_encodes(sample_rate: int, audio_format: str) -> bool:
+    """Whether the installed libsndfile can encode the format at this sample rate"""
+    spec = AUDIO_FORMATS[audio_format]
+    if 'soundfile' not in spec:
+        return False
+    if spec['soundfile_rates'] is not None and sample_rate not in spec['soundfile_rates']:
+        return False
+    return soundfile.check_format(*spec['soundfile'])
+
+def encode_pcm(pcm: np.ndarray, sample_rate: int, audio_format: str) -> bytes:
+    """Encode mono int16 PCM in memory
+
+    WAV is written in process. MP3 and Opus are encoded in process by
+    libsndfile when it supports the format and sample rate (Opus only takes
+    8, 12, 16, 24 and 48 kHz), otherwise they are piped through ffmpeg
+    without touching the disk.
+
+    Raises:
+        EncodingError: If encoding fails
+    """
+    if audio_format == 'wav':
+        return pcm_to_wav(pcm, sample_rate).getvalue()
+
+    pcm = np.ascontiguousarray(pcm, dtype=np.int16)
+    if _soundfile_encodes(sample_rate, audio_format):
+        container, subtype = AUDIO_FORMATS[audio_format]['soundfile']
+        buffer = BytesIO()
+        try:
+            soundfile.write(buffer, pcm, sample_rate, format=container, subtype=subtype,
+                            **AUDIO_FORMATS[audio_format]['soundfile_options'])
+        except (soundfile.LibsndfileError, RuntimeError) as e:
+            raise EncodingError(f"Failed to encode {audio_format}: {str(e)}")
+        return buffer.getvalue()
+
+    try:
+        result = subprocess.run(
+            _ffmpeg_command(sample_rate, audio_format),
+            input=pcm.tobytes(),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=True
+        )
+    except subprocess.CalledProcessError as e:
+        raise EncodingError(f"ffmpeg failed to encode {audio_format}: {e.stderr.decode(errors='ignore').strip()}")
+    except OSError as e:
+        raise EncodingError(f"Couldn't run ffmpeg: {str(e)}")
+    return result.stdout
+
+def wav_stream_header(sample_rate: int) -> bytes:
+    """WAV header for a stream of unknown length, with maximal chunk sizes"""
+    byte_rate = sample_rate * SAMPLE_WIDTH
+    return (b'RIFF' + struct.pack('<I', 0xFFFFFFFF) + b'WAVE'
+            + b'fmt ' + struct.pack('<IHHIIHH', 16, 1, 1, sample_rate, byte_rate, SAMPLE_WIDTH, 8 * SAMPLE_WIDTH)
+            + b'data' + struct.pack('<I', 0xFFFFFFFF))
+
+class StreamEncoder:
+    """Incremental encoder for streamed responses
+
+    One ffmpeg process is kept open for the whole stream, so that the output
+    is a single well-formed container. PCM is written to its stdin as it is
+    synthesized, and a reader thread collects the encoded output so that
+    `feed` never blocks on a full pipe.
+    """
+
+    def __init__(self, sample_rate: int, audio_format: str):
+        self.sample_rate = sample_rate
+        self.audio_format = audio_format
+        self._process = None
+        self._output = queue.Queue()
+        self._finished = False
+        self._header_sent = False
+
+        if AUDIO_FORMATS[audio_format]['ffmpeg_args'] is not None:
+            try:
+                self._process = subprocess.Popen(
+                    _ffmpeg_command(sample_rate, audio_format),
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL
+                )
+            except OSError as e:
+                raise EncodingError(f"Couldn't run ffmpeg: {str(e)}")
+            self._reader = threading.Thread(target=self._read_output, daemon=True)
+            self._reader.start()
+
+    def _read_output(self):
+        stdout = self._process.stdout
+        while True:
+            data = stdout.read1(READ_CHUNK_SIZE)
+            if not data:
+                break
+            self._output.put(data)
+        self._output.put(None)
+
+    def _drain(self, block: bool = False) -> bytes:
+        chunks = []
+        while not self._finished:
+            try:
+                data = self._output.get(block=block)
+            except queue.Empty:
+                break
+            if data is None:
+                self._finished = True
+                break
+            chunks.append(data)
+        return b''.join(chunks)
+
+    def feed(self, pcm: np.ndarray) -> bytes:
+        """Encode a PCM chunk, return the encoded bytes available so far"""
+        data = np.ascontiguousarray(pcm, dtype=np.int16).tobytes()
+        if self._process is None:
+            if not self._header_sent:
+                self._header_sent = True
+                return wav_stream_header(self.sample_rate) + data
+            return data
+
+        try:
+            self._process.stdin.write(data)
+            self._process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise EncodingError(f"ffmpeg stream closed: {str(e)}")
+        return self._drain()
+
+    def close(self) -> bytes:
+        """Finish the stream, return the remaining encoded bytes"""
+        if self._process is None:
+            if not self._header_sent:
+                self._header_sent = True
+                return wav_stream_header(self.sample_rate)
+            return b''
+
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass
+        remaining = self._drain(block=True)
+        self._process.wait()
+        return remaining
+
+    def abort(self):
+        """Stop the encoder without flushing, e.g. when the client went away"""
+        if self._process is not None and self._process.poll() is None:
+            self._process.kill()
+            self._process.wait()
@@ -19,3 +19,18 @@ class ConfigurationError(TTSAPIError):
 class PreprocessorError(TTSAPIError):
     """Raised when text preprocessing fails"""
     pass
+
+class EncodingError(TTSAPIError):
+    """Raised when audio encoding fails"""
+    pass
+
+class JobQueueFullError(TTSAPIError):
+    """Raised when a job is submitted while the job queue is full"""
+    pass
+
+class ServiceOverloadedError(TTSAPIError):
+    """Raised when a request is rejected because its voice has too many requests waiting"""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
@@ -0,0 +1,435 @@
+# utils/inference_workers.py
+import os
+import queue
+import atexit
+import time
+import signal
+import logging
+import itertools
+import threading
+import multiprocessing
+import multiprocessing.process
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from utils.backends.base import TTSModelWrapper
+from utils.exceptions import ModelLoadError, SynthesisError
+
+logger = logging.getLogger(__name__)
+
+# Offset in bytes, number of samples and sample rate of each PCM result in a shared memory block
+Layout = List[Tuple[int, int, int]]
+
+# Interval at which a waiting request checks that the inference processes are still alive
+POLL_SECONDS = 0.5
+
+class RemoteModel(TTSModelWrapper):
+    """Stand-in for a model loaded by the inference processes
+
+    Registry entries of the web processes hold a RemoteModel in place of the
+    model, so the synthesis pipeline runs unchanged: batched inference calls
+    are sent to the inference processes and their PCM comes back through
+    shared memory.
+    """
+
+    def __init__(self, pool: 'InferenceWorkerPool', voice: str, sample_rate: int, checkpoint_id: str):
+        self.pool = pool
+        self.voice = voice
+        self._sample_rate = sample_rate
+        self._checkpoint_id = checkpoint_id
+
+    def load_model(self) -> bool:
+        return True
+
+    def synthesize_pcm(self, text: str) -> Tuple[np.ndarray, int]:
+        return self.synthesize_pcm_batch([text])[0]
+
+    def synthesize_pcm_batch(self, texts: List[str]) -> List[Tuple[np.ndarray, int]]:
+        return self.pool.synthesize(self.voice, texts)
+
+    @property
+    def sample_rate(self) -> int:
+        return self._sample_rate
+
+    @property
+    def checkpoint_id(self) -> str:
+        return self._checkpoint_id
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    # An exited child not reaped yet by its parent is still signalable
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            return f.read().rpartition(')')[2].split()[0] not in ('Z', 'X')
+    except (OSError, IndexError):
+        return True
+
+# Copies PCM results into one new shared memory block. Returns its name (None if all results are empty) and the
+# layout of the results in it. The block is unlinked by the process reading it
+def _share(results: List[Tuple[np.ndarray, int]]) -> Tuple[Optional[str], Layout]:
+    pcms = [(np.ascontiguousarray(pcm, dtype=np.int16).reshape(-1), int(rate)) for pcm, rate in results]
+    layout, offset = [], 0
+    for pcm, rate in pcms:
+        layout.append((offset, len(pcm), rate))
+        offset += pcm.nbytes
+    if not offset:
+        return None, layout
+
+    block = SharedMemory(create=True, size=offset)
+    try:
+        samples = np.ndarray(offset // 2, dtype=np.int16, buffer=block.buf)
+        for (start, length, _), (pcm, _) in zip(layout, pcms):
+            samples[start // 2:start // 2 + length] = pcm
+        del samples
+    except Exception:
+        block.close()
+        block.unlink()
+        raise
+    block.close()
+    return block.name, layout
+
+# Copies the PCM results out of a shared memory block and unlinks it
+def _collect(name: Optional[str], layout: Layout) -> List[Tuple[np.ndarray, int]]:
+    if name is None:
+        return [(np.zeros(0, dtype=np.int16), rate) for _, _, rate in layout]
+    block = SharedMemory(name)
+    try:
+        return [(np.frombuffer(block.buf, dtype=np.int16, count=length, offset=start).copy() if length
+                 else np.zeros(0, dtype=np.int16), rate) for start, length, rate in layout]
+    finally:
+        block.close()
+        block.unlink()
+
+# Main function of an inference process: loads the models, warms them up, reports the loaded voices on `ready` and
+# serves batches from `requests` until it gets None or its parent exits. The request being served is recorded in
+# `busy`, so that its web process can tell when it's lost with a crashed inference process. Imports are local, so that a spawned process
+# only imports what its loader needs
+def _serve(index: int, settings: dict, requests, replies, reply_locks, busy, ready, load: Optional[Callable]):
+    # Ctrl-C reaches the whole process group, the parent stops the inference processes itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s',
+                        datefmt='%Y-%m-%d %H:%M:%S')
+    from utils.cpu_layout import apply_layout, plan_layout
+    from utils.warmup import WarmUp
+    if load is None:
+        from utils.model_loader import load_models as load
+    apply_layout(plan_layout(settings['threading'], settings['processes'], index))
+
+    try:
+        registry, _ = load(settings['models'], settings['models_root'], settings['use_cuda'],
+                           workers=settings['load_workers'])
+    except Exception as e:
+        ready.put((index, None, f"Inference process {index}: {str(e)}"))
+        return
+
+    def synthesize(voice, sentences):
+        preprocessor = registry[voice].get('preprocessor')
+        texts = [preprocessor(sentence) if preprocessor else sentence for sentence in sentences]
+        registry[voice]['model'].synthesize_pcm_batch(texts)
+
+    WarmUp.from_config(settings['warmup']).run({voice: entry['lang'] for voice, entry in registry.items()},
+                                               synthesize)
+    ready.put((index, {voice: {'lang': entry['lang'], 'sample_rate': entry['model'].sample_rate,
+                               'checkpoint_id': entry['model'].checkpoint_id}
+                       for voice, entry in registry.items()}, None))
+    logger.info(f"Inference process {index} (pid {os.getpid()}) serving {len(registry)} voices")
+
+    parent = multiprocessing.parent_process()
+    if parent is not None:
+        # Exit with the process that started the pool, even if it couldn't stop it (e.g. a killed gunicorn master)
+        threading.Thread(target=lambda: (parent.join(), os._exit(0)), name='parent-watch', daemon=True).start()
+    while True:
+        item = requests.get()
+        if item is None:
+            break
+
+        slot, request_id, voice, texts = item
+        busy[2 * index], busy[2 * index + 1] = request_id
+        name, layout, error = None, [], None
+        try:
+            entry = registry.get(voice)
+            if entry is None:
+                raise SynthesisError(f"Voice {voice} is not loaded by the inference processes")
+            name, layout = _share(entry['model'].synthesize_pcm_batch(texts))
+        except Exception as e:
+            logger.error(f"Inference of {len(texts)} texts with voice {voice} failed: {str(e)}")
+            error = str(e)
+        busy[2 * index] = 0
+        with reply_locks[slot]:
+            replies[slot].send((request_id, name, layout, error))
+
+class InferenceWorkerPool:
+    """Long-lived processes owning the models, serving inference to the web processes
+
+    Every inference process loads the voices flagged with "load" and takes
+    batches from a single request queue, so a free process picks up the next
+    batch whichever web process sent it. PCM results are written to a shared
+    memory block and only its name and layout go back through the result
+    pipe of the web process, instead of the pickled audio.
+
+    The pool is started before the web processes are forked (gunicorn with
+    preload_app). Each web process then claims one of `max_clients` result
+    pipes on its first request, and a thread of that process hands the
+    results to the waiting requests. Inference processes are spawned, not
+    forked, so they start from a clean interpreter and can use CUDA.
+
+    Inference processes aren't restarted. A request whose inference process
+    exits while serving it, or sent when none is left, fails right away
+    instead of waiting for `timeout`.
+    """
+
+    def __init__(self, model_configs: List[dict], models_root: str = 'models', use_cuda: bool = False,
+                 processes: int = 2, max_clients: int = 16, timeout: float = 300, threading_settings: dict = None,
+                 warmup_settings: dict = None, load_workers: int = 1, load: Callable = None):
+        """Initialize the pool
+
+        Args:
+            model_configs (list): Model configs, the voices flagged with "load" are loaded by every process
+            models_root (str): Directory the checkpoint paths are relative to
+            use_cuda (bool): Load models on GPU
+            processes (int): Number of inference processes
+            max_clients (int): Number of web processes that can use the pool at the same time, one result pipe each
+            timeout (float): Seconds a request waits for its results
+            threading_settings (dict): The `threading` config section, the CPUs are divided between the processes
+            warmup_settings (dict): The `warmup` config section, each process warms up before it takes requests
+            load_workers (int): Number of models each process loads at the same time
+            load (callable): Function loading the models, with the signature of load_models (the default)
+        """
+        self.processes = max(1, int(processes))
+        self.max_clients = max(1, int(max_clients))
+        self.timeout = float(timeout)
+        self.load = load
+        self.voices: Dict[str, dict] = {}
+        self.pids: List[int] = []
+        self._settings = {
+            'models': model_configs,
+            'models_root': models_root,
+            'use_cuda': use_cuda,
+            'processes': self.processes,
+            'threading': threading_settings or {},
+            'warmup': warmup_settings or {'enabled': False},
+            'load_workers': load_workers
+        }
+
+        self._context = multiprocessing.get_context('spawn')
+        # Web processes forked from this one write requests synchronously: a Queue's feeder thread isn't restarted in
+        # processes forked outside of multiprocessing
+        self._requests = self._context.SimpleQueue()
+        # Result pipes have a single reader, the web process using them: a process exiting while it waits for results
+        # can't leave a lock held for the next one
+        self._replies = [self._context.Pipe(duplex=False) for _ in range(self.max_clients)]
+        self._reply_locks = [self._context.Lock() for _ in range(self.max_clients)]
+        self._ready = self._context.Queue()
+        self._slots = self._context.Array('i', self.max_clients)  # pid of the web process using each result pipe
+        # (web process pid, request number) of the request each inference process is serving, pid 0 when idle
+        self._busy = self._context.Array('q', 2 * self.processes, lock=False)
+        self._processes = []
+        self._owner = os.getpid()
+
+        self._lock = threading.Lock()
+        self._client = None  # (pid, slot) of the calling process
+        self._pending = {}
+        self._request_ids = itertools.count()
+
+    @classmethod
+    def from_config(cls, settings: dict, model_configs: List[dict], models_root: str = 'models',
+                    use_cuda: bool = False, threading_settings: dict = None, warmup_settings: dict = None,
+                    load_workers: int = 1) -> 'InferenceWorkerPool':
+        """Create a pool from the `inference_workers` config section"""
+        return cls(
+            model_configs,
+            models_root=models_root,
+            use_cuda=use_cuda,
+            processes=settings.get('processes', 2),
+            max_clients=settings.get('max_clients', 16),
+            timeout=settings.get('timeout_seconds', 300),
+            threading_settings=threading_settings,
+            warmup_settings=warmup_settings,
+            load_workers=load_workers
+        )
+
+    def start(self) -> Dict[str, dict]:
+        """Start the inference processes and wait until all of them have loaded their models
+
+        Returns:
+            dict: lang, sample_rate and checkpoint_id of the voices loaded by every process, in config order
+
+        Raises:
+            ModelLoadError: If a process couldn't load any model or exited
+        """
+        for index in range(self.processes):
+            process = self._context.Process(
+                target=_serve,
+                args=(index, self._settings, self._requests, [writer for _, writer in self._replies],
+                      self._reply_locks, self._busy, self._ready, self.load),
+                name=f'inference-{index}'
+            )
+            process.start()
+            # Gunicorn workers forked from this process inherit the multiprocessing bookkeeping of its children,
+            # and would terminate and join the inference processes when they exit. The pool stops them itself
+            multiprocessing.process._children.discard(process)
+            self._processes.append(process)
+        self.pids = [process.pid for process in self._processes]
+        atexit.register(self.stop)
+
+        loaded, errors = {}, []
+        pending = set(range(self.processes))
+        while pending:
+            try:
+                index, voices, error = self._ready.get(timeout=1)
+            except queue.Empty:
+                for index in list(pending):
+                    if not self._processes[index].is_alive():
+                        pending.discard(index)
+                        errors.append(f"Inference process {index} exited with code {self._processes[index].exitcode}")
+                continue
+            if index not in pending:
+                continue
+            pending.discard(index)
+            if error:
+                errors.append(error)
+            else:
+                loaded[index] = voices
+
+        if errors:
+            self.stop()
+            raise ModelLoadError(f"Inference processes failed to start: {'; '.join(errors)}")
+        first = loaded[0]
+        self.voices = {voice: info for voice, info in first.items() if all(voice in other for other in loaded.values())}
+        logging.info(f"{self.processes} inference processes started with {len(self.voices)} voices "
+                     f"(pids {', '.join(str(pid) for pid in self.pids)})")
+        return self.voices
+
+    def model_entries(self, languages: dict = None, preprocessor_cache=None) -> Tuple[Dict[str, dict], Dict[str, str]]:
+        """Registry entries of the voices served by the pool, as returned by load_models
+
+        Models are RemoteModels, preprocessors are loaded in the calling
+        process, which normalizes texts before sending them.
+
+        Returns:
+            tuple: Model entries by voice, default voice by language
+        """
+        from utils.model_loader import load_lang_batch_preprocessor, load_lang_preprocessor
+        configs = {config['voice']: config for config in self._settings['models']}
+        registry, defaults = {}, {}
+        for voice, info in self.voices.items():
+            model_config = configs[voice]
+            preprocessor_module = model_config.get('preprocessor', 'preprocessor')
+            registry[voice] = {
+                'model': RemoteModel(self, voice, info['sample_rate'], info['checkpoint_id']),
+                'lang': info['lang'],
+                'voice': voice,
+                'language': languages.get(info['lang']) if languages else None,
+                'preprocessor': load_lang_preprocessor(info['lang'], preprocessor_module, preprocessor_cache),
+                'batch_preprocessor': load_lang_batch_preprocessor(info['lang'], preprocessor_module,
+                                                                   preprocessor_cache),
+                'framerate': info['sample_rate'],
+                'config': dict(model_config, use_cuda=self._settings['use_cuda'])
+            }
+            defaults.setdefault(info['lang'], voice)
+        return registry, defaults
+
+    def _claim(self) -> int:
+        """Result pipe of the calling process, claimed on first use with a thread handing out its results"""
+        pid = os.getpid()
+        with self._lock:
+            if self._client is not None and self._client[0] == pid:
+                return self._client[1]
+            with self._slots.get_lock():
+                for slot, owner in enumerate(self._slots):
+                    # Pipes of exited processes, e.g. gunicorn workers that were restarted, are reused
+                    if not owner or owner == pid or not _pid_alive(owner):
+                        self._slots[slot] = pid
+                        break
+                else:
+                    raise SynthesisError(f"All {self.max_clients} result pipes of the inference processes are in "
+                                         "use, raise inference_workers.max_clients")
+            self._client = (pid, slot)
+            self._pending = {}
+            threading.Thread(target=self._dispatch, args=(self._replies[slot][0],), name='inference-results',
+                             daemon=True).start()
+            return slot
+
+    def _dispatch(self, replies):
+        while True:
+            request_id, name, layout, error = replies.recv()
+            results = None
+            if error is None:
+                try:
+                    results = _collect(name, layout)
+                except Exception as e:
+                    error = f"Couldn't read inference results: {str(e)}"
+            with self._lock:
+                waiter = self._pending.pop(request_id, None)
+            # Results of requests that timed out, or of a previous process using the pipe, are dropped
+            if waiter is not None:
+                waiter[1] = (results, error)
+                waiter[0].set()
+
+    def synthesize(self, voice: str, texts: List[str]) -> List[Tuple[np.ndarray, int]]:
+        """Synthesize normalized texts with a voice in one of the inference processes
+
+        Returns:
+            list: int16 PCM and sample rate per text
+
+        Raises:
+            SynthesisError: If inference failed or timed out
+        """
+        slot = self._claim()
+        request_id = (os.getpid(), next(self._request_ids))
+        waiter = [threading.Event(), None]
+        with self._lock:
+            self._pending[request_id] = waiter
+        lost = self._lost(request_id)
+        if lost is None:
+            self._requests.put((slot, request_id, voice, list(texts)))
+
+        deadline = time.monotonic() + self.timeout
+        while lost is None and not waiter[0].wait(min(POLL_SECONDS, max(0.0, deadline - time.monotonic()))):
+            lost = self._lost(request_id)
+            if lost is None and time.monotonic() >= deadline:
+                lost = f"Inference with voice {voice} timed out after {self.timeout:g}s"
+        if lost is not None and not waiter[0].is_set():
+            with self._lock:
+                self._pending.pop(request_id, None)
+            raise SynthesisError(lost)
+        results, error = waiter[1]
+        if error is not None:
+            raise SynthesisError(error)
+        return results
+
+    def _lost(self, request_id: tuple) -> Optional[str]:
+        """Why a request can't get results anymore: no inference process left, or the one serving it exited"""
+        alive = [_pid_alive(pid) for pid in self.pids]
+        for index, pid in enumerate(self.pids):
+            if not alive[index] and (self._busy[2 * index], self._busy[2 * index + 1]) == request_id:
+                return f"Inference process {index} (pid {pid}) exited while serving the request"
+        if not any(alive):
+            return "No inference process is alive"
+        return None
+
+    def stop(self, timeout: float = 10):
+        """Stop the inference processes. Only the process that started them can stop them"""
+        if os.getpid() != self._owner or not self._processes:
+            return
+        for _ in self._processes:
+            self._requests.put(None)
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout)
+        self._processes = []
+
+    @property
+    def status(self) -> dict:
+        return {
+            'processes': len(self.pids),
+            'alive': sum(_pid_alive(pid) for pid in self.pids),
+            'voices': list(self.voices)
+        }
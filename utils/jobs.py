@@ -0,0 +1,219 @@
+# utils/jobs.py
+import os
+import re
+import json
+import time
+import uuid
+import queue
+import logging
+import tempfile
+import threading
+from typing import Callable, Optional, Tuple
+from utils.exceptions import JobQueueFullError
+
+logger = logging.getLogger(__name__)
+
+JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+# A job task gets a progress callback taking (sentences done, sentences total) and returns the encoded audio
+# with its file extension
+JobTask = Callable[[Callable[[int, int], None]], Tuple[bytes, str]]
+
+class JobManager:
+    """Runs long synthesis jobs on a bounded pool of worker threads
+
+    Jobs wait in a bounded in-process queue: submitting to a full queue fails
+    right away instead of piling up work. Status and results are files in
+    `jobs_dir` (`<id>.json` and `<id>.<extension>`), written atomically, so any
+    worker process sharing the directory can answer status and result requests
+    for jobs run by another one. Finished jobs not updated for `ttl_seconds`
+    are removed, and so are queued or running jobs once the process running
+    them is gone.
+
+    Worker threads are started on first submit, so that a manager created
+    before gunicorn forks gets its threads in each worker.
+    """
+
+    def __init__(self, jobs_dir: str, workers: int = 2, max_queued: int = 32, ttl_seconds: int = 3600):
+        """Initialize the manager
+
+        Args:
+            jobs_dir (str): Directory of job status and result files
+            workers (int): Number of jobs run at the same time in this process
+            max_queued (int): Number of jobs that can wait for a worker
+            ttl_seconds (int): Time after which finished or abandoned jobs are removed
+        """
+        self.jobs_dir = jobs_dir
+        self.workers = max(1, int(workers))
+        self.ttl_seconds = ttl_seconds
+        self._queue = queue.Queue(maxsize=max(1, int(max_queued)))
+        self._lock = threading.Lock()
+        self._threads = []
+        self._pid = None
+        os.makedirs(self.jobs_dir, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, settings: dict) -> 'JobManager':
+        """Create a manager from the `jobs` config section"""
+        return cls(
+            jobs_dir=settings.get('dir') or os.path.join(tempfile.gettempdir(), 'tts-jobs'),
+            workers=settings.get('workers', 2),
+            max_queued=settings.get('max_queued', 32),
+            ttl_seconds=settings.get('ttl_seconds', 3600)
+        )
+
+    @staticmethod
+    def is_valid_id(job_id: str) -> bool:
+        return bool(job_id and JOB_ID_PATTERN.match(job_id))
+
+    def _status_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _write_atomic(self, path: str, data: bytes):
+        fd, tmp_path = tempfile.mkstemp(dir=self.jobs_dir, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def _write_status(self, status: dict):
+        status['updated'] = time.time()
+        self._write_atomic(self._status_path(status['job_id']), json.dumps(status).encode('utf-8'))
+
+    def _ensure_workers(self):
+        with self._lock:
+            if self._pid == os.getpid() and all(thread.is_alive() for thread in self._threads):
+                return
+            self._pid = os.getpid()
+            self._threads = [
+                threading.Thread(target=self._work, name=f'job-worker-{i}', daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def submit(self, task: JobTask, metadata: dict = None) -> str:
+        """Queue a job
+
+        Args:
+            task: Function producing the job result, see JobTask
+            metadata (dict): Extra fields stored in the job status
+
+        Returns:
+            str: Job id
+
+        Raises:
+            JobQueueFullError: If the queue is full
+        """
+        self.cleanup()
+        self._ensure_workers()
+
+        job_id = uuid.uuid4().hex
+        status = {
+            'job_id': job_id,
+            'status': 'queued',
+            'done': 0,
+            'total': None,
+            'error': None,
+            'extension': None,
+            'created': time.time(),
+            'started': None,
+            'finished': None,
+            'pid': os.getpid(),
+            **(metadata or {})
+        }
+        self._write_status(status)
+        try:
+            self._queue.put_nowait((status, task))
+        except queue.Full:
+            os.unlink(self._status_path(job_id))
+            raise JobQueueFullError(f"Job queue is full ({self._queue.maxsize} jobs waiting)")
+        return job_id
+
+    def _work(self):
+        while True:
+            status, task = self._queue.get()
+            try:
+                self._run(status, task)
+            except Exception as e:
+                logger.error(f"Job {status['job_id']} couldn't be recorded: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def _run(self, status: dict, task: JobTask):
+        status.update(status='running', started=time.time())
+        self._write_status(status)
+
+        def progress(done: int, total: int):
+            status.update(done=done, total=total)
+            self._write_status(status)
+
+        try:
+            audio, extension = task(progress)
+            self._write_atomic(os.path.join(self.jobs_dir, f"{status['job_id']}.{extension}"), audio)
+            status.update(status='done', extension=extension, finished=time.time())
+        except Exception as e:
+            logger.error(f"Job {status['job_id']} failed: {str(e)}")
+            status.update(status='failed', error=str(e), finished=time.time())
+        self._write_status(status)
+
+    def status(self, job_id: str) -> Optional[dict]:
+        """Get the status of a job, None if it doesn't exist"""
+        if not self.is_valid_id(job_id):
+            return None
+        try:
+            with open(self._status_path(job_id), 'rb') as f:
+                return json.loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def result_path(self, job_id: str) -> Optional[str]:
+        """Get the result file of a finished job, None if it isn't done"""
+        status = self.status(job_id)
+        if not status or status['status'] != 'done':
+            return None
+        path = os.path.join(self.jobs_dir, f"{job_id}.{status['extension']}")
+        return path if os.path.isfile(path) else None
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of jobs waiting for a worker in this process"""
+        return self._queue.qsize()
+
+    @staticmethod
+    def _is_active(status: dict) -> bool:
+        """Whether a job is queued or running in a live process, so it may go longer than the TTL without updates"""
+        if status.get('status') not in ('queued', 'running') or not status.get('pid'):
+            return False
+        try:
+            os.kill(status['pid'], 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def cleanup(self):
+        """Remove jobs not updated for longer than the TTL, with their results, except active ones"""
+        limit = time.time() - self.ttl_seconds
+        try:
+            names = os.listdir(self.jobs_dir)
+        except OSError:
+            return
+        for name in names:
+            job_id, _, extension = name.partition('.')
+            if extension != 'json' or not self.is_valid_id(job_id):
+                continue
+            status = self.status(job_id)
+            if status is None or status.get('updated', 0) >= limit or self._is_active(status):
+                continue
+            for path in [self._status_path(job_id),
+                         os.path.join(self.jobs_dir, f"{job_id}.{status.get('extension')}")]:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
@@ -0,0 +1,67 @@
+# utils/metrics.py
+import os
+import time
+from contextlib import contextmanager
+from typing import Tuple
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess)
+
+STAGE_SECONDS = Histogram(
+    'tts_stage_seconds', 'Time spent in each synthesis stage', ['stage', 'voice'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+)
+REQUEST_SECONDS = Histogram(
+    'tts_request_seconds', 'Wall time of synthesis requests', ['endpoint', 'voice'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+)
+REAL_TIME_FACTOR = Histogram(
+    'tts_real_time_factor', 'Seconds of audio synthesized per wall second, per request', ['voice'],
+    buckets=(0.25, 0.5, 1, 2, 5, 10, 20, 50, 100)
+)
+CHARACTERS_PER_SECOND = Histogram(
+    'tts_characters_per_second', 'Characters synthesized per wall second, per request', ['voice'],
+    buckets=(10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+)
+CHARACTERS = Counter('tts_characters', 'Characters synthesized', ['voice'])
+AUDIO_SECONDS = Counter('tts_audio_seconds', 'Seconds of audio synthesized', ['voice'])
+IN_FLIGHT = Gauge('tts_in_flight_requests', 'Synthesis requests in progress', ['endpoint'],
+                  multiprocess_mode='livesum')
+QUEUE_DEPTH = Gauge('tts_queue_depth', 'Requests waiting to be served', ['queue'],
+                    multiprocess_mode='livesum')
+CACHE_HITS = Counter('tts_cache_hits', 'Sentences served from the audio cache', ['voice'])
+CACHE_MISSES = Counter('tts_cache_misses', 'Sentences not found in the audio cache', ['voice'])
+
+@contextmanager
+def stage_timer(stage: str, voice: str):
+    """Context timing a pipeline stage of a voice"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage, voice).observe(time.perf_counter() - start)
+
+def observe_stage(stage: str, voice: str, seconds: float):
+    """Record the time spent in a pipeline stage, for stages timed in several pieces"""
+    STAGE_SECONDS.labels(stage, voice).observe(seconds)
+
+def observe_synthesis(endpoint: str, voice: str, characters: int, audio_seconds: float, wall_seconds: float):
+    """Record the throughput of a finished synthesis request"""
+    REQUEST_SECONDS.labels(endpoint, voice).observe(wall_seconds)
+    CHARACTERS.labels(voice).inc(characters)
+    AUDIO_SECONDS.labels(voice).inc(audio_seconds)
+    if wall_seconds > 0:
+        REAL_TIME_FACTOR.labels(voice).observe(audio_seconds / wall_seconds)
+        CHARACTERS_PER_SECOND.labels(voice).observe(characters / wall_seconds)
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Get the metrics in Prometheus text format, with their content type
+
+    When PROMETHEUS_MULTIPROC_DIR is set (several gunicorn workers), metrics of
+    all worker processes are aggregated from that directory.
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -1,15 +1,16 @@
 # utils/model_factory.py
-from typing import Dict, Type
+from typing import Dict, Type, Union
+import importlib
 import logging
 from utils.exceptions import ConfigurationError
 from .backends.base import TTSModelWrapper
-from .backends.coqui import CoquiWrapper
-from .backends.mms import MMSWrapper
 
 class TTSModelFactory:
-    _backend_map: Dict[str, Type[TTSModelWrapper]] = {
-        'coqui': CoquiWrapper,
-        'mms': MMSWrapper
+    # Built-in backends are imported on first use, so only the frameworks of the configured models get loaded
+    _backend_map: Dict[str, Union[str, Type[TTSModelWrapper]]] = {
+        'coqui': 'utils.backends.coqui:CoquiWrapper',
+        'mms': 'utils.backends.mms:MMSWrapper',
+        'onnx': 'utils.backends.onnx_runtime:ONNXWrapper'
     }
     
     @classmethod
@@ -28,4 +29,8 @@ class TTSModelFactory:
             raise ConfigurationError(f"Unknown model_type: {model_type}")
             
         model_class = cls._backend_map[model_type]
-        return model_class(config)
\ No newline at end of file
+        if isinstance(model_class, str):
+            module_name, class_name = model_class.split(':')
+            model_class = getattr(importlib.import_module(module_name), class_name)
+            cls._backend_map[model_type] = model_class
+        return model_class(config)
@@ -1,9 +1,12 @@
 import os
 import json
+import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from importlib import import_module
 from utils.exceptions import ModelLoadError, ConfigurationError
 from .model_factory import TTSModelFactory
+from .backends.base import CHECKPOINT_FIELDS
 
 # from TTS.utils.manage import ModelManager ##TODO: This could be enabled to load coqui models without pointing to path
 from TTS.utils.synthesizer import Synthesizer
@@ -14,55 +17,210 @@ DEFAULT_FRAMERATE = 22050
 logger = logging.getLogger(__name__)
 
 
-def load_lang_preprocessor(lang, preprocessor_module_name=DEFAULT_PREPROCESSOR_MODULE):
+# Loads the entry point `text_preprocess` of a preprocessor. With a PreprocessorCache, results are cached by
+# language, preprocessor module and text
+def load_lang_preprocessor(lang, preprocessor_module_name=DEFAULT_PREPROCESSOR_MODULE, cache=None):
     try:
         preprocessor_module = import_module('utils.preprocessors.' + lang + '.' + preprocessor_module_name)
         preprocessor = lambda x: preprocessor_module.text_preprocess(x)
+        if cache is not None:
+            preprocessor = cache.wrap(lang, preprocessor_module_name, preprocessor)
         return preprocessor
     except ModuleNotFoundError:
         logger.error(f"Couldn't load preprocessor {preprocessor_module_name} for lang {lang}")
         return None
 
-def load_models(model_configs: list, models_root: str, use_cuda: bool = False, languages: dict = None):
+# Loads the batch entry point `text_preprocess_batch` of a preprocessor, which normalizes a list of texts at once.
+# Returns None if the preprocessor doesn't define one. With a PreprocessorCache, only uncached texts are normalized
+def load_lang_batch_preprocessor(lang, preprocessor_module_name=DEFAULT_PREPROCESSOR_MODULE, cache=None):
+    try:
+        preprocessor_module = import_module('utils.preprocessors.' + lang + '.' + preprocessor_module_name)
+    except ModuleNotFoundError:
+        return None
+    if not hasattr(preprocessor_module, 'text_preprocess_batch'):
+        return None
+    batch_preprocessor = lambda texts: preprocessor_module.text_preprocess_batch(texts)
+    if cache is not None:
+        batch_preprocessor = cache.wrap_batch(lang, preprocessor_module_name, batch_preprocessor)
+    return batch_preprocessor
+
+# Creates and loads the model of one config entry, returns its registry entry
+def load_model_entry(model_config: dict, use_cuda: bool = False, languages: dict = None,
+                     preprocessor_cache=None) -> dict:
+    model_id = model_config['voice']
+    model_lang = model_config['lang']  # Store language code here
+
+    model_config['use_cuda'] = use_cuda
+    model = TTSModelFactory.create_model(model_config)
+    
+    if not model.load_model():
+        raise ModelLoadError(f"Failed to load model {model_id}")
+    if model_config.get('quantize'):
+        # Quantized kernels only run on CPU
+        if use_cuda:
+            logger.warning(f"Quantization of model {model_id} skipped, it runs on GPU")
+        else:
+            model.quantize(model_config['quantize'])
+            logger.info(f"Model {model_id} quantized to {model_config['quantize']}, "
+                        f"weights {model.memory_footprint() / 1024 / 1024:.1f} MB")
+    model.freeze()
+    
+    return {
+        'model': model,
+        'lang': model_lang,
+        'voice': model_id,
+        'language': languages.get(model_lang) if languages else None,
+        'preprocessor': load_lang_preprocessor(
+            model_lang,
+            model_config.get('preprocessor', 'preprocessor'),
+            preprocessor_cache
+        ),
+        'batch_preprocessor': load_lang_batch_preprocessor(
+            model_lang,
+            model_config.get('preprocessor', 'preprocessor'),
+            preprocessor_cache
+        ),
+        'framerate': model.sample_rate,
+        'config': dict(model_config)
+    }
+
+# Whether a loaded registry entry was loaded from this config entry, so that a config reload can keep it
+def entry_matches_config(entry: dict, model_config: dict, use_cuda: bool = False) -> bool:
+    return entry.get('config') == dict(model_config, use_cuda=use_cuda)
+
+# Resident set size of the process in bytes, None where /proc isn't available
+def process_rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+# Bytes the calling thread has caused to be fetched from storage so far, None where /proc or I/O accounting
+# isn't available. Unlike rchar (bytes returned by read calls), this counts pages of memory mapped checkpoints
+# (safetensors) read on page faults. Files already in the page cache count as 0
+def thread_read_bytes():
+    try:
+        with open('/proc/thread-self/io') as f:
+            for line in f:
+                if line.startswith('read_bytes:'):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+# Size on disk of the checkpoint files (or directories) listed in a model config
+def checkpoint_bytes(model_config: dict, models_root: str) -> int:
+    total = 0
+    for field in CHECKPOINT_FIELDS:
+        value = model_config.get(field)
+        if not value or field == 'model_type':
+            continue
+        path = os.path.join(models_root, value)
+        if os.path.isfile(path):
+            total += os.path.getsize(path)
+        elif os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+# Loads one model, timing it. Returns (model id, registry entry or None, report row)
+def _load_with_report(model_config: dict, models_root: str, use_cuda: bool, languages: dict,
+                      preprocessor_cache=None):
+    model_id = model_config.get('voice')
+    row = {
+        'voice': model_id,
+        'lang': model_config.get('lang'),
+        'loaded': False,
+        'error': None,
+        'seconds': None,
+        'checkpoint_bytes': checkpoint_bytes(model_config, models_root),
+        'read_bytes': None,
+        'rss_delta_bytes': None
+    }
+    rss_before = process_rss_bytes()
+    read_before = thread_read_bytes()
+    start = time.perf_counter()
+    entry = None
+    try:
+        entry = load_model_entry(model_config, use_cuda, languages, preprocessor_cache)
+        row['loaded'] = True
+        logging.info(f"Successfully loaded model {model_id}")
+    except Exception as e:
+        row['error'] = str(e)
+        logging.error(f"Error loading model {model_id}: {e}")
+    row['seconds'] = round(time.perf_counter() - start, 3)
+    read_after = thread_read_bytes()
+    if read_before is not None and read_after is not None:
+        row['read_bytes'] = read_after - read_before
+    rss_after = process_rss_bytes()
+    if rss_before is not None and rss_after is not None:
+        # Process wide, so loads running at the same time count in each other's deltas
+        row['rss_delta_bytes'] = rss_after - rss_before
+    return model_id, entry, row
+
+def load_models(model_configs: list, models_root: str, use_cuda: bool = False, languages: dict = None,
+                workers: int = 1, report: dict = None, preprocessor_cache=None):
+    """Load the models flagged with "load" concurrently
+
+    Args:
+        model_configs (list): Model configs, the first loaded voice of each language becomes its default
+        models_root (str): Directory the checkpoint paths are relative to
+        use_cuda (bool): Load models on GPU
+        languages (dict): Language names by code
+        workers (int): Number of models loaded at the same time
+        report (dict): If given, filled with the startup report: total time, RSS and a row per model
+            with its load time, checkpoint size, bytes read and RSS delta
+        preprocessor_cache (PreprocessorCache): If given, shared cache of the preprocessor results
+
+    Returns:
+        tuple: Loaded model entries by voice, default voice by language
+
+    Raises:
+        ModelLoadError: If no model could be loaded
+    """
     try:
         loaded_models = {}
         default_model_ids = {}
-        
-        for model_config in model_configs:
-            try:
-                model_id = model_config['voice']
-                model_lang = model_config['lang']  # Store language code here
-                
-                if not model_config.get('load', False):
-                    continue
-                    
-                
-                model_config['use_cuda'] = use_cuda
-                model = TTSModelFactory.create_model(model_config)
-                
-                if not model.load_model():
-                    raise ModelLoadError(f"Failed to load model {model_id}")
-                
-                loaded_models[model_id] = {
-                    'model': model,
-                    'lang': model_lang,
-                    'voice': model_id,
-                    'language': languages.get(model_lang) if languages else None,
-                    'preprocessor': load_lang_preprocessor(
-                        model_lang,
-                        model_config.get('preprocessor', 'preprocessor')
-                    ),
-                    'framerate': model.sample_rate
-                }
-                
-                if model_lang not in default_model_ids:
-                    default_model_ids[model_lang] = model_id
-                    
-                logging.info(f"Successfully loaded model {model_id}")
-                
-            except Exception as e:
-                logging.error(f"Error loading model {model_id}: {e}")
+        to_load = [model_config for model_config in model_configs if model_config.get('load', False)]
+        workers = max(1, min(int(workers), len(to_load) or 1))
+
+        rss_before = process_rss_bytes()
+        start = time.perf_counter()
+        # A failing model is reported and skipped without affecting the others
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='model-loader') as executor:
+            results = list(executor.map(
+                lambda model_config: _load_with_report(model_config, models_root, use_cuda, languages,
+                                                       preprocessor_cache),
+                to_load
+            ))
+        total_seconds = round(time.perf_counter() - start, 3)
+        rss_after = process_rss_bytes()
+
+        # Defaults follow config order, whatever order the loads finished in
+        for model_id, entry, _ in results:
+            if entry is None:
                 continue
+            loaded_models[model_id] = entry
+            default_model_ids.setdefault(entry['lang'], model_id)
+
+        rows = [row for _, _, row in results]
+        logging.info(f"Loaded {len(loaded_models)}/{len(to_load)} models in {total_seconds}s with {workers} workers")
+        for row in sorted(rows, key=lambda row: row['seconds'], reverse=True):
+            logging.info(f"  {row['voice']}: {row['seconds']}s, "
+                         f"checkpoint {row['checkpoint_bytes'] / 1024 / 1024:.1f} MB, "
+                         f"read {(row['read_bytes'] or 0) / 1024 / 1024:.1f} MB, "
+                         f"RSS delta {(row['rss_delta_bytes'] or 0) / 1024 / 1024:.1f} MB"
+                         + ('' if row['loaded'] else f" (failed: {row['error']})"))
+
+        if report is not None:
+            report.update({
+                'workers': workers,
+                'total_seconds': total_seconds,
+                'rss_before_bytes': rss_before,
+                'rss_after_bytes': rss_after,
+                'models': rows
+            })
         
         if not loaded_models:
             raise ModelLoadError("No models were successfully loaded")
@@ -71,4 +229,61 @@ def load_models(model_configs: list, models_root: str, use_cuda: bool = False, l
         
     except Exception as e:
         logging.error(f"Error in load_models: {e}")
-        raise
\ No newline at end of file
+        raise
+
+def reload_models(registry: dict, model_configs: list, models_root: str, use_cuda: bool = False,
+                  languages: dict = None, workers: int = 1, preprocessor_cache=None):
+    """Load the voices flagged with "load" in a reloaded config, reusing the models that didn't change
+
+    Voices whose config entry is the same as the one their model was loaded
+    from keep their entry, and are never reloaded. New voices and voices whose
+    entry changed are loaded concurrently, as at startup. A changed voice that
+    fails to load keeps its previous model. The given registry isn't modified.
+
+    Args:
+        registry (dict): Loaded model entries by voice, as served before the reload
+        model_configs (list): Model configs of the reloaded config
+        models_root (str): Directory the checkpoint paths are relative to
+        use_cuda (bool): Load models on GPU
+        languages (dict): Language names by code
+        workers (int): Number of models loaded at the same time
+        preprocessor_cache (PreprocessorCache): If given, shared cache of the preprocessor results
+
+    Returns:
+        tuple: New registry of the voices flagged with "load", in config order, and a report with the voices
+            unchanged, loaded, failed and removed
+    """
+    to_load = [model_config for model_config in model_configs if model_config.get('load', False)
+               and not (model_config['voice'] in registry
+                        and entry_matches_config(registry[model_config['voice']], model_config, use_cuda))]
+    loaded, load_report = {}, {}
+    if to_load:
+        try:
+            loaded, _ = load_models(to_load, models_root, use_cuda, languages, workers, load_report,
+                                    preprocessor_cache)
+        except ModelLoadError:
+            pass
+
+    new_registry = {}
+    report = {'unchanged': [], 'loaded': [], 'failed': [], 'removed': []}
+    for model_config in model_configs:
+        voice = model_config['voice']
+        if not model_config.get('load', False):
+            continue
+        if voice in loaded:
+            new_registry[voice] = loaded[voice]
+            report['loaded'].append(voice)
+        elif voice in registry:
+            entry = registry[voice]
+            if any(config is model_config for config in to_load):
+                # Keeps serving the previous model, the next reload tries again
+                report['failed'].append(voice)
+            else:
+                report['unchanged'].append(voice)
+            language = languages.get(model_config['lang']) if languages else None
+            new_registry[voice] = entry if entry.get('language') == language else {**entry, 'language': language}
+        else:
+            report['failed'].append(voice)
+    report['removed'] = [voice for voice in registry if voice not in new_registry]
+    report['errors'] = {row['voice']: row['error'] for row in load_report.get('models', []) if not row['loaded']}
+    return new_registry, report
@@ -0,0 +1,223 @@
+# utils/model_pool.py
+import gc
+import logging
+import threading
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+from utils.exceptions import ModelLoadError
+from utils.model_loader import entry_matches_config, load_model_entry
+
+class LazyModelPool:
+    """Loads configured voices on first use and keeps the resident ones within a memory budget
+
+    The pool shares the voice registry of the server (voice -> loaded model
+    entry) and adds and removes entries in place. Voices loaded at startup are
+    pinned and never evicted. Voices loaded on demand are evicted least
+    recently used first when the weights of all resident models exceed the
+    budget, skipping voices with requests in flight.
+    """
+
+    def __init__(self, registry: Dict[str, dict], model_configs: List[dict], use_cuda: bool = False,
+                 languages: dict = None, memory_budget_bytes: int = 0, preprocessor_cache=None):
+        """Initialize the pool
+
+        Args:
+            registry (dict): Loaded model entries by voice, mutated by the pool
+            model_configs (list): Model configs of all voices that may be loaded
+            use_cuda (bool): Load models on GPU
+            languages (dict): Language names by code
+            memory_budget_bytes (int): Budget for the weights of resident models, 0 for no limit
+            preprocessor_cache (PreprocessorCache): Shared cache of the preprocessor results of loaded voices
+        """
+        self.registry = registry
+        self.configs = OrderedDict((config['voice'], config) for config in model_configs)
+        self.use_cuda = use_cuda
+        self.languages = languages
+        self.memory_budget_bytes = memory_budget_bytes
+        self.preprocessor_cache = preprocessor_cache
+        self.pinned = set(registry)
+
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._leases = Counter()
+        self._last_used = OrderedDict()  # on demand voices, least recently used first
+        self._footprints = {voice: self._footprint(entry) for voice, entry in registry.items()}
+        self.evictions = 0
+
+    @classmethod
+    def from_config(cls, registry: Dict[str, dict], model_configs: List[dict], settings: dict,
+                    use_cuda: bool = False, languages: dict = None,
+                    preprocessor_cache=None) -> 'LazyModelPool':
+        """Create a pool from the `lazy_loading` config section"""
+        return cls(
+            registry,
+            model_configs,
+            use_cuda=use_cuda,
+            languages=languages,
+            memory_budget_bytes=int(float(settings.get('memory_budget_mb') or 0) * 1024 * 1024),
+            preprocessor_cache=preprocessor_cache
+        )
+
+    @staticmethod
+    def _footprint(entry: dict) -> int:
+        try:
+            return int(entry['model'].memory_footprint())
+        except Exception:
+            return 0
+
+    def voices(self) -> List[Tuple[str, str]]:
+        """Get (voice, lang) of all voices the pool can serve, in config order"""
+        return [(voice, config['lang']) for voice, config in self.configs.items()]
+
+    def is_loadable(self, voice: str) -> bool:
+        return voice in self.configs
+
+    def is_resident(self, voice: str) -> bool:
+        return voice in self.registry
+
+    def lang(self, voice: str) -> str:
+        if voice in self.registry:
+            return self.registry[voice]['lang']
+        return self.configs[voice]['lang']
+
+    @property
+    def memory_used(self) -> int:
+        """Bytes of weights of all resident models"""
+        with self._lock:
+            return sum(self._footprints.get(voice, 0) for voice in self.registry)
+
+    def acquire(self, voice: str) -> dict:
+        """Load the voice if needed and keep it resident until `release`
+
+        Returns:
+            dict: Loaded model entry of the voice
+
+        Raises:
+            ModelLoadError: If the voice is unknown or fails to load
+        """
+        with self._lock:
+            load_lock = self._load_locks.setdefault(voice, threading.Lock())
+
+        # Concurrent first requests for a voice wait for a single load
+        with load_lock:
+            with self._lock:
+                entry = self.registry.get(voice)
+                if entry is not None:
+                    self._lease(voice)
+                    return entry
+                if voice not in self.configs:
+                    raise ModelLoadError(f"Voice {voice} is not configured")
+                # Make room up front when the size of the model is known from a previous load
+                self._evict(reserve=self._footprints.get(voice, 0))
+
+            logging.info(f"Loading voice {voice} on demand")
+            try:
+                entry = load_model_entry(dict(self.configs[voice]), self.use_cuda, self.languages,
+                                         self.preprocessor_cache)
+            except ModelLoadError:
+                raise
+            except Exception as e:
+                raise ModelLoadError(f"Failed to load voice {voice}: {str(e)}")
+            footprint = self._footprint(entry)
+
+            with self._lock:
+                self.registry[voice] = entry
+                self._footprints[voice] = footprint
+                self._lease(voice)
+                self._evict()
+            logging.info(f"Loaded voice {voice} ({footprint / 1024 / 1024:.1f} MB)")
+            return entry
+
+    def release(self, voice: str):
+        """Let the voice be evicted again once no request uses it"""
+        with self._lock:
+            if self._leases[voice] > 0:
+                self._leases[voice] -= 1
+            if self._leases[voice] == 0:
+                self._leases.pop(voice, None)
+                self._evict()
+
+    @contextmanager
+    def lease(self, voice: str):
+        """Context keeping the voice loaded while it's used"""
+        entry = self.acquire(voice)
+        try:
+            yield entry
+        finally:
+            self.release(voice)
+
+    def _lease(self, voice: str):
+        self._leases[voice] += 1
+        if voice not in self.pinned:
+            self._last_used[voice] = None
+            self._last_used.move_to_end(voice)
+
+    def _evict(self, reserve: int = 0):
+        """Unload least recently used voices until resident weights plus `reserve` fit the budget"""
+        if not self.memory_budget_bytes:
+            return
+        used = sum(self._footprints.get(voice, 0) for voice in self.registry)
+        evicted = False
+        for voice in list(self._last_used):
+            if used + reserve <= self.memory_budget_bytes:
+                break
+            if self._leases[voice] or voice not in self.registry:
+                continue
+            del self.registry[voice]
+            del self._last_used[voice]
+            used -= self._footprints.get(voice, 0)
+            self.evictions += 1
+            evicted = True
+            logging.info(f"Evicted voice {voice} to stay within the memory budget")
+
+        if used + reserve > self.memory_budget_bytes:
+            logging.warning(f"Resident models use {used / 1024 / 1024:.1f} MB, "
+                            f"over the budget of {self.memory_budget_bytes / 1024 / 1024:.1f} MB")
+        if evicted:
+            gc.collect()
+
+    def reconfigure(self, registry: Dict[str, dict], model_configs: List[dict], languages: dict = None) -> List[str]:
+        """Serve the voices of a reloaded config
+
+        The pool switches to `registry`, the voices loaded with the reloaded
+        config, which are pinned. Voices loaded on demand stay resident, and are
+        added to `registry`, if their config entry didn't change. The others are
+        dropped and load again with their new config on their next request.
+        Requests in flight keep the entries they acquired.
+
+        Returns:
+            list: Voices loaded on demand that stay resident
+        """
+        configs = OrderedDict((config['voice'], config) for config in model_configs)
+        footprints = {voice: self._footprint(entry) for voice, entry in registry.items()
+                      if voice not in self.registry or self.registry[voice]['model'] is not entry['model']}
+        with self._lock:
+            kept = []
+            for voice, entry in self.registry.items():
+                if voice in self.pinned or voice in registry or voice not in configs:
+                    continue
+                if entry_matches_config(entry, configs[voice], self.use_cuda):
+                    kept.append(voice)
+
+            self.pinned = set(registry)
+            for voice in kept:
+                registry[voice] = self.registry[voice]
+            self._footprints = {voice: footprints.get(voice, self._footprints.get(voice, 0)) for voice in registry}
+            self._last_used = OrderedDict((voice, None) for voice in self._last_used if voice in kept)
+            self.registry = registry
+            self.configs = configs
+            self.languages = languages
+            self._evict()
+        return kept
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'memory_budget_bytes': self.memory_budget_bytes,
+                'memory_used_bytes': sum(self._footprints.get(voice, 0) for voice in self.registry),
+                'resident': len(self.registry),
+                'loadable': len(self.configs),
+                'evictions': self.evictions
+            }
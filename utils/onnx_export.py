@@ -0,0 +1,156 @@
+# utils/onnx_export.py
+"""Export a configured VITS voice to ONNX, to serve it with the `onnx` backend
+
+MMS models (transformers VitsModel) and single speaker Coqui VITS models
+without external vocoder can be exported. The `.onnx` file is written with a
+metadata file next to it (same name, `.json`), holding the tokenizer and
+sample rate, and the Coqui training config for Coqui models.
+
+Usage:
+    python -m utils.onnx_export VOICE [--config config.json] [--output models/ca/voice.onnx]
+"""
+import os
+import sys
+import json
+import shutil
+import logging
+import argparse
+from typing import List, Optional
+import torch
+from utils.config_manager import ConfigManager
+from utils.exceptions import ConfigurationError
+from utils.model_factory import TTSModelFactory
+from utils.backends.onnx_runtime import onnx_metadata_path
+
+logger = logging.getLogger(__name__)
+
+ONNX_OPSET = 17
+
+class _MMSExportModule(torch.nn.Module):
+    """Forward pass of a VitsModel returning plain tensors, as traced for export"""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        outputs = self.model(input_ids=input_ids, attention_mask=attention_mask)
+        return outputs.waveform, outputs.sequence_lengths
+
+def mms_tokenizer_metadata(tokenizer) -> dict:
+    """Settings of a VitsTokenizer needed to tokenize without transformers"""
+    if tokenizer.phonemize or tokenizer.is_uroman:
+        raise ConfigurationError("Tokenizers that phonemize or romanize their input can't be exported")
+    return {
+        'vocab': tokenizer.encoder,
+        'vocabulary_words': list(tokenizer.encoder) + list(tokenizer.added_tokens_encoder),
+        'add_blank': tokenizer.add_blank,
+        'normalize': tokenizer.normalize,
+        'language': tokenizer.language,
+        'unk_token': str(tokenizer.unk_token)
+    }
+
+def export_mms(model, tokenizer, output_path: str):
+    """Export a transformers VitsModel and its tokenizer
+
+    Args:
+        model: VitsModel in eval mode
+        tokenizer: Its VitsTokenizer
+        output_path (str): Path of the `.onnx` file
+    """
+    metadata = {
+        'source': 'mms',
+        'sample_rate': model.config.sampling_rate,
+        'tokenizer': mms_tokenizer_metadata(tokenizer)
+    }
+    input_ids = torch.randint(1, max(2, model.config.vocab_size), (1, 50))
+    with torch.no_grad():
+        torch.onnx.export(
+            _MMSExportModule(model.eval()),
+            (input_ids, torch.ones_like(input_ids)),
+            output_path,
+            input_names=['input_ids', 'attention_mask'],
+            output_names=['waveform', 'sequence_lengths'],
+            dynamic_axes={
+                'input_ids': {0: 'batch_size', 1: 'tokens'},
+                'attention_mask': {0: 'batch_size', 1: 'tokens'},
+                'waveform': {0: 'batch_size', 1: 'samples'},
+                'sequence_lengths': {0: 'batch_size'}
+            },
+            opset_version=ONNX_OPSET
+        )
+    _write_metadata(output_path, metadata)
+
+def export_coqui(synthesizer, tts_config_path: str, output_path: str):
+    """Export a single speaker Coqui VITS model without external vocoder
+
+    Args:
+        synthesizer: Loaded Coqui Synthesizer
+        tts_config_path (str): Training config of the model, copied next to the export for its tokenizer
+        output_path (str): Path of the `.onnx` file
+    """
+    from TTS.tts.models.vits import Vits
+    tts_model = synthesizer.tts_model
+    if not isinstance(tts_model, Vits) or synthesizer.vocoder_model is not None:
+        raise ConfigurationError("Only Coqui VITS models without external vocoder can be exported")
+    if tts_model.num_speakers > 0 or getattr(tts_model, 'num_languages', 0) > 0:
+        raise ConfigurationError("Multi speaker and multilingual Coqui models can't be exported")
+
+    tts_config_name = os.path.splitext(os.path.basename(output_path))[0] + '.tts_config.json'
+    shutil.copyfile(tts_config_path, os.path.join(os.path.dirname(output_path), tts_config_name))
+    tts_model.export_onnx(output_path, verbose=False)
+    _write_metadata(output_path, {
+        'source': 'coqui',
+        'sample_rate': synthesizer.output_sample_rate,
+        'tts_config': tts_config_name,
+        'scales': [float(scale) for scale in (tts_model.inference_noise_scale, tts_model.length_scale,
+                                              tts_model.inference_noise_scale_dp)]
+    })
+
+def _write_metadata(output_path: str, metadata: dict):
+    with open(onnx_metadata_path(output_path), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+def export_voice(model_config: dict, output_path: str):
+    """Load a configured mms or coqui voice and export it to output_path"""
+    model_type = model_config.get('model_type')
+    if model_type not in ('mms', 'coqui'):
+        raise ConfigurationError(f"Voices of type {model_type} can't be exported to ONNX")
+
+    model = TTSModelFactory.create_model(dict(model_config, use_cuda=False))
+    model.load_model()
+    model.freeze()
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    if model_type == 'mms':
+        export_mms(model.model, model.tokenizer, output_path)
+    else:
+        export_coqui(model.synthesizer, os.path.join(model.models_root, model_config['tts_config_path']),
+                     output_path)
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Export a configured voice to ONNX")
+    parser.add_argument('voice', help="Voice to export, as in config.json")
+    parser.add_argument('--config', default=os.getenv('TTS_API_CONFIG', 'config.json'), help="Config file")
+    parser.add_argument('--output', help="Path of the .onnx file (default: <models_root>/<lang>/<voice>.onnx)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    config_manager = ConfigManager(args.config)
+    model_config = config_manager.get_model_config(args.voice)
+    if model_config is None:
+        parser.error(f"Voice {args.voice} not found in {args.config}")
+    os.environ.setdefault('MODELS_ROOT', config_manager.models_root)
+    output = args.output or os.path.join(config_manager.models_root, model_config['lang'], f"{args.voice}.onnx")
+
+    export_voice(model_config, output)
+    print(json.dumps({
+        'voice': f"{args.voice}-onnx",
+        'lang': model_config['lang'],
+        'model_type': 'onnx',
+        'onnx_model_path': os.path.relpath(output, config_manager.models_root),
+        'load': True
+    }, indent=4))
+    print(f"Exported {args.voice} to {output}, add the entry above to {args.config} to serve it", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+# utils/preprocessor_cache.py
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+class PreprocessorCache:
+    """LRU cache of normalized texts keyed by language, preprocessor module and raw text
+
+    Preprocessors are deterministic for a language, so the normalization of a
+    repeated sentence is reused across requests and voices sharing a
+    preprocessor. Batch preprocessors are only called with the texts missing
+    from the cache, and not at all when every text is cached, which saves the
+    external Cotovia run of Galician.
+
+    The cache holds at most `max_entries` texts. Texts longer than
+    `max_text_length` characters are unlikely to repeat and are not cached.
+    Failed normalizations (exceptions, None results) are never cached.
+    """
+
+    def __init__(self, max_entries: int = 10000, max_text_length: int = 1000):
+        """Initialize the cache
+
+        Args:
+            max_entries (int): Number of cached texts. 0 disables the cache.
+            max_text_length (int): Length of the longest text cached
+        """
+        self.max_entries = max(0, int(max_entries))
+        self.max_text_length = max(0, int(max_text_length))
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, settings: dict) -> 'PreprocessorCache':
+        """Create a cache from the `preprocessor_cache` config section"""
+        return cls(
+            max_entries=settings.get('max_entries', 10000),
+            max_text_length=settings.get('max_text_length', 1000)
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _cacheable(self, text) -> bool:
+        return isinstance(text, str) and len(text) <= self.max_text_length
+
+    def get(self, key: tuple) -> Optional[str]:
+        """Return the normalized text cached for key or None on a miss"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: tuple, value: str):
+        """Store the normalized text of key, evicting the least recently used texts above the limit"""
+        if value is None:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def wrap(self, lang: str, module_name: str, preprocess: Callable[[str], str]) -> Callable[[str], str]:
+        """Cache the results of a preprocessor normalizing one text"""
+        if not self.enabled:
+            return preprocess
+
+        def cached_preprocess(text):
+            if not self._cacheable(text):
+                return preprocess(text)
+            key = (lang, module_name, text)
+            value = self.get(key)
+            if value is None:
+                value = preprocess(text)
+                self.put(key, value)
+            return value
+        return cached_preprocess
+
+    def wrap_batch(self, lang: str, module_name: str,
+                   preprocess_batch: Callable[[List[str]], List[str]]) -> Callable[[List[str]], List[str]]:
+        """Cache the results of a preprocessor normalizing a list of texts in one call
+
+        The wrapped function calls the preprocessor once with the distinct texts
+        that aren't cached.
+        """
+        if not self.enabled:
+            return preprocess_batch
+
+        def cached_preprocess_batch(texts):
+            results = [None] * len(texts)
+            missing = OrderedDict()  # text to the indices waiting for it
+            for i, text in enumerate(texts):
+                value = self.get((lang, module_name, text)) if self._cacheable(text) else None
+                if value is None:
+                    missing.setdefault(text, []).append(i)
+                else:
+                    results[i] = value
+
+            if missing:
+                outputs = preprocess_batch(list(missing))
+                for (text, indices), value in zip(missing.items(), outputs):
+                    for i in indices:
+                        results[i] = value
+                    if self._cacheable(text):
+                        self.put((lang, module_name, text), value)
+            return results
+        return cached_preprocess_batch
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'items': len(self._entries),
+                'max_entries': self.max_entries
+            }
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 MAX_NUMERO = 999999999999
 
 UNIDADES = (
@@ -52,14 +54,49 @@ CIENTOS = (
     'nou-cents'
 )
 
+# Numbers up to TABLE_SIZE - 1 are read from a table built at import, the most frequent ones in text
+TABLE_SIZE = 10000
+# Bound of the cache of other numbers (decimals, negatives, millions)
+CACHE_SIZE = 4096
+
 def num_let(numero):
+    if isinstance(numero, int) and 0 <= numero < TABLE_SIZE:
+        return NUMEROS[numero]
+    return num_let_cached(numero)
+
+@lru_cache(maxsize=CACHE_SIZE)
+def num_let_cached(numero):
     numero_entero = int(numero)
     letras_decimal = ''
     parte_decimal = int(round((abs(numero) - abs(numero_entero)) * 100))
     if parte_decimal > 9:
-        letras_decimal = 'coma %s' % num_let(parte_decimal)
+        letras_decimal = 'coma %s' % NUMEROS[parte_decimal]
     elif parte_decimal > 0:
-        letras_decimal = 'coma cero %s' % num_let(parte_decimal)
+        letras_decimal = 'coma cero %s' % NUMEROS[parte_decimal]
+    resultado = leer_entero(numero_entero)
+    if parte_decimal > 0:
+        resultado = '%s %s' % (resultado, letras_decimal)
+    return resultado
+
+def leer_entero(numero):
+    if 0 <= numero < TABLE_SIZE:
+        return NUMEROS[numero]
+    # Thousands and millions are composed from the table, with the same words as leer_numero
+    if TABLE_SIZE <= numero <= 999999:
+        millar, centena = divmod(numero, 1000)
+        resultado = ('%s mil' % NUMEROS[millar]).replace('uno mil', 'un mil')
+        if centena > 0:
+            resultado = '%s %s' % (resultado, NUMEROS[centena])
+        return resultado
+    if 2000000 <= numero <= 999999999:
+        millon, millar = divmod(numero, 1000000)
+        resultado = ('%s milions' % NUMEROS[millon]).replace('uno mil', 'un mil')
+        if millar > 0:
+            resultado = '%s %s' % (resultado, leer_entero(millar))
+        return resultado
+    return leer_numero(numero)
+
+def leer_numero(numero_entero):
     if (numero_entero <= 99):
         resultado = leer_decenas(numero_entero)
     elif (numero_entero <= 999):
@@ -74,11 +111,8 @@ def num_let(numero):
     resultado = resultado.strip()
     resultado = resultado.replace(' _ ', ' ')
     resultado = resultado.replace('  ', ' ')
-    if parte_decimal > 0:
-        resultado = '%s %s' % (resultado, letras_decimal)
     return resultado
     
-    
 def leer_decenas(numero):
     if numero < 10:
         return UNIDADES[numero]
@@ -142,4 +176,6 @@ def leer_millones(numero):
 
 def leer_millardos(numero):
     millardo, millon = divmod(numero, 1000000)
-    return '%s milions %s' % (leer_miles(millardo), leer_millones(millon))
\ No newline at end of file
+    return '%s milions %s' % (leer_miles(millardo), leer_millones(millon))
+
+NUMEROS = tuple(leer_numero(numero) for numero in range(TABLE_SIZE))
@@ -1,8 +1,5 @@
 from .cat_number_letter import num_let
-from collections import Counter
 import re
-from urllib.parse import urlparse
-import csv
 import logging
 import os
 
@@ -22,52 +19,38 @@ ENDING_PUNCTUATION = ["?", ".", "!"]
 URL_PATTERN = re.compile(r'^(https?://|www\.)\S+', re.IGNORECASE)
 ALLOWED_IN_NUMERICAL = [',', '.', '/']
 
+# Precompiled patterns
+date_pattern = r'\b(\d{2})\.(\d{2})\.(\d{4})\b'
+DATE_PATTERN = re.compile(date_pattern)
+# HH.MM format
+TIME_PATTERN = re.compile(r'\b(0[0-9]|1[0-9]|2[0-3])\.([0-5][0-9])\b')
+NONNUMBER_PATTERN = re.compile(r'[^0-9]\.')
+SPACES_PATTERN = re.compile(' +')
+# A punctuation mark followed by a space or the end of the text closes a segment
+PUNC_SPLIT_PATTERN = re.compile('([' + re.escape(''.join(PUNCLIST)) + r'])(?=\s|\Z)')
+# Tokens that separate_numbers_from_text leaves untouched: ASCII digits and numeric separators only
+PLAIN_NUMBER_PATTERN = re.compile(r'[0-9.,/]*\Z')
+SPECIAL_SYMBOLS = str.maketrans({'Ö': 'o', 'ö': 'o', '|': 'o', 'ş': 'x', 'Ş': 'x', 'İ': 'i', 'ı': 'i',
+                                 '(': ', ', ')': ''})
+
 #Splits text from punctuation marks, gives list of segments in between and the punctuation marks. Skips punctuation not present in training.
 def split_punc(text):
-    text = fix_date(text)
-    segments = []
-    puncs = []
-    curr_seg = ""
-    for i, c in enumerate(text):
-        #check next char
-        next_is_space_or_end = False
-        if i < len(text) - 1:
-            next_is_space_or_end = text[i+1].isspace()
-        else:
-            next_is_space_or_end = True
-        if c in PUNCLIST and next_is_space_or_end:
-            segments.append(curr_seg.strip())
-            puncs.append(c)
-            curr_seg = ""
-        else:
-            curr_seg += c
-    
-    segments.append(curr_seg.strip())
-
+    parts = PUNC_SPLIT_PATTERN.split(fix_date(text))
+    segments = [segment.strip() for segment in parts[::2]]
+    puncs = parts[1::2]
     return segments, puncs
 
-date_pattern = r'\b(\d{2})\.(\d{2})\.(\d{4})\b'
-
 def fix_date(text):
-    # Use re.sub() to replace dots with slashes in matched dates
-    converted_text = re.sub(date_pattern, r'\1/\2/\3', text)
-    return converted_text
+    # Replace dots with slashes in matched dates
+    return DATE_PATTERN.sub(r'\1/\2/\3', text)
 
 def merge_punc(text_segs, puncs):
-    merged_str = ""
-    for i, seg in enumerate(text_segs):
-        merged_str += seg
-        
-        if i < len(puncs):
-            merged_str += puncs[i] + " "
-    return merged_str.strip()
+    merged = [seg + puncs[i] + " " if i < len(puncs) else seg for i, seg in enumerate(text_segs)]
+    return ''.join(merged).strip()
 
 def extract_time(text):
-    # Regular expression pattern for HH.MM format
-    pattern = r'\b(0[0-9]|1[0-9]|2[0-3])\.([0-5][0-9])\b'
-    
     # Find the first match
-    match = re.search(pattern, text)
+    match = TIME_PATTERN.search(text)
     
     if match:
         # Extract hour and minute as integers
@@ -78,8 +61,6 @@ def extract_time(text):
         return None, None
 
 def read_hours(hour_part, minute_part):
-    # hour_processed = num_let(int(remove_nonnumber(hour_part)))
-    # minute_processed = num_let(int(remove_nonnumber(minute_part)))
     text = num_let(hour_part) + " i " + num_let(minute_part)
     return text
 
@@ -95,31 +76,30 @@ def read_dates(text):
     text = day_processed + " de " + month_processed + " de " + year_processed
     return text
 
+#Puts spaces between letters and digits, and around symbols other than numeric separators
 def separate_numbers_from_text(expression):
+    if PLAIN_NUMBER_PATTERN.match(expression):
+        return expression
+
     prev_was_digit = False
     prev_was_alpha = False
-    separated_expression = ''
-    for i, c in enumerate(expression):
+    separated = []
+    for c in expression:
         curr_alpha = c.isalpha()
         curr_digit = c.isdigit()
-        if curr_alpha and prev_was_digit:
-            separated_expression += ' ' + c
-            prev_was_alpha = curr_alpha
-            prev_was_digit = curr_digit
-        elif curr_digit and prev_was_alpha:
-            separated_expression += ' ' + c
-            prev_was_alpha = curr_alpha
-            prev_was_digit = curr_digit
-        elif curr_alpha or curr_digit:
-            separated_expression += c
+        if curr_alpha or curr_digit:
+            if (curr_alpha and prev_was_digit) or (curr_digit and prev_was_alpha):
+                separated.append(' ')
+            separated.append(c)
             prev_was_alpha = curr_alpha
             prev_was_digit = curr_digit
         elif c in ALLOWED_IN_NUMERICAL:
-            separated_expression += c
+            separated.append(c)
         else:
-            separated_expression += ' ' + c
+            separated.append(' ')
+            separated.append(c)
             
-    return separated_expression
+    return ''.join(separated)
 
 def pronounce_letter(letter):
     return LETTERS.get(letter.lower(), letter)
@@ -133,42 +113,46 @@ def pronounce_unit(unit):
 def pronounce_acronym(text):
     return ACRONYMS.get(text, text)
 
+#Acronym, url, letter and symbol passes of a token, in this order
+def pronounce_token(tok):
+    return pronounce_symbol(pronounce_letter(convert_url(pronounce_acronym(tok))))
+
 def convert_numbered(exp, next_token=""):
-    exp = separate_numbers_from_text(exp)
-    tokens = exp.split()
+    tokens = separate_numbers_from_text(exp).split()
     
-    converted = ''
+    converted = []
     
     for tok in tokens:
         if has_numbers(tok):
             h,m = extract_time(tok)
             if h and m:
                 try:
-                    converted += read_hours(h, m)
+                    converted.append(read_hours(h, m))
                 except Exception as e:
                     logger.error(f"time conversion fail '{tok}' {e}")
+                    converted.append('')
             elif tok.count('/') == 2 or tok.count('-') == 2:
                 #condition that follows DD/MM/YYYY
                 try:
-                    converted += read_dates(tok)
+                    converted.append(read_dates(tok))
                 except Exception as e:
                     logger.error(f"date conversion fail '{tok}' {e}")
+                    converted.append('')
             else:   
                 try: 
                     tok = tok.replace(".", "")
                     tok = tok.replace(",", ".")
-                    converted += num_let(float(remove_nonnumber(tok)))
+                    converted.append(num_let(float(remove_nonnumber(tok))))
                 except Exception as e:
                     logger.error(f"number conversion fail '{tok}' {e}")
+                    converted.append('')
         else:
-            converted_tok = pronounce_unit(tok)
-            converted_tok = pronounce_symbol(converted_tok)
+            converted_tok = pronounce_symbol(pronounce_unit(tok))
             if len(converted_tok) == 1:    
                 converted_tok = pronounce_letter(converted_tok)
-            converted += converted_tok
-        converted += " "
+            converted.append(converted_tok)
 
-    return converted.strip()
+    return ' '.join(converted).strip()
 
 def is_url(expression):
     return bool(URL_PATTERN.match(expression))
@@ -179,35 +163,43 @@ def convert_url(text):
         text = text.replace('https://', '')
         text = text.replace('www', 've doble ve doble ve doble ')
         text = text.replace('.', ' punt ')
-        text = re.sub(' +', ' ', text)
+        text = SPACES_PATTERN.sub(' ', text)
     return text
 
 def has_numbers(inputString):
-    return any(char.isdigit() for char in inputString)
+    return any(map(str.isdigit, inputString))
 
 def remove_nonnumber(text):
-    return re.sub('[^0-9]\.','', text)
+    return NONNUMBER_PATTERN.sub('', text)
 
 def fix_special_symbols(text):
-    text = re.sub('[Ö|ö]', 'o', text)
-    text = re.sub('[ş|Ş]', 'x', text)
-    text = re.sub('[İ|ı]', 'i', text)
-    text = text.replace("(", ", ")
-    text = text.replace(")", "")
-    return text
-
+    return text.translate(SPECIAL_SYMBOLS)
+
+# Final pronunciation of every lexicon entry, so that tokens found in the lexicons are resolved with a single lookup.
+# Tokens outside it can't be acronyms, and go through the remaining passes
+LEXICON = {
+    tok: pronounce_token(tok)
+    for tok in [*ACRONYMS, *SYMBOLS, *LETTERS, *(letter.upper() for letter in LETTERS)]
+}
+
+def lookup_token(tok):
+    pronounced = LEXICON.get(tok)
+    if pronounced is None:
+        pronounced = pronounce_symbol(pronounce_letter(convert_url(tok)))
+    return pronounced
+
+# Normalizes a sentence in a single pass over its tokens: numbers, units following numbers, and lexicon entries
+# (acronyms, urls, letters, symbols) are spelled out
 def text_preprocess(text):
-    text = fix_special_symbols(text)
-    segs, puncs = split_punc(text)
+    segs, puncs = split_punc(fix_special_symbols(text))
 
     new_segs = []
     number_behind = False
 
     for seg in segs:
         new_seg_tokens = []
-        seg_tokens = seg.split()
 
-        for tok in seg_tokens:
+        for tok in seg.split():
             try:
                 if has_numbers(tok):
                     tok = convert_numbered(tok)
@@ -216,10 +208,7 @@ def text_preprocess(text):
                     tok = pronounce_unit(tok)
                     number_behind = False
 
-                tok = pronounce_acronym(tok)
-                tok = convert_url(tok)
-                tok = pronounce_letter(tok)
-                tok = pronounce_symbol(tok)
+                tok = lookup_token(tok)
             except Exception as e:
                 logger.error(f"Normalization fail. {e}")
                 
@@ -232,4 +221,3 @@ def text_preprocess(text):
         puncs.append('.')
 
     return merge_punc(new_segs,puncs)
-
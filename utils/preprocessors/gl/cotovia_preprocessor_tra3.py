@@ -1,10 +1,14 @@
 import re
 import os
 import subprocess
+import tempfile
 import logging
 
 COTOVIA_IN_TXT_PATH = 'text.txt'
 COTOVIA_OUT_TRA_PATH = 'text.tra'
+# Each call gets its own workspace, on tmpfs when available
+COTOVIA_WORK_DIR = os.getenv('COTOVIA_WORK_DIR', '/dev/shm' if os.access('/dev/shm', os.W_OK) else None)
+FAKE_COTOVIA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_cotovia.sh')
 TRA3 = True
 
 PUNCLIST = [';', '?', '¿', ',', ':', '.', '!', '¡']
@@ -39,28 +43,29 @@ def remove_tra3_tags(phontrans):
     return s.strip()
 
 def to_cotovia(text_segments, tra3=TRA3):
-    with open(COTOVIA_IN_TXT_PATH, 'w') as f:
-        for seg in text_segments:
-            if seg:
-                f.write(seg + '\n')
-            else:
-                f.write(',' + '\n')
-
-    if SIMULATE_COTOVIA:
-        subprocess.run(["bash", "./utils/preprocessors/gl/fake_cotovia.sh", COTOVIA_IN_TXT_PATH])
-    elif tra3:
-        subprocess.run(["cotovia", "-i", COTOVIA_IN_TXT_PATH, "-t3", "-n"], stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
-    else:
-        subprocess.run(["cotovia", "-i", COTOVIA_IN_TXT_PATH, "-t1", "-n"], stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
-
-    segs = []
-    try:
-        with open(COTOVIA_OUT_TRA_PATH, 'r') as f:
-            segs = [line.rstrip() for line in f]
-            if tra3:
-                segs = [remove_tra3_tags(line) for line in segs]
-    except:
-        logger.error("ERROR: Couldn't read cotovia output")
+    with tempfile.TemporaryDirectory(prefix='cotovia-', dir=COTOVIA_WORK_DIR) as workdir:
+        with open(os.path.join(workdir, COTOVIA_IN_TXT_PATH), 'w') as f:
+            for seg in text_segments:
+                if seg:
+                    f.write(seg + '\n')
+                else:
+                    f.write(',' + '\n')
+
+        if SIMULATE_COTOVIA:
+            subprocess.run(["bash", FAKE_COTOVIA_PATH, COTOVIA_IN_TXT_PATH], cwd=workdir)
+        elif tra3:
+            subprocess.run(["cotovia", "-i", COTOVIA_IN_TXT_PATH, "-t3", "-n"], cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+        else:
+            subprocess.run(["cotovia", "-i", COTOVIA_IN_TXT_PATH, "-t1", "-n"], cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+
+        segs = []
+        try:
+            with open(os.path.join(workdir, COTOVIA_OUT_TRA_PATH), 'r') as f:
+                segs = [line.rstrip() for line in f]
+                if tra3:
+                    segs = [remove_tra3_tags(line) for line in segs]
+        except:
+            logger.error("ERROR: Couldn't read cotovia output")
 
     return segs
 
@@ -102,4 +107,24 @@ def text_preprocess(text):
     phon_str = accent_convert(cotovia_phon_str)
 
     return phon_str
+
+#Preprocesses several texts with a single cotovia run. The segments of all texts are sent together and the
+#transcriptions are split back per text. Falls back to one run per text if cotovia's output doesn't line up.
+def text_preprocess_batch(texts):
+    splits = [split_punc(text) for text in texts]
+    all_segments = [seg for text_segments, _ in splits for seg in text_segments]
+
+    cotovia_phon_segs = to_cotovia(all_segments)
+    if len(cotovia_phon_segs) != len(all_segments):
+        logger.warning(f"Cotovia returned {len(cotovia_phon_segs)} lines for {len(all_segments)} segments, preprocessing texts one by one")
+        return [text_preprocess(text) for text in texts]
+
+    results = []
+    start = 0
+    for text_segments, puncs in splits:
+        phon_segs = cotovia_phon_segs[start:start + len(text_segments)]
+        start += len(text_segments)
+        results.append(accent_convert(merge_punc(phon_segs, puncs)))
+
+    return results
     
\ No newline at end of file
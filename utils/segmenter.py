@@ -0,0 +1,135 @@
+# utils/segmenter.py
+import re
+from typing import FrozenSet, List, Optional
+
+# Abbreviations (lowercase, without their final period) that are usually followed by a capitalized word or a
+# number, and so would otherwise end a sentence: titles, and the short forms before street names.
+# Abbreviations usually found before lowercase words (e.g. "etc.") don't need to be listed, periods followed by
+# lowercase never end a sentence
+ABBREVIATIONS = {
+    'ca': frozenset({
+        'sr', 'sra', 'srs', 'sres', 'srta', 'dr', 'dra', 'drs', 'dres', 'prof', 'profa', 'mn', 'mons', 'st', 'sta',
+        'núm', 'pàg', 'pàgs', 'fig', 'av', 'avda', 'ctra', 'pl', 'pg', 'pça', 'tel', 'aprox', 'dept', 'esq', 'dta',
+        'vs', 'cit', 'ibid'
+    }),
+    'gl': frozenset({
+        'sr', 'sra', 'srs', 'sras', 'srta', 'dr', 'dra', 'prof', 'profa', 'dna', 'sto', 'sta', 'núm', 'páx', 'páxs',
+        'fig', 'av', 'avda', 'ctra', 'pza', 'tel', 'apdo', 'aprox', 'dpto', 'vs', 'cit', 'ibid'
+    }),
+    'es': frozenset({
+        'sr', 'sra', 'sres', 'sras', 'srta', 'dr', 'dra', 'prof', 'profa', 'dña', 'sto', 'sta', 'ud', 'uds', 'vd',
+        'vds', 'excmo', 'excma', 'ilmo', 'ilma', 'lic', 'ing', 'núm', 'pág', 'págs', 'fig', 'av', 'avda', 'ctra',
+        'pza', 'tel', 'apdo', 'aprox', 'dpto', 'ej', 'vs', 'cit', 'ibid'
+    }),
+    'lad': frozenset({
+        'sr', 'sra', 'srta', 'sinyor', 'dr', 'dra', 'prof', 'num', 'pag', 'av', 'sto', 'sta', 'vs'
+    }),
+    'en': frozenset({
+        'mr', 'mrs', 'ms', 'mx', 'dr', 'prof', 'rev', 'hon', 'st', 'sr', 'jr', 'gen', 'col', 'lt', 'sgt', 'capt',
+        'gov', 'sen', 'rep', 'mt', 'nos', 'eds', 'ch', 'ave', 'blvd', 'rd', 'inc', 'ltd', 'corp', 'dept', 'approx',
+        'vs', 'cf'
+    }),
+    'tr': frozenset({
+        'dr', 'prof', 'doç', 'yrd', 'öğr', 'gör', 'av', 'vb', 'bkz', 'cad', 'sok', 'mah', 'apt', 'sn'
+    })
+}
+
+# Abbreviations that are also ordinary words ("cap", "no", "art"...): they only count as abbreviations before a
+# number ("cap. 3", "no. 5"), and otherwise end a sentence like any word
+NUMBER_ABBREVIATIONS = {
+    'ca': frozenset({'cap', 'vol', 'art', 'arts', 'ed', 'ex', 'op'}),
+    'gl': frozenset({'cap', 'vol', 'art', 'ed', 'ex', 'op'}),
+    'es': frozenset({'cap', 'vol', 'art', 'ed', 'op'}),
+    'lad': frozenset({'no', 'kap', 'vol', 'art', 'ed'}),
+    'en': frozenset({'no', 'vol', 'fig', 'ed', 'art', 'co'}),
+    'tr': frozenset({'no'})
+}
+
+# Languages without their own lists get all of them. Words that are ordinary words in some language only count
+# before a number
+ALL_NUMBER_ABBREVIATIONS = frozenset().union(*NUMBER_ABBREVIATIONS.values())
+ALL_ABBREVIATIONS = frozenset().union(*ABBREVIATIONS.values()) - ALL_NUMBER_ABBREVIATIONS
+
+# Sentence end: terminal punctuation, closing quotes or brackets, then whitespace
+SENTENCE_END_PATTERN = re.compile(r'([.!?…।]+)(["\'»”’)\]]*)\s+')
+# Where to break a long sentence: after clause punctuation, or before a dash between spaces
+CLAUSE_BREAK_PATTERN = re.compile(r'[,;:)\]»”](?=\s)|(?<=\s)(?=[—–-]\s)')
+WHITESPACE_PATTERN = re.compile(r'\s')
+ELISION_PATTERN = re.compile(r"^\w+['’]")
+
+def abbreviations_for(lang: Optional[str], before_number: bool = False) -> FrozenSet[str]:
+    """Abbreviations of a language, including those that are also ordinary words if a number follows"""
+    if lang not in ABBREVIATIONS:
+        return ALL_ABBREVIATIONS | ALL_NUMBER_ABBREVIATIONS if before_number else ALL_ABBREVIATIONS
+    if before_number:
+        return ABBREVIATIONS[lang] | NUMBER_ABBREVIATIONS.get(lang, frozenset())
+    return ABBREVIATIONS[lang]
+
+def _is_abbreviation(word: str, abbreviations: FrozenSet[str]) -> bool:
+    # Without opening punctuation and elided articles (l'Av., n'Sr.)
+    word = ELISION_PATTERN.sub('', word.lstrip('¿¡"\'«“‘([')).lower()
+    # Initials (J. R. R. Tolkien) and dotted abbreviations (p.ex., EE.UU.)
+    return word.replace('.', '').isalpha() and (len(word) == 1 or '.' in word) or word in abbreviations
+
+def split_sentences(text: str, lang: Optional[str] = None) -> List[str]:
+    """Split text into sentences, knowing the abbreviations of the language
+
+    A sentence ends at terminal punctuation followed by whitespace, unless
+    the next word is lowercase, or the punctuation is a single period closing
+    an abbreviation or an initial. Abbreviations that are also ordinary words
+    ("cap.", "no.") only hold the sentence open before a number.
+
+    Args:
+        text (str): Text to split
+        lang (str): Language code, for its abbreviations. Unknown languages get those of all languages
+
+    Returns:
+        list: Sentences, stripped, without empty ones
+    """
+    abbreviations = abbreviations_for(lang)
+    number_abbreviations = abbreviations_for(lang, before_number=True)
+    sentences = []
+    start = 0
+    for match in SENTENCE_END_PATTERN.finditer(text):
+        following = text[match.end():match.end() + 1]
+        if following.islower():
+            continue
+        if match.group(1) == '.':
+            preceding = text[start:match.start()].rsplit(None, 1)
+            if preceding and _is_abbreviation(preceding[-1], number_abbreviations if following.isdigit()
+                                              else abbreviations):
+                continue
+        sentences.append(text[start:match.end()].strip())
+        start = match.end()
+    sentences.append(text[start:].strip())
+    return [sentence for sentence in sentences if sentence]
+
+def split_chunks(text: str, max_chars: int) -> List[str]:
+    """Break text into chunks of at most max_chars characters
+
+    Each chunk ends at the last clause punctuation (comma, semicolon, colon,
+    dash...) within the limit, or at the last whitespace if there's none in
+    the last two thirds of the chunk. Words longer than the limit are cut.
+
+    Args:
+        text (str): Text to break, usually one sentence
+        max_chars (int): Maximum chunk length, 0 for no limit
+
+    Returns:
+        list: Chunks, stripped, without empty ones
+    """
+    text = text.strip()
+    chunks = []
+    while max_chars > 0 and len(text) > max_chars:
+        window = text[:max_chars + 1]
+        breaks = [match.end() for match in CLAUSE_BREAK_PATTERN.finditer(window) if match.end() >= max_chars // 3]
+        spaces = [match.start() for match in WHITESPACE_PATTERN.finditer(window) if match.start() > 0]
+        cut = breaks[-1] if breaks else spaces[-1] if spaces else max_chars
+        chunks.append(text[:cut].strip())
+        text = text[cut:].strip()
+    chunks.append(text)
+    return [chunk for chunk in chunks if chunk]
+
+def segment(text: str, lang: Optional[str] = None, max_chars: int = 0) -> List[str]:
+    """Split text into sentences, breaking those longer than max_chars into chunks"""
+    return [chunk for sentence in split_sentences(text, lang) for chunk in split_chunks(sentence, max_chars)]
@@ -1,8 +1,8 @@
 import os
 import json
-from typing import Union
+from typing import List, Optional, Union
 import string
-from nltk.tokenize import sent_tokenize
+from utils.segmenter import segment
 
 ENDING_PUNCTUATION = ["?", ".", "!"] #TODO: Latin only
 
@@ -33,8 +33,7 @@ def universal_text_normalize(text: str):
 
     return text
 
-#Parse sentences from text using NLTK sent_tokenize. (Warning: English-based)
-def parse_sents(text:str):
-    sents = []
-    sent_candidates = sent_tokenize(text.strip())
-    return sent_candidates 
\ No newline at end of file
+#Parse sentences from text, with the abbreviations of the language. Sentences longer than max_chars are broken
+#into chunks at clause punctuation or whitespace (see utils/segmenter.py)
+def parse_sents(text: str, lang: Optional[str] = None, max_chars: int = 0) -> List[str]:
+    return segment(text.strip(), lang, max_chars) 
\ No newline at end of file
@@ -0,0 +1,167 @@
+# utils/warmup.py
+import os
+import time
+import logging
+import threading
+from typing import Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Representative sentences per language: punctuation, numbers, dates and abbreviations, so the first run of each
+# preprocessor path and a spread of input lengths happen before real traffic
+WARMUP_SENTENCES = {
+    'ca': [
+        "Bon dia, com estàs?",
+        "El tren de les 8:15 surt de l'andana 3 amb 25 minuts de retard.",
+        "Avui és dimecres, 12 de març de 2025, i la reunió serà a la sala 104 del c/ Major."
+    ],
+    'gl': [
+        "Bos días, como estás?",
+        "O tren das 8:15 sae da vía 3 con 25 minutos de atraso.",
+        "Hoxe é mércores, 12 de marzo de 2025, e a xuntanza será na sala 104 da rúa Maior."
+    ],
+    'lad': [
+        "Buenos diyas, komo estash?",
+        "El tren de las 8:15 sale de la estasyon kon 25 minutos de retardo.",
+        "Oy es miercoles, 12 de marso de 2025, i la reunyon va ser en la kamareta 104."
+    ],
+    'es': [
+        "Buenos días, ¿cómo estás?",
+        "El tren de las 8:15 sale del andén 3 con 25 minutos de retraso.",
+        "Hoy es miércoles, 12 de marzo de 2025, y la reunión será en la sala 104 de la calle Mayor."
+    ],
+    'en': [
+        "Good morning, how are you?",
+        "The 8:15 train leaves from platform 3 with a 25 minute delay.",
+        "Today is Wednesday, March 12, 2025, and the meeting will be in room 104 on Main Street."
+    ],
+    'tr': [
+        "Günaydın, nasılsın?",
+        "Saat 8:15 treni 3. perondan 25 dakika gecikmeyle kalkıyor.",
+        "Bugün 12 Mart 2025 Çarşamba, toplantı Ana Cadde'deki 104 numaralı salonda olacak."
+    ]
+}
+
+# (voice, sentences): synthesizes sentences with a voice, as requests do
+WarmUpSynthesize = Callable[[str, List[str]], None]
+
+class WarmUp:
+    """Synthesizes a few sentences with each voice before the process takes traffic
+
+    The first requests to a voice pay for lazy kernel initialization,
+    allocator growth and tokenizer warmup. Warm-up runs each sentence of the
+    voice's language on its own, then all of them as one batch, `rounds`
+    times, and the process reports itself ready when it has finished.
+
+    Warm-up runs in each worker process after it's forked, as thread pools
+    and ONNX Runtime sessions are per process. It runs either before the
+    worker accepts connections, or on a background thread while the readiness
+    endpoint answers 503. A voice failing warm-up is logged and doesn't keep
+    the process from becoming ready.
+    """
+
+    def __init__(self, enabled: bool = True, rounds: int = 1, sentences: Dict[str, List[str]] = None):
+        """Initialize the warm-up
+
+        Args:
+            enabled (bool): Run warm-up. When disabled the process is ready right away
+            rounds (int): Number of times the sentences are synthesized with each voice
+            sentences (dict): Sentences by language, replacing the built-in ones of those languages
+        """
+        self.enabled = enabled
+        self.rounds = max(1, int(rounds))
+        self.sentences = {**WARMUP_SENTENCES, **(sentences or {})}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._state = 'pending' if enabled else 'ready'
+        self._voices = {}
+        self._started = None
+        self._seconds = None
+
+    @classmethod
+    def from_config(cls, settings: dict) -> 'WarmUp':
+        """Create a warm-up from the `warmup` config section"""
+        return cls(
+            enabled=settings.get('enabled', True),
+            rounds=settings.get('rounds', 1),
+            sentences=settings.get('sentences')
+        )
+
+    def sentences_for(self, lang: str) -> List[str]:
+        return self.sentences.get(lang) or WARMUP_SENTENCES['en']
+
+    def run(self, voices: Dict[str, str], synthesize: WarmUpSynthesize) -> dict:
+        """Warm up voices in the calling thread
+
+        Args:
+            voices (dict): Language of each voice to warm up
+            synthesize: Function synthesizing a list of sentences with a voice, see WarmUpSynthesize
+
+        Returns:
+            dict: Warm-up status, see status
+        """
+        with self._lock:
+            self._state = 'running'
+            self._started = time.perf_counter()
+            self._voices = {voice: {'lang': lang, 'seconds': None, 'error': None} for voice, lang in voices.items()}
+
+        for voice, lang in voices.items():
+            sentences = self.sentences_for(lang)
+            start = time.perf_counter()
+            try:
+                for _ in range(self.rounds):
+                    for sentence in sentences:
+                        synthesize(voice, [sentence])
+                    synthesize(voice, sentences)
+            except Exception as e:
+                logger.warning(f"Warm-up of voice {voice} failed: {str(e)}")
+                self._voices[voice]['error'] = str(e)
+            self._voices[voice]['seconds'] = round(time.perf_counter() - start, 3)
+
+        with self._lock:
+            self._seconds = round(time.perf_counter() - self._started, 3)
+            self._state = 'ready'
+        logger.info(f"Warm-up of {len(voices)} voices done in {self._seconds}s (pid {os.getpid()})")
+        return self.status
+
+    def start(self, voices: Dict[str, str], synthesize: WarmUpSynthesize, background: bool = True):
+        """Warm up voices once per process. Does nothing if disabled or already started in this process
+
+        Args:
+            voices (dict): Language of each voice to warm up
+            synthesize: Function synthesizing a list of sentences with a voice, see WarmUpSynthesize
+            background (bool): Run on a background thread, instead of returning when done
+        """
+        with self._lock:
+            if not self.enabled or self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._state = 'pending'
+            if background:
+                self._thread = threading.Thread(target=self.run, args=(voices, synthesize), name='warm-up',
+                                                daemon=True)
+                self._thread.start()
+        if not background:
+            self.run(voices, synthesize)
+
+    def wait(self, timeout: float = None) -> bool:
+        """Wait for a started warm-up to finish, returns whether the process is ready"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.ready
+
+    @property
+    def ready(self) -> bool:
+        return self._state == 'ready'
+
+    @property
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                'ready': self._state == 'ready',
+                'state': self._state,
+                'enabled': self.enabled,
+                'seconds': self._seconds,
+                'voices': {voice: dict(info) for voice, info in self._voices.items()}
+            }